@@ -20,56 +20,43 @@ const DashboardPage = () => {
     const [errorAll, setErrorAll] = useState('');
 
     useEffect(() => {
-        // Fetch My Tournaments (requires auth)
-        const fetchMyTournaments = async () => {
+        // One request loads every dashboard section; the server runs the queries concurrently
+        const fetchDashboard = async () => {
             if (!session) {
                 setLoadingMy(false);
-                setMyTournaments([]); // Don't fetch if no session
+                setLoadingAll(false);
+                return;
             }
             setLoadingMy(true);
+            setLoadingAll(true);
             setErrorMy('');
+            setErrorAll('');
             try {
-                const token = session.access_token;
-                const response = await fetch(`${config.apiBaseUrl}/tournaments/my-tournaments`, {
-                    headers: { 'Authorization': `Bearer ${token}` }
+                const response = await fetch(`${config.apiBaseUrl}/dashboard?featured_limit=3`, {
+                    headers: { 'Authorization': `Bearer ${session.access_token}` }
                 });
                 if (!response.ok) {
-                    throw new Error('Failed to fetch your tournaments.');
+                    throw new Error('Failed to load the dashboard.');
                 }
-                const data = await response.json();
-                console.log('My Tournaments Data:', data); // Debug log
-                setMyTournaments(data);
+                const dashboard = await response.json();
+                setMyTournaments(dashboard.my_tournaments || []);
+                setAllTournaments(dashboard.featured_tournaments || []);
+                if (dashboard.errors.my_tournaments) setErrorMy('Failed to fetch your tournaments.');
+                if (dashboard.errors.featured_tournaments) setErrorAll('Failed to fetch all tournaments.');
             } catch (err) {
                 setErrorMy(err.message);
-                setMyTournaments([]);
-            } finally {
-                setLoadingMy(false);
-            }
-        };
-
-        // Fetch All Tournaments (public)
-        const fetchAllTournaments = async () => {
-            setLoadingAll(true);
-            setErrorAll('');
-            try {
-                const response = await fetch(`${config.apiBaseUrl}/tournaments`);
-                if (!response.ok) {
-                    throw new Error('Failed to fetch all tournaments.');
-                }
-                const data = await response.json();
-                setAllTournaments(data);
-            } catch (err) {
                 setErrorAll(err.message);
+                setMyTournaments([]);
                 setAllTournaments([]);
             } finally {
+                setLoadingMy(false);
                 setLoadingAll(false);
             }
         };
 
-        fetchMyTournaments();
-        fetchAllTournaments();
+        fetchDashboard();
 
-    }, []);
+    }, [session]);
 
     // Combine loading states for a general loading indicator if needed
     // eslint-disable-next-line no-unused-vars
@@ -6,21 +6,30 @@ import pNcLogo from '../assets/playnconnect_logo.png'; // Default image
 
 const TournamentsListPage = () => {
     const [tournaments, setTournaments] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [error, setError] = useState('');
 
+    // This endpoint is public, no auth needed. It returns one page at a time.
+    const fetchPage = async (cursor) => {
+        const params = new URLSearchParams({ fields: 'full' });
+        if (cursor) params.set('cursor', cursor);
+        const response = await fetch(`${config.apiBaseUrl}/tournaments?${params}`);
+        if (!response.ok) {
+            throw new Error('Failed to fetch tournaments.');
+        }
+        return response.json();
+    };
+
     useEffect(() => {
         const fetchTournaments = async () => {
             setLoading(true);
             setError('');
             try {
-                // This endpoint is public, no auth needed
-                const response = await fetch(`${config.apiBaseUrl}/tournaments`);
-                if (!response.ok) {
-                    throw new Error('Failed to fetch tournaments.');
-                }
-                const data = await response.json();
-                setTournaments(data);
+                const page = await fetchPage(null);
+                setTournaments(page.data);
+                setNextCursor(page.next_cursor);
             } catch (err) {
                 setError(err.message);
             } finally {
@@ -31,6 +40,19 @@ const TournamentsListPage = () => {
         fetchTournaments();
     }, []);
 
+    const loadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const page = await fetchPage(nextCursor);
+            setTournaments((prev) => [...prev, ...page.data]);
+            setNextCursor(page.next_cursor);
+        } catch (err) {
+            setError(err.message);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     if (loading) return <div className="text-white text-center p-10">Loading Tournaments...</div>;
     if (error) return <div className="text-red-500 text-center p-10">{error}</div>;
 
@@ -76,6 +98,17 @@ const TournamentsListPage = () => {
                     ))}
                 </div>
             )}
+            {nextCursor && (
+                <div className="flex justify-center mt-8">
+                    <button
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                        className="bg-gray-600 text-white font-bold py-2 px-8 rounded-lg hover:bg-gray-700 transition disabled:opacity-50"
+                    >
+                        {loadingMore ? 'Loading...' : 'Load More'}
+                    </button>
+                </div>
+            )}
         </div>
     );
 };
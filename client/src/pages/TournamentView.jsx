@@ -30,6 +30,26 @@ const TournamentViewPage = () => {
         fetchTournament();
     }, [slug]);
 
+    // Follow live updates instead of polling; the server pushes only the changed fields.
+    const tournamentId = tournament?.id;
+    useEffect(() => {
+        if (!tournamentId) return;
+        const source = new EventSource(`${config.apiBaseUrl}/tournaments/${tournamentId}/live`);
+        source.addEventListener('tournament.updated', (event) => {
+            const changes = JSON.parse(event.data);
+            setTournament(current => current ? { ...current, ...changes } : current);
+        });
+        source.addEventListener('tournament.deleted', () => {
+            setError('This tournament has been deleted.');
+            source.close();
+        });
+        source.addEventListener('resync', async () => {
+            const response = await fetch(`${config.apiBaseUrl}/tournaments/slug/${slug}`);
+            if (response.ok) setTournament(await response.json());
+        });
+        return () => source.close();
+    }, [tournamentId, slug]);
+
     const handleDelete = async () => {
         if (!window.confirm("Are you sure you want to delete this tournament? This action cannot be undone.")) {
             return;
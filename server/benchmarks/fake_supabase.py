@@ -0,0 +1,564 @@
+# server/benchmarks/fake_supabase.py
+"""
+An in-memory stand-in for the parts of Supabase the service layer uses:
+PostgREST table queries and RPCs, Storage, and GoTrue. Every upstream call
+waits for a configurable injected latency and is counted, so benchmarks can
+report both response times and upstream calls per request.
+"""
+import asyncio
+import random
+import re
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import httpx
+from postgrest.exceptions import APIError
+
+from utils.metrics import current_route
+
+# Columns with a unique constraint in the real schema.
+UNIQUE_COLUMNS = {
+    "users": ["username"],
+    "tournaments": ["slug"],
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _singular(table: str) -> str:
+    return table[:-1] if table.endswith("s") else table
+
+
+class FakeBackend:
+    """Holds the tables, the latency model and the upstream call counters."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tables: Dict[str, List[dict]] = {}
+        self.calls: Counter = Counter()
+        # Calls made outside any request, e.g. by background jobs; not charged to the endpoints.
+        self.background_calls: Counter = Counter()
+        # (table, column) -> {value: [rows]}, dropped whenever the table is written to.
+        self._indexes: Dict[tuple, Dict[str, List[dict]]] = {}
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    async def hit(self, kind: str):
+        """Counts one upstream call and waits for the injected latency."""
+        if current_route() == "background":
+            self.background_calls[kind] += 1
+        else:
+            self.calls[kind] += 1
+        delay = self.latency_ms + (random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        else:
+            await asyncio.sleep(0)
+
+    def rows(self, table: str) -> List[dict]:
+        return self.tables.setdefault(table, [])
+
+    def index(self, table: str, column: str) -> Dict[str, List[dict]]:
+        """Groups a table by one column so lookups and embedding do not scan whole tables."""
+        key = (table, column)
+        index = self._indexes.get(key)
+        if index is None:
+            index = {}
+            for r in self.rows(table):
+                index.setdefault(str(r.get(column)), []).append(r)
+            self._indexes[key] = index
+        return index
+
+    def touch(self, table: str):
+        """Invalidates the indexes of a table after a write."""
+        for key in [k for k in self._indexes if k[0] == table]:
+            del self._indexes[key]
+
+    def insert_row(self, table: str, row: dict) -> dict:
+        row = dict(row)
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", _now())
+        for column in UNIQUE_COLUMNS.get(table, []):
+            if column in row and any(existing.get(column) == row[column] for existing in self.rows(table)):
+                raise APIError({
+                    "message": f'duplicate key value violates unique constraint "{table}_{column}_key"',
+                    "code": "23505",
+                })
+        self.rows(table).append(row)
+        self.touch(table)
+        return row
+
+
+# --- select parsing and embedding ---
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, current = [], 0, ""
+    for ch in text:
+        if ch == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += ch == "("
+        depth -= ch == ")"
+        current += ch
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _parse_select(columns: str) -> List[tuple]:
+    """Returns ("column", name) and ("embed", table, inner, sub_select) items."""
+    items = []
+    for part in _split_top_level(columns):
+        match = re.match(r"^(\w+)(![\w]+)?\((.*)\)$", part, re.S)
+        if match:
+            items.append(("embed", match.group(1), match.group(2) == "!inner", _parse_select(match.group(3))))
+        else:
+            items.append(("column", part))
+    return items
+
+
+class FakeQuery:
+    """Mimics postgrest's async request builders closely enough for services/*.py."""
+
+    def __init__(self, backend: FakeBackend, table: str):
+        self.backend = backend
+        self.table = table
+        self._op = "select"
+        self._select = [("column", "*")]
+        self._count = None
+        self._payload: Any = None
+        self._filters: List = []
+        self._order: List[tuple] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._single = False
+        # An equality filter on a plain column, used to look rows up through an index.
+        self._eq: Optional[tuple] = None
+
+    # --- operations ---
+    def select(self, columns: str = "*", count: Optional[str] = None):
+        self._select = _parse_select(columns)
+        self._count = count
+        return self
+
+    def insert(self, payload):
+        self._op, self._payload = "insert", payload
+        return self
+
+    def update(self, payload: dict):
+        self._op, self._payload = "update", payload
+        return self
+
+    def delete(self):
+        self._op = "delete"
+        return self
+
+    def upsert(self, payload, **kwargs):
+        self._op, self._payload = "upsert", payload
+        return self
+
+    # --- filters ---
+    def _filter(self, column, predicate):
+        self._filters.append((column, predicate))
+        return self
+
+    def eq(self, column, value):
+        if self._eq is None and "." not in column:
+            self._eq = (column, str(value))
+        return self._filter(column, lambda v: v is not None and str(v) == str(value))
+
+    def neq(self, column, value):
+        return self._filter(column, lambda v: str(v) != str(value))
+
+    def gt(self, column, value):
+        return self._filter(column, lambda v: v is not None and str(v) > str(value))
+
+    def gte(self, column, value):
+        return self._filter(column, lambda v: v is not None and str(v) >= str(value))
+
+    def lt(self, column, value):
+        return self._filter(column, lambda v: v is not None and str(v) < str(value))
+
+    def lte(self, column, value):
+        return self._filter(column, lambda v: v is not None and str(v) <= str(value))
+
+    def in_(self, column, values):
+        allowed = {str(v) for v in values}
+        return self._filter(column, lambda v: str(v) in allowed)
+
+    def ilike(self, column, pattern):
+        regex = re.compile("^" + re.escape(pattern).replace("%", ".*") + "$", re.I)
+        return self._filter(column, lambda v: v is not None and bool(regex.match(str(v))))
+
+    def text_search(self, column, query, options=None, config=None):
+        prefix = query.split(":")[0].lower()
+        return self._filter(column, lambda v: v is not None and any(w.startswith(prefix) for w in re.findall(r"\w+", str(v).lower())))
+
+    def or_(self, expression: str, reference_table: Optional[str] = None):
+        predicate = _parse_logic("or", expression)
+        self._filters.append((None, predicate))
+        return self
+
+    # --- modifiers ---
+    def order(self, column, desc: bool = False, **kwargs):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int, **kwargs):
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs):
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    def maybe_single(self):
+        return self.single()
+
+    # --- execution ---
+    def _matches(self, row: dict) -> bool:
+        for column, predicate in self._filters:
+            if column is None:
+                if not predicate(row):
+                    return False
+            elif "." in column:
+                # Filters on embedded resources are applied while embedding.
+                continue
+            elif not predicate(row.get(column)):
+                return False
+        return True
+
+    def _embed(self, row: dict, items: List[tuple], table: str, prefix: str = "") -> Optional[dict]:
+        out = {}
+        for item in items:
+            if item[0] == "column":
+                name = item[1]
+                if name == "*":
+                    out.update(row)
+                elif name in row:
+                    out[name] = row[name]
+                continue
+            _, embedded, inner, sub_items = item
+            path = f"{prefix}{embedded}"
+            embedded_filters = [(c.split(".", 1)[1], p) for c, p in self._filters if c and c.startswith(path + ".") and c.count(".") == path.count(".") + 1]
+            fk_to_parent = f"{_singular(embedded)}_id"
+            if fk_to_parent in row:
+                # Many-to-one: this row points at the embedded table.
+                related = next(iter(self.backend.index(embedded, "id").get(str(row[fk_to_parent]), [])), None)
+                if related is not None and all(p(related.get(c)) for c, p in embedded_filters):
+                    out[embedded] = self._embed(related, sub_items, embedded, path + ".")
+                else:
+                    if inner:
+                        return None
+                    out[embedded] = None
+            else:
+                # One-to-many: the embedded table points back at this row.
+                fk = f"{_singular(table)}_id"
+                children = [
+                    self._embed(r, sub_items, embedded, path + ".")
+                    for r in self.backend.index(embedded, fk).get(str(row["id"]), [])
+                    if all(p(r.get(c)) for c, p in embedded_filters)
+                ]
+                if inner and not children:
+                    return None
+                out[embedded] = [c for c in children if c is not None]
+        return out
+
+    def _sorted(self, rows: List[dict]) -> List[dict]:
+        for column, desc in reversed(self._order):
+            rows = sorted(rows, key=lambda r: (r.get(column) is None, str(r.get(column))), reverse=desc)
+        return rows
+
+    def _response(self, data, count=None):
+        if self._single:
+            if len(data) != 1:
+                raise APIError({
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                    "code": "PGRST116",
+                })
+            data = data[0]
+        return SimpleNamespace(data=data, count=count)
+
+    async def execute(self):
+        await self.backend.hit(f"rest:{self._op}:{self.table}")
+        rows = self.backend.rows(self.table)
+
+        if self._op == "insert":
+            payload = self._payload if isinstance(self._payload, list) else [self._payload]
+            return self._response([dict(self.backend.insert_row(self.table, r)) for r in payload])
+
+        if self._op == "upsert":
+            payload = self._payload if isinstance(self._payload, list) else [self._payload]
+            out = []
+            for r in payload:
+                existing = next((row for row in rows if "id" in r and str(row.get("id")) == str(r["id"])), None)
+                if existing is not None:
+                    existing.update(r)
+                    self.backend.touch(self.table)
+                    out.append(dict(existing))
+                else:
+                    out.append(dict(self.backend.insert_row(self.table, r)))
+            return self._response(out)
+
+        candidates = rows if self._eq is None else self.backend.index(self.table, self._eq[0]).get(self._eq[1], [])
+        matched = [r for r in candidates if self._matches(r)]
+
+        if self._op == "update":
+            for r in matched:
+                r.update(self._payload)
+            self.backend.touch(self.table)
+            return self._response([dict(r) for r in matched])
+
+        if self._op == "delete":
+            ids = {id(r) for r in matched}
+            self.backend.tables[self.table] = [r for r in rows if id(r) not in ids]
+            self.backend.touch(self.table)
+            return self._response([dict(r) for r in matched])
+
+        embedded = [e for e in (self._embed(r, self._select, self.table) for r in matched) if e is not None]
+        count = len(embedded) if self._count else None
+        embedded = self._sorted(embedded)
+        end = None if self._limit is None else self._offset + self._limit
+        return self._response(embedded[self._offset:end], count)
+
+
+# --- PostgREST logic trees used by or_() ---
+
+def _parse_condition(text: str):
+    column, op, value = text.split(".", 2)
+    if value.startswith('"') and value.endswith('"'):
+        value = value[1:-1]
+    compare = {
+        "eq": lambda v: str(v) == value,
+        "neq": lambda v: str(v) != value,
+        "lt": lambda v: v is not None and str(v) < value,
+        "lte": lambda v: v is not None and str(v) <= value,
+        "gt": lambda v: v is not None and str(v) > value,
+        "gte": lambda v: v is not None and str(v) >= value,
+    }[op]
+    return lambda row: compare(row.get(column))
+
+
+def _parse_logic(kind: str, body: str):
+    parts = []
+    for part in _split_top_level(body):
+        match = re.match(r"^(and|or)\((.*)\)$", part, re.S)
+        parts.append(_parse_logic(match.group(1), match.group(2)) if match else _parse_condition(part))
+    if kind == "and":
+        return lambda row: all(p(row) for p in parts)
+    return lambda row: any(p(row) for p in parts)
+
+
+# --- RPCs (Python versions of sql/*.sql) ---
+
+class FakeRPC:
+    def __init__(self, backend: FakeBackend, name: str, params: dict):
+        self.backend, self.name, self.params = backend, name, params
+
+    def _raise(self, message: str, details: Optional[str] = None):
+        raise APIError({"message": message, "details": details, "code": "P0001"})
+
+    def _members_in_tournament(self, tournament_id: str) -> set:
+        team_ids = {str(t["id"]) for t in self.backend.rows("teams") if str(t["tournament_id"]) == tournament_id}
+        return {str(m["user_id"]) for m in self.backend.rows("team_members") if str(m["team_id"]) in team_ids}
+
+    async def execute(self):
+        await self.backend.hit(f"rpc:{self.name}")
+        handler = getattr(self, f"_rpc_{self.name}", None)
+        if handler is None:
+            self._raise(f"Could not find the function public.{self.name}")
+        return SimpleNamespace(data=handler(**self.params), count=None)
+
+    def _registration_closed(self, tournament_id: str) -> bool:
+        return any(str(m["tournament_id"]) == tournament_id for m in self.backend.rows("matches"))
+
+    def _rpc_create_team_with_leader(self, p_tournament_id, p_team_name, p_leader_id):
+        if self._registration_closed(p_tournament_id):
+            self._raise("REGISTRATION_CLOSED")
+        if p_leader_id in self._members_in_tournament(p_tournament_id):
+            self._raise("LEADER_ALREADY_REGISTERED")
+        if any(str(t["tournament_id"]) == p_tournament_id and t["name"].lower() == p_team_name.lower() for t in self.backend.rows("teams")):
+            self._raise("TEAM_NAME_TAKEN")
+        team = self.backend.insert_row("teams", {"name": p_team_name, "tournament_id": p_tournament_id, "leader_id": p_leader_id})
+        self.backend.insert_row("team_members", {"team_id": team["id"], "user_id": p_leader_id})
+        return dict(team)
+
+    def _rpc_add_team_members(self, p_team_id, p_user_ids, p_requester_id):
+        team = next((t for t in self.backend.rows("teams") if str(t["id"]) == p_team_id), None)
+        if team is None:
+            self._raise("TEAM_NOT_FOUND")
+        if str(team["leader_id"]) != p_requester_id:
+            self._raise("NOT_TEAM_LEADER")
+        if self._registration_closed(str(team["tournament_id"])):
+            self._raise("REGISTRATION_CLOSED")
+        conflicts = sorted(set(p_user_ids) & self._members_in_tournament(str(team["tournament_id"])))
+        if conflicts:
+            self._raise("USERS_ALREADY_REGISTERED", ", ".join(conflicts))
+        return [dict(self.backend.insert_row("team_members", {"team_id": p_team_id, "user_id": u})) for u in p_user_ids]
+
+    def _rpc_import_teams(self, p_tournament_id, p_teams):
+        if self._registration_closed(p_tournament_id):
+            self._raise("REGISTRATION_CLOSED")
+        existing = [t for t in self.backend.rows("teams") if str(t["tournament_id"]) == p_tournament_id]
+        tournament = next(t for t in self.backend.rows("tournaments") if str(t["id"]) == p_tournament_id)
+        if tournament.get("max_teams") is not None and len(existing) + len(p_teams) > tournament["max_teams"]:
+            self._raise("TOURNAMENT_FULL")
+        taken = sorted({t["name"].lower() for t in existing} & {t["name"].lower() for t in p_teams})
+        if taken:
+            self._raise("TEAM_NAME_TAKEN", ", ".join(taken))
+        conflicts = sorted({u for t in p_teams for u in t["member_ids"]} & self._members_in_tournament(p_tournament_id))
+        if conflicts:
+            self._raise("USERS_ALREADY_REGISTERED", ", ".join(conflicts))
+        created = []
+        for entry in p_teams:
+            team = self.backend.insert_row("teams", {"name": entry["name"], "tournament_id": p_tournament_id, "leader_id": entry["leader_id"]})
+            for user_id in entry["member_ids"]:
+                self.backend.insert_row("team_members", {"team_id": team["id"], "user_id": user_id})
+            created.append(dict(team))
+        return created
+
+
+# --- Storage and Auth ---
+
+class FakeBucket:
+    def __init__(self, backend: FakeBackend, url: str, bucket: str):
+        self.backend, self.url, self.bucket = backend, url, bucket
+
+    async def upload(self, path, file, file_options=None):
+        await self.backend.hit("storage:upload")
+        return SimpleNamespace(path=path)
+
+    async def remove(self, paths):
+        await self.backend.hit("storage:remove")
+        return [{"name": p} for p in paths]
+
+    async def get_public_url(self, path, options=None):
+        # The real client builds this string locally; no upstream call.
+        return f"{self.url}/storage/v1/object/public/{self.bucket}/{path}"
+
+
+class FakeStorage:
+    def __init__(self, backend: FakeBackend, url: str):
+        self.backend, self.url = backend, url
+
+    def from_(self, bucket: str) -> FakeBucket:
+        return FakeBucket(self.backend, self.url, bucket)
+
+
+class FakeAuth:
+    def __init__(self, backend: FakeBackend):
+        self.backend = backend
+
+    def _user(self, user_id: str, email: str):
+        return SimpleNamespace(id=user_id, email=email)
+
+    async def sign_up(self, credentials: dict):
+        await self.backend.hit("auth:sign_up")
+        return SimpleNamespace(user=self._user(str(uuid.uuid4()), credentials["email"]), session=None)
+
+    async def sign_in_with_password(self, credentials: dict):
+        await self.backend.hit("auth:sign_in")
+        session = SimpleNamespace(access_token="fake-access-token", refresh_token="fake-refresh-token")
+        return SimpleNamespace(user=self._user(str(uuid.uuid4()), credentials["email"]), session=session)
+
+    async def get_user(self, jwt: Optional[str] = None):
+        await self.backend.hit("auth:get_user")
+        return None
+
+
+class FakeSupabaseClient:
+    """Drop-in for supabase.AsyncClient as used by services/*.py."""
+
+    def __init__(self, backend: FakeBackend, url: str = "http://fake-supabase"):
+        self.backend = backend
+        self.url = url
+        self.storage = FakeStorage(backend, url)
+        self.auth = FakeAuth(backend)
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self.backend, name)
+
+    def from_(self, name: str) -> FakeQuery:
+        return self.table(name)
+
+    def rpc(self, name: str, params: Optional[dict] = None) -> FakeRPC:
+        return FakeRPC(self.backend, name, params or {})
+
+
+def fake_http_client(backend: FakeBackend) -> httpx.AsyncClient:
+    """An httpx client for the calls that bypass the supabase client (streamed Storage uploads)."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        kind = "storage:upload" if "/storage/v1/object/" in request.url.path else f"http:{request.method}"
+        async for _ in request.stream:
+            pass
+        await backend.hit(kind)
+        return httpx.Response(200, json={"Key": request.url.path})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+# --- Seed data ---
+
+def seed(backend: FakeBackend, users: int = 1000, tournaments: int = 200, teams_per_tournament: int = 8,
+         players_per_team: int = 5, games=("Valorant", "CODM", "BGMI", "Free Fire")) -> dict:
+    """Fills the fake with a realistic catalog and returns handy IDs for scenarios."""
+    rng = random.Random(42)
+    user_rows = [
+        backend.insert_row("users", {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "username": f"player{i:05d}",
+            "full_name": f"Player {i}",
+            "email": f"player{i}@example.com",
+            "photo_url": None,
+            "game_ids": {},
+            "social_links": {},
+            "updated_at": _now(),
+        })
+        for i in range(users)
+    ]
+    tournament_rows = []
+    for i in range(tournaments):
+        owner = user_rows[i % len(user_rows)]
+        t = backend.insert_row("tournaments", {
+            "name": f"{games[i % len(games)]} Open {i}",
+            "slug": f"{games[i % len(games)].lower().replace(' ', '-')}-open-{i}",
+            "description": "Lorem ipsum dolor sit amet. " * 20,
+            "game": games[i % len(games)],
+            "elimination_type": "Single Elimination" if i % 2 else "Round Robin",
+            "start_date": _now(),
+            "max_teams": 64,
+            "max_players_per_team": players_per_team,
+            "image_url": None,
+            "created_by": owner["id"],
+            "updated_at": _now(),
+        })
+        tournament_rows.append(t)
+        backend.insert_row("tournament_organizers", {"tournament_id": t["id"], "user_id": owner["id"], "role": "owner"})
+
+    # Rosters are drawn from the back half of the users so the front half stays free to register.
+    pool = user_rows[len(user_rows) // 2:]
+    cursor = 0
+    for t in tournament_rows:
+        for j in range(teams_per_tournament):
+            members = [pool[(cursor + k) % len(pool)] for k in range(players_per_team)]
+            cursor += players_per_team
+            team = backend.insert_row("teams", {"name": f"Team {j}", "tournament_id": t["id"], "leader_id": members[0]["id"]})
+            for m in members:
+                backend.insert_row("team_members", {"team_id": team["id"], "user_id": m["id"]})
+
+    backend.calls.clear()
+    return {"users": user_rows, "tournaments": tournament_rows}
@@ -0,0 +1,226 @@
+# server/benchmarks/run.py
+"""
+Endpoint benchmarks: runs the real FastAPI app from main.py in-process against the
+in-memory Supabase stand-in in benchmarks/fake_supabase.py.
+
+For every endpoint and concurrency level it reports throughput, p50/p95/p99 latency
+and upstream Supabase calls per request. Calls made by background jobs, off the request
+path, are reported separately and not charged to the endpoint. With --check it exits non-zero when an
+endpoint makes more upstream calls than its budget, so N+1 regressions fail CI.
+
+    cd server
+    python -m benchmarks.run
+    python -m benchmarks.run --latency-ms 20 --concurrency 1,16,64 --requests 300
+    python -m benchmarks.run --only slug,search --json bench.json --check
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+# The app reads its settings at import time; point it at the stand-in before importing it.
+os.environ.setdefault("SUPABASE_URL", "http://fake-supabase")
+os.environ.setdefault("SUPABASE_KEY", "benchmark-service-key")
+os.environ.setdefault("FRONTEND_URL", "http://localhost:5173")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "benchmark-jwt-secret")
+os.environ["AUTH_VERIFY_MODE"] = "local"
+# The benchmark measures the handlers, so the per-client budgets must not throttle it.
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx  # noqa: E402
+import jwt  # noqa: E402
+
+from benchmarks.fake_supabase import FakeBackend, FakeSupabaseClient, fake_http_client, seed  # noqa: E402
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    # (request index, run index) -> path
+    path: Callable[[int, int], str]
+    # Upstream calls per request this endpoint is allowed to make (checked with --check).
+    max_calls: float
+    # (request index, run index) -> user index whose token is sent, or None for anonymous
+    user: Optional[Callable[[int, int], int]] = None
+    body: Optional[Callable[[int, int], dict]] = None
+
+
+def build_scenarios(data: dict) -> List[Scenario]:
+    users, tournaments = data["users"], data["tournaments"]
+    n_users, n_tournaments = len(users), len(tournaments)
+    # Users in the front half are owners or free agents; the back half fills the seeded rosters.
+    free = max(1, n_users // 2)
+
+    return [
+        Scenario("list", "GET", lambda i, r: "/tournaments/", max_calls=1),
+        Scenario("list_by_game", "GET", lambda i, r: "/tournaments/?game=Valorant&latest=true", max_calls=1),
+        Scenario("slug", "GET", lambda i, r: f"/tournaments/slug/{tournaments[i % n_tournaments]['slug']}", max_calls=1),
+        Scenario("search", "GET", lambda i, r: "/tournaments/search/valo", max_calls=1),
+        Scenario("me", "GET", lambda i, r: "/users/me", max_calls=1, user=lambda i, r: i % n_users),
+        Scenario("profile", "GET", lambda i, r: f"/users/profile/{users[i % n_users]['username']}", max_calls=1),
+        Scenario("user_search", "GET", lambda i, r: "/users/search/player001", max_calls=1, user=lambda i, r: i % n_users),
+        Scenario("my_tournaments", "GET", lambda i, r: "/tournaments/my-tournaments", max_calls=1, user=lambda i, r: i % n_tournaments),
+        # Four independent reads run concurrently: four calls, but about one call of latency.
+        Scenario("dashboard", "GET", lambda i, r: "/dashboard", max_calls=4, user=lambda i, r: i % n_tournaments),
+        # Teams, members and their profiles come from one embedded query.
+        Scenario("roster", "GET", lambda i, r: f"/teams/tournaments/{tournaments[i % n_tournaments]['id']}", max_calls=1, user=lambda i, r: 0),
+        Scenario("user_teams", "GET", lambda i, r: f"/teams/user/{users[free + i % (n_users - free)]['id']}", max_calls=1, user=lambda i, r: 0),
+        Scenario(
+            "update_tournament", "PUT",
+            lambda i, r: f"/tournaments/{tournaments[i % n_tournaments]['id']}",
+            max_calls=2,
+            user=lambda i, r: i % n_tournaments,
+            body=lambda i, r: {"description": f"Updated {i}"},
+        ),
+        Scenario(
+            "register_team", "POST",
+            # A different tournament per run so each free user can register once per run.
+            lambda i, r: f"/teams/tournaments/{tournaments[-1 - r]['id']}/teams",
+            max_calls=1,
+            user=lambda i, r: i % free,
+            body=lambda i, r: {"name": f"Bench Team {r}-{i}"},
+        ),
+    ]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+async def run_scenario(client: httpx.AsyncClient, backend: FakeBackend, scenario: Scenario,
+                       tokens: List[str], requests: int, concurrency: int, run_index: int) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < requests:
+            i = next_index
+            next_index += 1
+            headers = {}
+            if scenario.user is not None:
+                headers["Authorization"] = f"Bearer {tokens[scenario.user(i, run_index)]}"
+            body = scenario.body(i, run_index) if scenario.body else None
+            start = time.perf_counter()
+            response = await client.request(scenario.method, scenario.path(i, run_index), headers=headers, json=body)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    calls_before = backend.total_calls
+    background_before = sum(backend.background_calls.values())
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "endpoint": scenario.name,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "upstream_calls_per_request": round((backend.total_calls - calls_before) / requests, 2),
+        "background_calls_per_request": round((sum(backend.background_calls.values()) - background_before) / requests, 2),
+        "max_calls": scenario.max_calls,
+    }
+
+
+def mint_tokens(users: List[dict], secret: str) -> List[str]:
+    now = int(time.time())
+    return [
+        jwt.encode({
+            "sub": u["id"],
+            "email": u["email"],
+            "aud": "authenticated",
+            "role": "authenticated",
+            "iat": now,
+            "exp": now + 3600,
+        }, secret, algorithm="HS256")
+        for u in users
+    ]
+
+
+def print_table(results: List[dict]):
+    header = f"{'endpoint':<18} {'conc':>5} {'req':>6} {'err':>5} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'calls/req':>10} {'bg/req':>7}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        flag = "  !" if r["upstream_calls_per_request"] > r["max_calls"] else ""
+        print(f"{r['endpoint']:<18} {r['concurrency']:>5} {r['requests']:>6} {r['errors']:>5} {r['rps']:>9} "
+              f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} {r['upstream_calls_per_request']:>10} {r['background_calls_per_request']:>7}{flag}")
+
+
+async def main(args) -> int:
+    from config.config import settings
+    from utils.supabase import set_async_client
+
+    backend = FakeBackend(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    data = seed(backend, users=args.users, tournaments=args.tournaments)
+    set_async_client(FakeSupabaseClient(backend, settings.SUPABASE_URL), fake_http_client(backend))
+
+    import main as app_module
+    # Request logging would dominate the numbers; keep warnings and errors only.
+    logging.disable(logging.INFO)
+
+    tokens = mint_tokens(data["users"], settings.SUPABASE_JWT_SECRET)
+    scenarios = build_scenarios(data)
+    if args.only:
+        wanted = set(args.only.split(","))
+        scenarios = [s for s in scenarios if s.name in wanted]
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    results = []
+    app = app_module.app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scenario in scenarios:
+                for run_index, concurrency in enumerate(levels):
+                    results.append(await run_scenario(client, backend, scenario, tokens, args.requests, concurrency, run_index))
+
+    print(f"\nlatency={args.latency_ms}ms jitter={args.jitter_ms}ms users={args.users} tournaments={args.tournaments}\n")
+    print_table(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms, "results": results}, f, indent=2)
+
+    if args.check:
+        failures = [r for r in results if r["upstream_calls_per_request"] > r["max_calls"] or r["errors"]]
+        for r in failures:
+            print(f"FAIL {r['endpoint']} @ {r['concurrency']}: {r['upstream_calls_per_request']} calls/request "
+                  f"(budget {r['max_calls']}), {r['errors']} errors", file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the API against an in-memory Supabase stand-in.")
+    parser.add_argument("--latency-ms", type=float, default=10.0, help="Injected latency per upstream call.")
+    parser.add_argument("--jitter-ms", type=float, default=2.0, help="Extra random latency per upstream call.")
+    parser.add_argument("--concurrency", default="1,16,64", help="Comma-separated concurrency levels.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency level.")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--tournaments", type=int, default=200)
+    parser.add_argument("--only", help="Comma-separated endpoint names to run.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if an endpoint exceeds its upstream call budget or errors.")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
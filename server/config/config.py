@@ -1,4 +1,5 @@
 # server/config/config.py
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -6,10 +7,125 @@ class Settings(BaseSettings):
     Loads and validates environment variables from the .env file.
     """
     SUPABASE_URL: str
+    # The service_role key: the RPCs in sql/ can only be executed with it.
     SUPABASE_KEY: str
     FRONTEND_URL: str
 
+    # --- Auth token verification ---
+    # "local" verifies JWTs in-process (signature, expiry, audience);
+    # "remote" asks GoTrue about every token via auth.get_user.
+    AUTH_VERIFY_MODE: str = "local"
+    # Legacy HS256 projects sign tokens with this shared secret; without it, HS256 tokens
+    # are verified by GoTrue as in "remote" mode.
+    # Projects using asymmetric signing keys are verified against the JWKS endpoint.
+    SUPABASE_JWT_SECRET: Optional[str] = None
+    SUPABASE_JWT_AUDIENCE: str = "authenticated"
+    JWKS_REFRESH_SECONDS: int = 600
+    TOKEN_CACHE_SIZE: int = 10000
+
+    # --- Upstream connection pool ---
+    # Maximum number of concurrent connections the async client keeps to Supabase.
+    SUPABASE_POOL_SIZE: int = 200
+    # Idle connections kept open for reuse, and how long they may stay idle.
+    SUPABASE_KEEPALIVE_CONNECTIONS: int = 100
+    SUPABASE_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    # Multiplex requests over one connection per host (requires the h2 package).
+    SUPABASE_HTTP2: bool = True
+    SUPABASE_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    SUPABASE_READ_TIMEOUT_SECONDS: float = 30.0
+    # How long a request may wait for a free connection when the pool is exhausted.
+    SUPABASE_POOL_TIMEOUT_SECONDS: float = 10.0
+    # Connections opened at startup when HTTP/2 is off.
+    SUPABASE_WARMUP_CONNECTIONS: int = 4
+
+    # --- Public tournament snapshots (tournament, organizers and teams as ready-to-send JSON) ---
+    TOURNAMENT_CACHE_SIZE: int = 1024
+    TOURNAMENT_CACHE_TTL_SECONDS: int = 30
+
+    # --- Tournament roster pages (teams with their members) ---
+    ROSTER_CACHE_SIZE: int = 1024
+    ROSTER_CACHE_TTL_SECONDS: int = 30
+    # Team -> tournament lookups for member changes, which only know the team.
+    TEAM_TOURNAMENT_CACHE_SIZE: int = 10000
+
+    # --- Profile cache: an in-process LRU plus an optional shared tier ---
+    PROFILE_CACHE_SIZE: int = 10000
+    PROFILE_CACHE_TTL_SECONDS: int = 30
+    # How long "this user has no profile yet" is remembered, in the shared tier only; without
+    # PROFILE_CACHE_SHARED_URL it is not remembered, as a worker could not see another's create.
+    PROFILE_NEGATIVE_TTL_SECONDS: int = 10
+    # redis://host:6379/0 for a Redis-compatible server (needs the `redis` package), or memory://
+    # for the in-process stand-in. Unset, the cache is per worker only.
+    PROFILE_CACHE_SHARED_URL: Optional[str] = None
+    PROFILE_CACHE_SHARED_TTL_SECONDS: int = 300
+
+    # --- Organizer role cache used for tournament permission checks ---
+    ORGANIZER_ROLES_CACHE_SIZE: int = 10000
+    ORGANIZER_ROLES_CACHE_TTL_SECONDS: int = 30
+
+    # --- In-memory search index ---
+    # Each worker reloads its index on this interval to pick up writes made by other workers.
+    SEARCH_INDEX_REFRESH_SECONDS: int = 300
+
+    # --- Uploads (avatars and tournament banners) ---
+    MAX_UPLOAD_BYTES: int = 5 * 1024 * 1024
+
+    # --- Bulk team import (CSV / NDJSON) ---
+    MAX_IMPORT_BYTES: int = 2 * 1024 * 1024
+    MAX_IMPORT_ROWS: int = 5000
+
+    # --- Round-robin standings kept in memory ---
+    STANDINGS_CACHE_SIZE: int = 1024
+    STANDINGS_CACHE_TTL_SECONDS: int = 60
+
+    # --- Response compression (gzip, or Brotli when installed) ---
+    COMPRESSION_MINIMUM_BYTES: int = 1024
+
+    # --- Live tournament updates (Server-Sent Events) ---
+    # Frames a spectator may fall behind before being told to resync.
+    LIVE_QUEUE_SIZE: int = 64
+    LIVE_HEARTBEAT_SECONDS: int = 15
+
+    # --- Background jobs (side effects run after the response) ---
+    BACKGROUND_WORKERS: int = 4
+    BACKGROUND_QUEUE_SIZE: int = 1000
+    BACKGROUND_MAX_ATTEMPTS: int = 5
+    # The first retry waits about this long; each further retry waits twice as long.
+    BACKGROUND_RETRY_BASE_SECONDS: float = 0.5
+    BACKGROUND_JOB_TIMEOUT_SECONDS: float = 30.0
+    # How long shutdown waits for queued jobs to finish.
+    BACKGROUND_DRAIN_SECONDS: float = 10.0
+    # A JSON-lines file that keeps queued jobs across restarts (one per worker); unset keeps them in memory.
+    BACKGROUND_BACKLOG_PATH: Optional[str] = None
+
+    # --- Admission control ---
+    # Per-client token buckets: a sustained rate plus a burst, for the search and auth routes.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_SEARCH_PER_MINUTE: int = 60
+    RATE_LIMIT_SEARCH_BURST: int = 20
+    RATE_LIMIT_AUTH_PER_MINUTE: int = 10
+    RATE_LIMIT_AUTH_BURST: int = 5
+    # Buckets kept per policy; the least recently seen clients are forgotten first.
+    RATE_LIMIT_MAX_CLIENTS: int = 100000
+    # Only enable behind a proxy that overwrites X-Forwarded-For, or clients can pick their own key.
+    TRUST_FORWARDED_FOR: bool = False
+    # Requests a worker handles at once; beyond that they wait briefly, then get a 503.
+    MAX_CONCURRENT_REQUESTS: int = 256
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 0.25
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    # --- Logging ---
+    LOG_LEVEL: str = "INFO"
+    # "json" for one JSON object per line, "text" for the plain format.
+    LOG_FORMAT: str = "json"
+    # Records waiting for the writer thread; beyond this they are dropped and counted.
+    LOG_QUEUE_SIZE: int = 10000
+    # Fraction of info-level events kept per route template, e.g. {"/tournaments/slug/{slug}": 0.01};
+    # warnings and errors are always kept.
+    LOG_SAMPLE_RATES: Dict[str, float] = {}
+    LOG_DEFAULT_SAMPLE_RATE: float = 1.0
+
     model_config = SettingsConfigDict(env_file=".env")
 
 # Create a single instance of the settings to be used throughout the application
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -1,11 +1,59 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from routers import user_routes, auth_routes, tournament_routes, teams_routes
+from fastapi.responses import PlainTextResponse
+from routers import user_routes, auth_routes, tournament_routes, teams_routes, fixtures_routes, dashboard_routes
 from fastapi.middleware.cors import CORSMiddleware
 from config.config import settings
+from services import search_index
+from utils import background, supabase as supabase_clients
+from utils.token_verifier import token_verifier
+from utils.cache import cache_stats
+from utils.metrics import MetricsMiddleware, render_metrics
+from utils.compression import CompressionMiddleware
+from utils.rate_limit import AdmissionControlMiddleware
+from utils.uploads import IMPORT_PATHS, UploadSizeLimitMiddleware
+from utils.single_flight import single_flight_stats
+from utils.shared_cache import close_stores
+from utils.logs import setup_logging, stop_logging
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup and shutdown work for each worker process."""
+    # Log records go through a queue to a writer thread (see utils/logs.py).
+    setup_logging()
+    # Connect before reporting ready, so the first requests find warm connections and signing keys.
+    supabase_clients.init_clients()
+    await asyncio.gather(supabase_clients.warm_up(), token_verifier.warm_up())
+    key_refresh_task = token_verifier.start_key_refresh()
+
+    # Load the typeahead indexes; until they are ready, search falls back to Postgres.
+    try:
+        await search_index.load_search_indexes()
+    except Exception as e:
+        logger.warning("Could not load search indexes at startup: %s", e)
+    refresh_task = asyncio.create_task(search_index.refresh_search_indexes_periodically())
+    # Side effects queued by requests run here; jobs left by the previous process are picked up.
+    background.queue.start()
+
+    yield
+
+    refresh_task.cancel()
+    if key_refresh_task is not None:
+        key_refresh_task.cancel()
+    # Let queued side effects finish while the upstream clients are still open.
+    await background.queue.drain(settings.BACKGROUND_DRAIN_SECONDS)
+    await close_stores()
+    await supabase_clients.close_clients()
+    stop_logging()
 
 app = FastAPI(
     title="PlayNConnct Server",
-    description="A FastAPI backend on PlayNConnect"
+    description="A FastAPI backend on PlayNConnect",
+    lifespan=lifespan
 )
 
 # Define the list of allowed origins from your settings
@@ -13,6 +61,18 @@ origins = [
     settings.FRONTEND_URL,
 ]
 
+# Innermost, so shed requests still get CORS headers and are counted in /metrics
+app.add_middleware(
+    AdmissionControlMiddleware,
+    max_concurrent=settings.MAX_CONCURRENT_REQUESTS,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+)
+
+# Oversized uploads are refused before they take an admission slot or reach the form parser
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=settings.MAX_UPLOAD_BYTES)
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=settings.MAX_IMPORT_BYTES, paths=IMPORT_PATHS)
+
 # Add the CORS middleware to the application
 app.add_middleware(
     CORSMiddleware,
@@ -22,13 +82,39 @@ app.add_middleware(
     allow_headers=["*"],         # Allows all headers
 )
 
+# Compresses JSON bodies above the threshold; event streams and small bodies are left alone
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_BYTES)
+
+# Outermost, so latency covers CORS handling and the status seen by the client is recorded
+app.add_middleware(MetricsMiddleware)
+
 # Include your routers
 app.include_router(auth_routes.router)
 app.include_router(user_routes.router)
 app.include_router(tournament_routes.router)
 app.include_router(teams_routes.router)
+app.include_router(fixtures_routes.router)
+app.include_router(dashboard_routes.router)
 
 @app.get("/", tags=["Root"])
-def read_root():
+async def read_root():
     """A simple root endpoint to confirm the server is running."""
     return {"message": "Welcome to the authentication server!"}
+
+
+@app.get("/cache/stats", tags=["Root"])
+async def read_cache_stats():
+    """Reports hit/miss counters for the in-process caches."""
+    return cache_stats()
+
+
+@app.get("/coalescing/stats", tags=["Root"])
+async def read_coalescing_stats():
+    """Reports how many reads shared an in-flight upstream call instead of making their own."""
+    return single_flight_stats()
+
+
+@app.get("/metrics", tags=["Root"], response_class=PlainTextResponse)
+async def read_metrics():
+    """Per-route request latency and Supabase call timings in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
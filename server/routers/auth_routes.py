@@ -1,15 +1,16 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from services.auth import create_new_user, sign_in_user, UserCredentials
+from utils.rate_limit import rate_limit
 
 router = APIRouter(
     prefix="/auth",
     tags=["Authentication"]
 )
 
-@router.post("/signup")
+@router.post("/signup", dependencies=[Depends(rate_limit("auth"))])
 async def signup(credentials: UserCredentials):
     """Endpoint to register a new user with email and password."""
-    result = create_new_user(credentials)
+    result = await create_new_user(credentials)
     
     if result and result.user:
         # NOTE: By default, Supabase may require email confirmation.
@@ -20,10 +21,10 @@ async def signup(credentials: UserCredentials):
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Could not create user.")
 
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(rate_limit("auth"))])
 async def login(credentials: UserCredentials):
     """Endpoint to log in a user with email and password."""
-    result = sign_in_user(credentials)
+    result = await sign_in_user(credentials)
 
     if result and result.session:
         return {
@@ -0,0 +1,23 @@
+# server/routers/dashboard_routes.py
+from fastapi import APIRouter, Depends, Query
+from gotrue import User
+
+from services import dashboard as dashboard_service
+from utils.dependency import get_current_user
+from utils.responses import FastJSONResponse
+
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["Dashboard"]
+)
+
+@router.get("", response_class=FastJSONResponse)
+async def get_dashboard(
+    featured_limit: int = Query(dashboard_service.DEFAULT_FEATURED_LIMIT, ge=1, le=20, description="Number of featured tournaments."),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Everything the dashboard shows, in one request with one token check:
+    the user's profile, the tournaments they organize, featured tournaments and their teams.
+    """
+    return FastJSONResponse(await dashboard_service.get_dashboard(user_id=current_user.id, featured_limit=featured_limit))
@@ -0,0 +1,75 @@
+# server/routers/fixtures_routes.py
+from fastapi import APIRouter, Depends, Path, status
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from uuid import UUID
+from gotrue import User
+
+from services import fixtures as fixture_service
+from services import standings as standings_service
+from services.authorization import OrganizerContext
+from utils.dependency import get_current_user, get_organizer_context
+from utils.responses import FastJSONResponse
+
+router = APIRouter(
+    prefix="/tournaments",
+    tags=["Fixtures"]
+)
+
+# --- Pydantic Models ---
+class FixtureGenerate(BaseModel):
+    seeds: Optional[List[UUID]] = Field(None, description="Team IDs from the top seed down; unlisted teams follow in registration order.")
+
+class MatchResult(BaseModel):
+    score_a: int = Field(..., ge=0, example=2)
+    score_b: int = Field(..., ge=0, example=1)
+
+# --- API Endpoints ---
+@router.post("/{tournament_id}/fixtures", status_code=status.HTTP_201_CREATED)
+async def generate_tournament_fixtures(
+    body: Optional[FixtureGenerate] = None,
+    tournament_id: UUID = Path(..., description="The ID of the tournament to generate fixtures for."),
+    current_user: User = Depends(get_current_user),
+    auth: OrganizerContext = Depends(get_organizer_context)
+):
+    """Closes registration and generates the full bracket or round-robin schedule. Requires owner/admin permission."""
+    fixtures = await fixture_service.generate_fixtures(
+        tournament_id=tournament_id,
+        user_id=current_user.id,
+        seeds=body.seeds if body else None,
+        auth=auth
+    )
+    return {"message": "Fixtures generated successfully!", "data": fixtures}
+
+@router.get("/{tournament_id}/fixtures", response_class=FastJSONResponse)
+async def get_tournament_fixtures(
+    tournament_id: UUID = Path(..., description="The ID of the tournament.")
+):
+    """Retrieves every match of a tournament, grouped by round. This endpoint is public."""
+    return FastJSONResponse(await fixture_service.get_fixtures(tournament_id=tournament_id))
+
+@router.get("/{tournament_id}/standings", response_class=FastJSONResponse)
+async def get_tournament_standings(
+    tournament_id: UUID = Path(..., description="The ID of the tournament.")
+):
+    """Retrieves the ranked round-robin standings of a tournament. This endpoint is public."""
+    return FastJSONResponse(await standings_service.get_standings(tournament_id=tournament_id))
+
+@router.post("/{tournament_id}/matches/{match_id}/result", response_model=dict)
+async def report_match_result(
+    result: MatchResult,
+    tournament_id: UUID = Path(..., description="The ID of the tournament."),
+    match_id: UUID = Path(..., description="The ID of the match."),
+    current_user: User = Depends(get_current_user),
+    auth: OrganizerContext = Depends(get_organizer_context)
+):
+    """Reports a match score; elimination winners advance automatically. Requires owner/admin permission."""
+    match = await fixture_service.report_match_result(
+        tournament_id=tournament_id,
+        match_id=match_id,
+        score_a=result.score_a,
+        score_b=result.score_b,
+        user_id=current_user.id,
+        auth=auth
+    )
+    return {"message": "Result recorded successfully!", "data": match}
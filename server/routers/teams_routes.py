@@ -1,11 +1,14 @@
 # server/routers/teams_routes.py
-from fastapi import APIRouter, Depends, status, Path
+from fastapi import APIRouter, Depends, status, Path, Query, File, UploadFile
 from pydantic import BaseModel, Field
-from typing import List, Union
+from typing import List, Optional, Union
 from uuid import UUID
 from gotrue import User
-from utils.dependency import get_current_user
+from utils.dependency import get_current_user, get_organizer_context
 from services import teams as team_service
+from services import team_import
+from services.authorization import OrganizerContext
+from utils.responses import FastJSONResponse
 
 router = APIRouter(
     prefix="/teams",
@@ -22,43 +25,70 @@ class TeamMemberAdd(BaseModel):
 
 # --- API Endpoints ---
 @router.post("/tournaments/{tournament_id}/teams", status_code=status.HTTP_201_CREATED)
-def register_team_for_tournament(
+async def register_team_for_tournament(
     team_data: TeamCreate,
     tournament_id: UUID = Path(..., description="The ID of the tournament to join."),
     current_user: User = Depends(get_current_user)
 ):
     """Registers a new team for a tournament, with the current user as the leader."""
-    new_team = team_service.create_team_for_tournament(
+    new_team = await team_service.create_team_for_tournament(
         tournament_id=tournament_id,
         team_name=team_data.name,
         leader_id=current_user.id
     )
     return {"message": "Team registered successfully!", "data": new_team}
 
+@router.post("/tournaments/{tournament_id}/import")
+async def import_tournament_teams(
+    tournament_id: UUID = Path(..., description="The ID of the tournament to import teams into."),
+    file: UploadFile = File(..., description="CSV with name, leader and members columns, or NDJSON objects."),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="Defaults to the file extension."),
+    dry_run: bool = Query(False, description="Validate the file without registering any team."),
+    current_user: User = Depends(get_current_user),
+    auth: OrganizerContext = Depends(get_organizer_context)
+):
+    """
+    Registers many teams and their rosters from a spreadsheet export. Requires owner/admin permission.
+    Valid rows are imported together; invalid rows are returned in `errors` with their line number.
+    """
+    return await team_import.import_teams(
+        tournament_id=tournament_id,
+        file=file,
+        user_id=current_user.id,
+        file_format=format,
+        dry_run=dry_run,
+        auth=auth
+    )
+
 @router.post("/{team_id}/members", status_code=status.HTTP_201_CREATED)
-def add_team_members(
+async def add_team_members(
     member_data: TeamMemberAdd,
     team_id: UUID = Path(..., description="The ID of the team to add members to."),
     current_user: User = Depends(get_current_user)
 ):
     """Adds one or more new members to a team. Only the team leader can perform this action."""
-    new_members = team_service.add_members_to_team(
+    new_members = await team_service.add_members_to_team(
         team_id=team_id,
         user_ids=member_data.user_ids,
         requester_id=current_user.id
     )
     return {"message": "Team members added successfully!", "data": new_members}
 
-@router.get("/tournaments/{tournament_id}", response_model=List[dict])
-def get_tournament_teams(
-    tournament_id: UUID = Path(..., description="The ID of the tournament.")
+@router.get("/tournaments/{tournament_id}", response_class=FastJSONResponse)
+async def get_tournament_teams(
+    tournament_id: UUID = Path(..., description="The ID of the tournament."),
+    cursor: Optional[str] = Query(None, description="The next_cursor of the previous page."),
+    limit: int = Query(team_service.DEFAULT_ROSTER_PAGE_SIZE, ge=1, le=team_service.MAX_ROSTER_PAGE_SIZE)
 ):
-    """Gets a list of all teams in a tournament."""
-    return team_service.get_teams_for_tournament(tournament_id=tournament_id)
+    """
+    Gets one page of the teams in a tournament, each with its members' usernames and avatars.
+    Returns {"data": [...], "next_cursor": ...}; next_cursor is null on the last page.
+    """
+    return FastJSONResponse(await team_service.get_teams_for_tournament(tournament_id=tournament_id, cursor=cursor, limit=limit))
 
-@router.get("/user/{user_id}", response_model=List[dict])
-def get_teams_for_user(
+@router.get("/user/{user_id}", response_class=FastJSONResponse)
+async def get_teams_for_user(
     user_id: UUID = Path(..., description="The ID of the user.")
 ):
     """Gets a list of all teams a user is a part of."""
-    return team_service.get_user_teams(user_id=user_id)
\ No newline at end of file
+    return FastJSONResponse(await team_service.get_user_teams(user_id=user_id))
\ No newline at end of file
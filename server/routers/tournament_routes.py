@@ -1,5 +1,6 @@
 # server/routers/tournament_routes.py
-from fastapi import APIRouter, HTTPException, Depends, Query, Path, status, File, UploadFile
+from fastapi import APIRouter, HTTPException, Depends, Query, Path, Request, Response, status, File, UploadFile
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from uuid import UUID
@@ -8,7 +9,13 @@ from gotrue import User
 
 # Import the service functions
 from services import tournaments as tournament_service
-from utils.dependency import get_current_user
+from services import tournament_snapshots
+from services.authorization import OrganizerContext
+from utils.dependency import get_current_user, get_organizer_context
+from utils.broadcast import hub
+from utils.http_cache import cache_headers, etag_matches, if_none_match, not_modified
+from utils.responses import FastJSONResponse
+from utils.rate_limit import rate_limit
 
 router = APIRouter(
     prefix="/tournaments",
@@ -44,93 +51,138 @@ class TournamentSearchResponse(BaseModel):
 
 # --- API Endpoints ---
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def create_tournament(
+async def create_tournament(
     tournament: TournamentCreate,
     current_user: User = Depends(get_current_user)
 ):
     """Creates a new tournament and assigns the current user as the owner."""
-    new_tournament = tournament_service.create_new_tournament(
+    new_tournament = await tournament_service.create_new_tournament(
         tournament_data=tournament.dict(),
         user_id=current_user.id
     )
     return {"message": "Tournament created successfully!", "data": new_tournament}
 
 @router.post("/{tournament_id}/image", response_model=dict)
-def upload_tournament_banner(
+async def upload_tournament_banner(
     tournament_id: UUID = Path(..., description="The ID of the tournament to upload the image for."),
     current_user: User = Depends(get_current_user),
+    auth: OrganizerContext = Depends(get_organizer_context),
     file: UploadFile = File(...)
 ):
     """Uploads a banner image for a tournament and updates the record."""
-    image_url = tournament_service.upload_tournament_image(
+    image_url = await tournament_service.upload_tournament_image(
         tournament_id=tournament_id,
         user_id=current_user.id,
-        file=file
+        file=file,
+        auth=auth
     )
     
-    # Update the tournament record with the new image URL
-    updated_tournament = tournament_service.update_existing_tournament(
+    # Update the tournament record with the new image URL; the roles loaded above are reused
+    updated_tournament = await tournament_service.update_existing_tournament(
         tournament_id=tournament_id,
         update_data={"image_url": image_url},
-        user_id=current_user.id
+        user_id=current_user.id,
+        auth=auth
     )
 
     return {"message": "Image uploaded successfully", "data": updated_tournament}
 
 
 
-@router.get("/my-tournaments", response_model=List[dict])
-def get_user_tournaments(current_user: User = Depends(get_current_user)):
+@router.get("/my-tournaments", response_class=FastJSONResponse)
+async def get_user_tournaments(current_user: User = Depends(get_current_user)):
     """Retrieves all tournaments organized by the current user."""
-    return tournament_service.get_my_tournaments(user_id=current_user.id)
+    return FastJSONResponse(await tournament_service.get_my_tournaments(user_id=current_user.id))
 
 # This endpoint is NOW PUBLIC, no auth needed.
-@router.get("/slug/{slug}", response_model=dict)
-def get_tournament_public(slug: str):
-    """Retrieves a single tournament's public details by its slug."""
-    return tournament_service.get_tournament_by_slug(slug=slug)
+@router.get("/slug/{slug}", response_class=FastJSONResponse)
+async def get_tournament_public(slug: str, request: Request):
+    """
+    Retrieves a single tournament's public details by its slug: the tournament, its organizers
+    and its teams with their members. The body is a prebuilt snapshot sent as-is.
+    Supports If-None-Match; a matching ETag gets a 304 with no body.
+    """
+    snapshot = await tournament_snapshots.get_snapshot(slug)
+    if etag_matches(if_none_match(request), snapshot.etag):
+        return not_modified(snapshot.etag)
+    return Response(content=snapshot.body, media_type="application/json", headers=cache_headers(snapshot.etag))
+
+@router.get("/{tournament_id}/live")
+async def stream_tournament_updates(
+    tournament_id: UUID = Path(..., description="The ID of the tournament to follow.")
+):
+    """
+    Streams live updates for a tournament as Server-Sent Events. This endpoint is public.
+    Events: tournament.updated, tournament.deleted, team.registered, fixtures.generated,
+    match.updated, and resync when the client has fallen behind and should re-fetch.
+    """
+    return StreamingResponse(
+        hub.stream(tournament_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-@router.get("/", response_model=List[dict])
-def get_tournaments(
+@router.get("/", response_class=FastJSONResponse)
+async def get_tournaments(
+    request: Request,
     game: Optional[str] = Query(None, description="Filter tournaments by game."),
-    latest: bool = Query(False, description="Set to true to get tournaments from the last 7 days.")
+    latest: bool = Query(False, description="Set to true to get tournaments from the last 7 days."),
+    cursor: Optional[str] = Query(None, description="The next_cursor value from the previous page."),
+    limit: int = Query(tournament_service.DEFAULT_PAGE_SIZE, ge=1, le=tournament_service.MAX_PAGE_SIZE, description="Page size."),
+    fields: str = Query("card", pattern="^(card|full)$", description="'card' for list-card columns, 'full' for every column.")
 ):
     """
-    Retrieves a list of tournaments, with optional filters.
+    Retrieves a page of tournaments, with optional filters.
+    Returns {"data": [...], "next_cursor": ...}; next_cursor is null on the last page.
+    Supports If-None-Match; a matching ETag gets a 304 with no body.
     """
-    tournaments = tournament_service.get_all_tournaments(game=game, latest=latest)
-    return tournaments
+    page = await tournament_service.get_all_tournaments(
+        game=game,
+        latest=latest,
+        cursor=cursor,
+        limit=limit,
+        full=(fields == "full")
+    )
+    etag = tournament_service.tournament_page_etag(page, game, latest, cursor, limit, fields)
+    if etag_matches(if_none_match(request), etag):
+        return not_modified(etag)
+    return FastJSONResponse(page, headers=cache_headers(etag))
 
 
 @router.put("/{tournament_id}", response_model=dict)
-def update_tournament(
+async def update_tournament(
     tournament_update: TournamentUpdate,
     tournament_id: UUID = Path(..., description="The ID of the tournament to update."),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    auth: OrganizerContext = Depends(get_organizer_context)
 ):
     """Updates a tournament's details. Requires owner/admin permission."""
-    updated_tournament = tournament_service.update_existing_tournament(
+    updated_tournament = await tournament_service.update_existing_tournament(
         tournament_id=tournament_id,
         update_data=tournament_update.dict(exclude_unset=True),
-        user_id=current_user.id
+        user_id=current_user.id,
+        auth=auth
     )
     return {"message": "Tournament updated successfully!", "data": updated_tournament}
 
 
 @router.delete("/{tournament_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_tournament(
+async def delete_tournament(
     tournament_id: UUID = Path(..., description="The ID of the tournament to delete."),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    auth: OrganizerContext = Depends(get_organizer_context)
 ):
     """Deletes a tournament. Requires owner permission."""
-    tournament_service.delete_existing_tournament(
+    await tournament_service.delete_existing_tournament(
         tournament_id=tournament_id,
-        user_id=current_user.id
+        user_id=current_user.id,
+        auth=auth
     )
     return
 
-@router.get("/search/{query}", response_model=List[TournamentSearchResponse])
-def search_for_tournaments(query: str):
+@router.get("/search/{query}", response_model=List[TournamentSearchResponse],
+            dependencies=[Depends(rate_limit("search"))])
+async def search_for_tournaments(query: str):
     """
     [SEARCH] Searches for tournaments by name.
     This endpoint is public.
@@ -140,4 +192,4 @@ def search_for_tournaments(query: str):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Search query must be at least 3 characters long."
         )
-    return tournament_service.search_tournaments_by_name(query=query)
\ No newline at end of file
+    return await tournament_service.search_tournaments_by_name(query=query)
\ No newline at end of file
@@ -1,11 +1,14 @@
 # server/routers/user_routes.py (CORRECTED)
-from fastapi import APIRouter, Depends, status, HTTPException, File, UploadFile
+from fastapi import APIRouter, Depends, status, HTTPException, File, UploadFile, Request, Response
 from pydantic import BaseModel, Field
 from typing import Dict, Any, Optional, List
 from uuid import UUID
 from gotrue import User
 from utils.dependency import get_current_user
 from services import users as user_service
+from utils.http_cache import etag_matches, if_none_match, not_modified, set_cache_headers
+from utils.responses import FastJSONResponse
+from utils.rate_limit import rate_limit
 
 router = APIRouter(
     prefix="/users",
@@ -52,32 +55,32 @@ class UserSearchResponse(BaseModel):
 
 # --- API Endpoints ---
 
-@router.get("/me", response_model=Dict[str, Any])
+@router.get("/me", response_class=FastJSONResponse)
 async def read_users_me(current_user: User = Depends(get_current_user)):
     """
     Fetches the profile of the currently authenticated user, combining
     auth data and the public.users profile data.
     """
     try:
-        profile_data = user_service.get_user_profile(current_user.id)
+        profile_data = await user_service.get_user_profile(current_user.id)
         # Merge Supabase Auth data and public.users profile data
-        return {
-            "auth_user": current_user.dict(),
+        return FastJSONResponse({
+            "auth_user": current_user,
             "profile": profile_data
-        }
+        })
     except HTTPException as e:
         # If profile not found (404), return only auth data and a flag for the frontend
         if e.status_code == status.HTTP_404_NOT_FOUND:
-             return {
-                "auth_user": current_user.dict(),
+             return FastJSONResponse({
+                "auth_user": current_user,
                 "profile": None,
                 "message": "User profile not created. Please complete your profile registration."
-            }
+            })
         raise e # Re-raise other exceptions
 
 
 @router.post("/profile", status_code=status.HTTP_201_CREATED, response_model=UserProfileResponse)
-def create_profile(
+async def create_profile(
     profile_data: UserProfileCreate,
     current_user: User = Depends(get_current_user)
 ):
@@ -88,21 +91,22 @@ def create_profile(
     # Pydantic's .dict() performs recursive conversion, so manual nested calls are removed.
     data_to_create = profile_data.dict()
 
-    return user_service.create_user_profile(
+    return await user_service.create_user_profile(
         user_id=current_user.id,
         profile_data=data_to_create
     )
 
 
 @router.get("/profile", response_model=UserProfileResponse)
-def get_profile(current_user: User = Depends(get_current_user)):
+async def get_profile(current_user: User = Depends(get_current_user)):
     """
     [READ] Retrieves the complete user profile from the public.users table.
     """
-    return user_service.get_user_profile(current_user.id)
+    return await user_service.get_user_profile(current_user.id)
 
-@router.get("/search/{query}", response_model=List[UserSearchResponse])
-def search_for_users(
+@router.get("/search/{query}", response_model=List[UserSearchResponse],
+            dependencies=[Depends(rate_limit("search", per_user=True))])
+async def search_for_users(
     query: str,
     current_user: User = Depends(get_current_user)
 ):
@@ -115,18 +119,27 @@ def search_for_users(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Search query must be at least 3 characters long."
         )
-    return user_service.search_users_by_username(query=query, current_user_id=current_user.id)
+    return await user_service.search_users_by_username(query=query, current_user_id=current_user.id)
 
 @router.get("/profile/{username}", response_model=UserProfileResponse)
-def get_public_profile(username: str):
+async def get_public_profile(username: str, request: Request, response: Response):
     """
     [READ PUBLIC] Retrieves a user profile by their username.
     This endpoint does not require authentication.
+    With If-None-Match, only the profile's version is looked up; a match gets a 304 with no body.
     """
-    return user_service.get_user_profile_by_username(username=username)
+    conditional = if_none_match(request)
+    if conditional:
+        etag = await user_service.get_profile_etag_by_username(username=username)
+        if etag and etag_matches(conditional, etag):
+            return not_modified(etag)
+
+    profile = await user_service.get_user_profile_by_username(username=username)
+    set_cache_headers(response, user_service.profile_etag(profile))
+    return profile
 
 @router.post("/profile/avatar", response_model=Dict[str, str])
-def upload_user_avatar(
+async def upload_user_avatar(
     current_user: User = Depends(get_current_user),
     file: UploadFile = File(...)
 ):
@@ -136,7 +149,7 @@ def upload_user_avatar(
     """
     try:
         # 1. Upload the avatar file to Supabase Storage
-        avatar_url = user_service.upload_avatar(user_id=current_user.id, file=file)
+        avatar_url = await user_service.upload_avatar(user_id=current_user.id, file=file)
 
         if not avatar_url:
             raise HTTPException(status_code=500, detail="Could not retrieve public URL for avatar.")
@@ -144,12 +157,14 @@ def upload_user_avatar(
         # 2. Simply return the URL to the frontend
         return {"message": "Avatar uploaded successfully", "photo_url": avatar_url}
 
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail="An unexpected server error occurred during avatar processing.")
 
 
 @router.put("/profile", response_model=UserProfileResponse)
-def update_profile(
+async def update_profile(
     profile_data: UserProfileUpdate,
     current_user: User = Depends(get_current_user)
 ):
@@ -160,16 +175,16 @@ def update_profile(
     # Pydantic's .dict(exclude_unset=True) handles recursive conversion.
     data_to_update = profile_data.dict(exclude_unset=True)
         
-    return user_service.update_user_profile(
+    return await user_service.update_user_profile(
         user_id=current_user.id,
         update_data=data_to_update
     )
 
 
 @router.delete("/profile", status_code=status.HTTP_204_NO_CONTENT)
-def delete_profile(current_user: User = Depends(get_current_user)):
+async def delete_profile(current_user: User = Depends(get_current_user)):
     """
     [DELETE] Deletes the user's profile from the public.users table (does NOT delete the auth user).
     """
-    user_service.delete_user_profile(current_user.id)
+    await user_service.delete_user_profile(current_user.id)
     return
\ No newline at end of file
@@ -2,19 +2,19 @@ from fastapi import HTTPException, status
 from pydantic import BaseModel, EmailStr
 from gotrue.errors import AuthApiError
 
-from utils.supabase import supabase_client
+from config.config import settings
+from utils.supabase import get_async_client
+from utils.token_verifier import token_verifier, RemoteVerificationRequired, TokenVerificationError
 
 # Pydantic model for user credentials for email/password auth
 class UserCredentials(BaseModel):
     email: EmailStr
     password: str
 
-# REMOVED async from this function definition
-def create_new_user(credentials: UserCredentials):
+async def create_new_user(credentials: UserCredentials):
     """Signs up a new user in Supabase using email and password."""
     try:
-        # REMOVED await from this call
-        session = supabase_client.auth.sign_up({
+        session = await get_async_client().auth.sign_up({
             "email": credentials.email,
             "password": credentials.password,
         })
@@ -25,12 +25,10 @@ def create_new_user(credentials: UserCredentials):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
-# REMOVED async from this function definition
-def sign_in_user(credentials: UserCredentials):
+async def sign_in_user(credentials: UserCredentials):
     """Signs in an existing user in Supabase using email and password."""
     try:
-        # REMOVED await from this call
-        session = supabase_client.auth.sign_in_with_password({
+        session = await get_async_client().auth.sign_in_with_password({
             "email": credentials.email,
             "password": credentials.password,
         })
@@ -41,13 +39,29 @@ def sign_in_user(credentials: UserCredentials):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
-def verify_user_token(jwt_token: str):
+async def verify_user_token(jwt_token: str):
     """
-    Verifies any valid Supabase JWT token. This function was already correct.
+    Verifies any valid Supabase JWT token.
+    In "local" mode the signature, expiry and audience are checked in-process;
+    in "remote" mode GoTrue is asked about the token. HS256 tokens are also sent
+    to GoTrue in "local" mode when SUPABASE_JWT_SECRET is not set, once per token:
+    the user GoTrue returns is cached until the token expires.
     """
+    remote_fallback = False
+    if settings.AUTH_VERIFY_MODE == "local":
+        try:
+            return await token_verifier.verify(jwt_token)
+        except RemoteVerificationRequired:
+            remote_fallback = True
+        except TokenVerificationError as e:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=f"Invalid token: {e}",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
     try:
-        user_data = supabase_client.auth.get_user(jwt=jwt_token)
-        return user_data.user
+        user = (await get_async_client().auth.get_user(jwt=jwt_token)).user
     except AuthApiError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -60,4 +74,6 @@ def verify_user_token(jwt_token: str):
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-
+    if remote_fallback and user is not None:
+        token_verifier.remember(jwt_token, user)
+    return user
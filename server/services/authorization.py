@@ -0,0 +1,85 @@
+# server/services/authorization.py
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+from config.config import settings
+from utils.cache import TTLCache, MISSING
+from utils.supabase import get_async_client
+
+logger = logging.getLogger(__name__)
+
+# Roles that may manage a tournament: edit it, run its fixtures, import its teams.
+MANAGER_ROLES = ("owner", "admin")
+
+# user_id -> {tournament_id: role}, kept briefly so a burst of mutations loads the roles once.
+_roles_cache = TTLCache(
+    name="organizer_roles",
+    max_size=settings.ORGANIZER_ROLES_CACHE_SIZE,
+    ttl_seconds=settings.ORGANIZER_ROLES_CACHE_TTL_SECONDS,
+)
+
+
+@dataclass
+class OrganizerContext:
+    """Every tournament a user organizes, with their role in each. Checks against it are dict lookups."""
+    user_id: str
+    roles: Dict[str, str] = field(default_factory=dict)
+    # True when the roles came from the cache and may be a few seconds old.
+    from_cache: bool = False
+
+    def has_role(self, tournament_id: UUID, allowed_roles: Sequence[str]) -> bool:
+        return self.roles.get(str(tournament_id)) in allowed_roles
+
+
+async def load_organizer_context(user_id: UUID, fresh: bool = False) -> OrganizerContext:
+    """Loads a user's organizer roles, from the short-TTL cache unless `fresh` is set."""
+    user_key = str(user_id)
+    roles = MISSING if fresh else _roles_cache.get(user_key)
+    if roles is not MISSING:
+        return OrganizerContext(user_id=user_key, roles=roles, from_cache=True)
+
+    try:
+        response = await get_async_client().table('tournament_organizers') \
+            .select('tournament_id, role') \
+            .eq('user_id', user_key) \
+            .execute()
+    except Exception as e:
+        logger.exception("Error loading organizer roles for user %s: %s", user_id, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not verify permissions.")
+    roles = {str(row['tournament_id']): row['role'] for row in response.data or []}
+    _roles_cache.set(user_key, roles)
+    return OrganizerContext(user_id=user_key, roles=roles)
+
+
+async def has_organizer_role(tournament_id: UUID, user_id: UUID, allowed_roles: Sequence[str] = MANAGER_ROLES,
+                             auth: Optional[OrganizerContext] = None) -> bool:
+    """
+    Checks if a user has one of `allowed_roles` in a tournament.
+    Pass the request's OrganizerContext as `auth` to skip loading the roles again.
+    """
+    if auth is None or auth.user_id != str(user_id):
+        auth = await load_organizer_context(user_id)
+    if auth.has_role(tournament_id, allowed_roles):
+        return True
+    # Cached roles can miss a tournament created moments ago on another worker; confirm before denying.
+    if auth.from_cache:
+        auth = await load_organizer_context(user_id, fresh=True)
+        return auth.has_role(tournament_id, allowed_roles)
+    return False
+
+
+async def require_organizer(tournament_id: UUID, user_id: UUID, detail: str, allowed_roles: Sequence[str] = MANAGER_ROLES,
+                            auth: Optional[OrganizerContext] = None):
+    """Raises 403 with `detail` unless the user has one of `allowed_roles` in the tournament."""
+    if not await has_organizer_role(tournament_id, user_id, allowed_roles, auth=auth):
+        logger.warning("Permission denied for user %s on tournament %s", user_id, tournament_id)
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+
+def invalidate_organizer_roles(user_id: UUID):
+    """Drops a user's cached roles after their organizer links change."""
+    _roles_cache.delete(str(user_id))
@@ -0,0 +1,48 @@
+# server/services/dashboard.py
+import asyncio
+import logging
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+from services import teams as team_service
+from services import tournaments as tournament_service
+from services import users as user_service
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEATURED_LIMIT = 3
+
+
+async def get_dashboard(user_id: UUID, featured_limit: int = DEFAULT_FEATURED_LIMIT) -> dict:
+    """
+    Composes the dashboard in one request. The four reads are independent, so they run
+    concurrently and the response takes as long as the slowest of them, not their sum.
+    A failing section is reported in `errors` and left null; the rest is still returned.
+    """
+    sections = {
+        "profile": user_service.get_user_profile(user_id),
+        "my_tournaments": tournament_service.get_my_tournaments(user_id),
+        "featured_tournaments": tournament_service.get_all_tournaments(game=None, latest=False, limit=featured_limit),
+        "teams": team_service.get_user_teams(user_id),
+    }
+    results = await asyncio.gather(*sections.values(), return_exceptions=True)
+
+    dashboard, errors = {}, {}
+    for name, result in zip(sections, results):
+        if not isinstance(result, Exception):
+            dashboard[name] = result
+            continue
+        dashboard[name] = None
+        # A missing profile is expected for new users; the frontend prompts them to create one.
+        if name == "profile" and isinstance(result, HTTPException) and result.status_code == status.HTTP_404_NOT_FOUND:
+            continue
+        if not isinstance(result, HTTPException):
+            logger.error("Dashboard section '%s' failed for user %s", name, user_id, exc_info=result)
+        errors[name] = result.detail if isinstance(result, HTTPException) else "Could not load this section."
+
+    # Only the rows are needed for the featured cards.
+    if dashboard["featured_tournaments"] is not None:
+        dashboard["featured_tournaments"] = dashboard["featured_tournaments"]["data"]
+    dashboard["errors"] = errors
+    return dashboard
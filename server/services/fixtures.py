@@ -0,0 +1,263 @@
+# server/services/fixtures.py
+import logging
+import re
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from postgrest.exceptions import APIError
+
+from services import standings
+from services.authorization import OrganizerContext, require_organizer
+from utils.broadcast import hub
+from utils.rpc_errors import raise_for_rpc_error, register_rpc_errors
+from utils.supabase import get_async_client
+
+logger = logging.getLogger(__name__)
+
+SINGLE_ELIMINATION = "single_elimination"
+ROUND_ROBIN = "round_robin"
+
+# Errors raised by report_match_result in sql/fixtures.sql, mapped to HTTP responses.
+register_rpc_errors({
+    "MATCH_NOT_FOUND": (status.HTTP_404_NOT_FOUND, "Match not found."),
+    "MATCH_NOT_READY": (status.HTTP_409_CONFLICT, "Both teams must be known before a result can be reported."),
+    "MATCH_ALREADY_COMPLETED": (status.HTTP_409_CONFLICT, "A result has already been reported for this match."),
+    "DRAW_NOT_ALLOWED": (status.HTTP_400_BAD_REQUEST, "Elimination matches cannot end in a draw."),
+})
+
+
+def bracket_format(elimination_type: Optional[str]) -> str:
+    """Maps the free-text `elimination_type` of a tournament ("Single Elimination", "round-robin", ...) to a format."""
+    normalized = re.sub(r"[^a-z]", "", (elimination_type or "").lower())
+    if "roundrobin" in normalized:
+        return ROUND_ROBIN
+    if "elimination" in normalized or "knockout" in normalized:
+        return SINGLE_ELIMINATION
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Fixtures cannot be generated for elimination type '{elimination_type}'."
+    )
+
+
+# --- Generation ---
+# Both generators are pure functions over a list of team IDs in seed order and return
+# match rows ready for a single bulk insert. Every round is built in O(n).
+
+def seed_positions(size: int) -> List[int]:
+    """
+    Returns the 1-based seeds in bracket order for a power-of-two bracket, e.g. for 8:
+    [1, 8, 4, 5, 2, 7, 3, 6]. Seeds 1 and 2 can only meet in the final, and each pair
+    of neighbouring slots adds up to size + 1.
+    """
+    order = [1]
+    while len(order) < size:
+        total = 2 * len(order) + 1
+        order = [seed for s in order for seed in (s, total - s)]
+    return order
+
+
+def single_elimination(team_ids: List[str]) -> List[dict]:
+    """
+    Builds every match of a single-elimination bracket.
+    The bracket is padded to the next power of two; the missing seeds are byes, so the
+    top seeds skip the first round and are placed straight into round 2. The winner of
+    match (round r, position p) plays in match (r + 1, p // 2), as team_a when p is even.
+    """
+    n = len(team_ids)
+    size = 1
+    while size < n:
+        size *= 2
+
+    slots = [team_ids[seed - 1] if seed <= n else None for seed in seed_positions(size)]
+    rows = []
+    advancing: List[Optional[str]] = []
+    for position in range(size // 2):
+        team_a, team_b = slots[2 * position], slots[2 * position + 1]
+        if team_b is None:
+            rows.append(_match(1, position, team_a, None, status="bye", winner_id=team_a))
+            advancing.append(team_a)
+        else:
+            rows.append(_match(1, position, team_a, team_b))
+            advancing.append(None)
+
+    round_number, matches_in_round = 2, size // 4
+    while matches_in_round >= 1:
+        for position in range(matches_in_round):
+            rows.append(_match(round_number, position, advancing[2 * position], advancing[2 * position + 1]))
+        # Only first-round byes are known in advance; later rounds start empty.
+        advancing = [None] * matches_in_round
+        round_number += 1
+        matches_in_round //= 2
+    return rows
+
+
+def round_robin(team_ids: List[str]) -> List[dict]:
+    """
+    Builds every round of a round-robin with the circle method: the first team stays put
+    and the rest rotate one place per round. With an odd number of teams a placeholder is
+    added, and whoever is paired with it has a bye that round.
+    """
+    teams: List[Optional[str]] = list(team_ids)
+    if len(teams) % 2:
+        teams.append(None)
+    n = len(teams)
+    fixed, rotating = teams[0], teams[1:]
+
+    rows = []
+    for round_index in range(n - 1):
+        # rotating[i] sits at circle position i + 1 after `round_index` rotations.
+        shift = round_index % (n - 1)
+        circle = [fixed] + rotating[-shift:] + rotating[:-shift] if shift else [fixed] + rotating
+        for position in range(n // 2):
+            home, away = circle[position], circle[n - 1 - position]
+            # Alternate sides for the fixed team so it is not always listed first.
+            if position == 0 and round_index % 2:
+                home, away = away, home
+            if home is None or away is None:
+                rows.append(_match(round_index + 1, position, home or away, None, status="bye"))
+            else:
+                rows.append(_match(round_index + 1, position, home, away))
+    return rows
+
+
+def _match(round_number: int, position: int, team_a: Optional[str], team_b: Optional[str],
+           status: str = "pending", winner_id: Optional[str] = None) -> dict:
+    return {
+        "round": round_number,
+        "position": position,
+        "team_a_id": team_a,
+        "team_b_id": team_b,
+        "status": status,
+        "winner_id": winner_id,
+    }
+
+
+def _order_by_seed(teams: List[dict], seeds: Optional[List[UUID]]) -> List[str]:
+    """Puts the seeded teams first in the given order, then the rest in registration order."""
+    registered = [t["id"] for t in sorted(teams, key=lambda t: (t.get("created_at") or "", t["id"]))]
+    if not seeds:
+        return registered
+    seeded = list(dict.fromkeys(str(s) for s in seeds))
+    unknown = set(seeded) - set(registered)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Seeds must be teams registered in this tournament. Unknown team IDs: {', '.join(sorted(unknown))}"
+        )
+    seeded_set = set(seeded)
+    return seeded + [team_id for team_id in registered if team_id not in seeded_set]
+
+
+# --- Service functions ---
+
+async def generate_fixtures(tournament_id: UUID, user_id: UUID, seeds: Optional[List[UUID]] = None,
+                            auth: Optional[OrganizerContext] = None) -> dict:
+    """
+    Closes registration by generating every fixture of the tournament: once matches exist,
+    the registration RPCs turn new teams away (sql/team_registration.sql).
+    The tournament and its teams are read in one call and all matches are written in one
+    bulk insert; the unique (tournament_id, round, position) key turns a second attempt into a 409.
+    """
+    await require_organizer(tournament_id, user_id, "You do not have permission to manage this tournament's fixtures.", auth=auth)
+
+    logger.info("User %s generating fixtures for tournament %s", user_id, tournament_id)
+    try:
+        response = await get_async_client().table('tournaments') \
+            .select('id, elimination_type, teams(id, created_at)') \
+            .eq('id', str(tournament_id)) \
+            .maybe_single() \
+            .execute()
+        tournament = response.data if response else None
+        if not tournament:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tournament not found.")
+
+        teams = tournament.get("teams") or []
+        if len(teams) < 2:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="At least two teams are needed to generate fixtures.")
+
+        fmt = bracket_format(tournament.get("elimination_type"))
+        ordered = _order_by_seed(teams, seeds)
+        rows = single_elimination(ordered) if fmt == SINGLE_ELIMINATION else round_robin(ordered)
+        for row in rows:
+            row["tournament_id"] = str(tournament_id)
+            row["format"] = fmt
+
+        inserted = await get_async_client().table('matches').insert(rows).execute()
+        logger.info("Generated %s %s matches for tournament %s", len(rows), fmt, tournament_id)
+        # Brackets can be large; spectators fetch them once on this event instead of receiving every row.
+        hub.publish(tournament_id, "fixtures.generated", {"tournament_id": str(tournament_id), "format": fmt, "matches": len(rows)})
+        return {"format": fmt, "rounds": _group_by_round(inserted.data or rows)}
+
+    except HTTPException as http_exc:
+        raise http_exc
+
+    except APIError as e:
+        if e.code == "23505":
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Fixtures have already been generated for this tournament.")
+        logger.exception("Error generating fixtures for tournament %s: %s", tournament_id, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not generate fixtures.")
+
+    except Exception as e:
+        logger.exception("Error generating fixtures for tournament %s: %s", tournament_id, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not generate fixtures.")
+
+
+async def get_fixtures(tournament_id: UUID) -> dict:
+    """Returns every match of a tournament grouped by round."""
+    try:
+        response = await get_async_client().table('matches') \
+            .select('*') \
+            .eq('tournament_id', str(tournament_id)) \
+            .order('round') \
+            .order('position') \
+            .execute()
+        rows = response.data or []
+        return {"format": rows[0]["format"] if rows else None, "rounds": _group_by_round(rows)}
+    except Exception as e:
+        logger.exception("Error fetching fixtures for tournament %s: %s", tournament_id, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not fetch fixtures.")
+
+
+async def report_match_result(tournament_id: UUID, match_id: UUID, score_a: int, score_b: int, user_id: UUID,
+                              auth: Optional[OrganizerContext] = None) -> dict:
+    """
+    Records a match result. In single elimination the winner is moved into the next
+    round's match in the same transactional RPC.
+    """
+    await require_organizer(tournament_id, user_id, "You do not have permission to report results for this tournament.", auth=auth)
+
+    logger.info("User %s reporting result %s-%s for match %s", user_id, score_a, score_b, match_id)
+    try:
+        # Standings loaded while the result is being recorded are not cached; they may already include it.
+        with standings.reporting_result(tournament_id):
+            response = await get_async_client().rpc('report_match_result', {
+                "p_tournament_id": str(tournament_id),
+                "p_match_id": str(match_id),
+                "p_score_a": score_a,
+                "p_score_b": score_b,
+            }).execute()
+            if not response.data:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Match not found.")
+            standings.apply_result(response.data)
+        hub.publish(tournament_id, "match.updated", response.data)
+        return response.data
+
+    except HTTPException as http_exc:
+        raise http_exc
+
+    except APIError as e:
+        raise_for_rpc_error(e)
+        logger.exception("Error reporting result for match %s: %s", match_id, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not report the match result.")
+
+    except Exception as e:
+        logger.exception("Error reporting result for match %s: %s", match_id, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not report the match result.")
+
+
+def _group_by_round(rows: List[dict]) -> List[dict]:
+    rounds: dict = {}
+    for row in sorted(rows, key=lambda r: (r["round"], r["position"])):
+        rounds.setdefault(row["round"], []).append(row)
+    return [{"round": number, "matches": matches} for number, matches in rounds.items()]
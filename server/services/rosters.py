@@ -0,0 +1,51 @@
+import logging
+from typing import Optional
+from uuid import UUID
+
+from config.config import settings
+from utils.cache import TTLCache, MISSING
+from utils.supabase import get_async_client
+
+logger = logging.getLogger(__name__)
+
+# Everything a roster card shows: the team and, through embedding, each member's public profile.
+# Shared by the roster pages (services/teams.py) and the public snapshots (services/tournament_snapshots.py).
+ROSTER_COLUMNS = "id, name, leader_id, created_at, team_members(user_id, users(username, photo_url))"
+
+# Member changes only know the team ID, so remember which tournament each listed team belongs to.
+# A team never moves, so entries only leave to make room; a forgotten team costs one lookup.
+_tournament_by_team = TTLCache(
+    name="team_tournaments",
+    max_size=settings.TEAM_TOURNAMENT_CACHE_SIZE,
+    ttl_seconds=24 * 60 * 60,
+)
+
+
+def roster_team(row: dict, tournament_id: str) -> dict:
+    """Flattens a team row selected with ROSTER_COLUMNS into a roster card."""
+    _tournament_by_team.set(str(row['id']), tournament_id)
+    return {
+        "id": row['id'],
+        "name": row['name'],
+        "leader_id": row['leader_id'],
+        "created_at": row['created_at'],
+        "members": [
+            {"user_id": m['user_id'], **(m.get('users') or {"username": None, "photo_url": None})}
+            for m in row.get('team_members') or []
+        ],
+    }
+
+
+async def tournament_of_team(team_id: UUID) -> Optional[str]:
+    """The tournament a team belongs to, looked up when this worker has not listed the team yet; None if that fails."""
+    key = str(team_id)
+    tournament_id = _tournament_by_team.get(key)
+    if tournament_id is MISSING:
+        try:
+            response = await get_async_client().table('teams').select('tournament_id').eq('id', key).single().execute()
+        except Exception as e:
+            logger.warning("Could not look up the tournament of team %s: %s", team_id, e)
+            return None
+        tournament_id = str(response.data['tournament_id'])
+        _tournament_by_team.set(key, tournament_id)
+    return tournament_id
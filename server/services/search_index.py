@@ -0,0 +1,265 @@
+# server/services/search_index.py
+import asyncio
+import bisect
+import logging
+import re
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from config.config import settings
+from utils.supabase import get_async_client
+
+logger = logging.getLogger(__name__)
+
+# Longest word prefix that gets its own postings list; longer queries are verified against the name.
+MAX_PREFIX_LENGTH = 12
+LOAD_BATCH_SIZE = 1000
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+class PrefixIndex:
+    """
+    An in-memory typeahead index.
+
+    Two kinds of postings are kept, each a list of (sort_key, doc_id) sorted by
+    (name length, name) so the best-ranked matches come first:
+      * word postings: every prefix of every word in the name
+      * lead postings: every prefix of the whole name
+    A search walks the lead postings for names that start with the query, then the
+    word postings of the rarest query word, and stops as soon as it has `limit` hits.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.ready = False
+        self._docs: Dict[str, dict] = {}
+        self._names: Dict[str, str] = {}
+        self._word_postings: Dict[str, list] = {}
+        self._lead_postings: Dict[str, list] = {}
+        # Upserts and removals made while a reload is fetching rows, replayed after the swap.
+        self._journal: Optional[list] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _sort_key(name_lower: str) -> tuple:
+        return (len(name_lower), name_lower)
+
+    @staticmethod
+    def _word_prefixes(name_lower: str) -> set:
+        prefixes = set()
+        for word in _words(name_lower):
+            for length in range(1, min(len(word), MAX_PREFIX_LENGTH) + 1):
+                prefixes.add(word[:length])
+        return prefixes
+
+    @staticmethod
+    def _lead_prefixes(name_lower: str) -> set:
+        lead = name_lower.strip()
+        return {lead[:length] for length in range(1, min(len(lead), MAX_PREFIX_LENGTH) + 1)}
+
+    def _postings_for(self, name_lower: str):
+        yield from ((self._word_postings, p) for p in self._word_prefixes(name_lower))
+        yield from ((self._lead_postings, p) for p in self._lead_prefixes(name_lower))
+
+    def _discard(self, doc_id: str):
+        old_name = self._names.pop(doc_id, None)
+        self._docs.pop(doc_id, None)
+        if old_name is None:
+            return
+        entry = (self._sort_key(old_name), doc_id)
+        for postings, prefix in self._postings_for(old_name):
+            entries = postings.get(prefix)
+            if entries is None:
+                continue
+            i = bisect.bisect_left(entries, entry)
+            if i < len(entries) and entries[i] == entry:
+                del entries[i]
+            if not entries:
+                del postings[prefix]
+
+    def _insert(self, doc_id: str, name_lower: str, doc: dict):
+        self._discard(doc_id)
+        self._docs[doc_id] = doc
+        self._names[doc_id] = name_lower
+        entry = (self._sort_key(name_lower), doc_id)
+        for postings, prefix in self._postings_for(name_lower):
+            bisect.insort(postings.setdefault(prefix, []), entry)
+
+    def upsert(self, doc_id: str, name: str, doc: dict):
+        """Adds a document or replaces its previous version."""
+        doc_id, name_lower = str(doc_id), name.lower()
+        with self._lock:
+            self._insert(doc_id, name_lower, doc)
+            if self._journal is not None:
+                self._journal.append((doc_id, name_lower, doc))
+
+    def remove(self, doc_id: str):
+        doc_id = str(doc_id)
+        with self._lock:
+            self._discard(doc_id)
+            if self._journal is not None:
+                self._journal.append((doc_id, None, None))
+
+    def begin_reload(self):
+        """
+        Starts recording writes before the rows for replace_all are fetched; the rows may
+        predate them, so replace_all applies them again on top of the new index.
+        """
+        with self._lock:
+            self._journal = []
+
+    def cancel_reload(self):
+        with self._lock:
+            self._journal = None
+
+    def replace_all(self, entries: Iterable[tuple]):
+        """
+        Rebuilds the index from (doc_id, name, doc) tuples and swaps it in at once, then
+        replays the writes recorded since begin_reload.
+        """
+        docs, names, word_postings, lead_postings = {}, {}, {}, {}
+        for doc_id, name, doc in entries:
+            doc_id, name_lower = str(doc_id), name.lower()
+            docs[doc_id] = doc
+            names[doc_id] = name_lower
+            entry = (self._sort_key(name_lower), doc_id)
+            for prefix in self._word_prefixes(name_lower):
+                word_postings.setdefault(prefix, []).append(entry)
+            for prefix in self._lead_prefixes(name_lower):
+                lead_postings.setdefault(prefix, []).append(entry)
+        for postings in (word_postings, lead_postings):
+            for entries in postings.values():
+                entries.sort()
+        with self._lock:
+            self._docs, self._names = docs, names
+            self._word_postings, self._lead_postings = word_postings, lead_postings
+            for doc_id, name_lower, doc in self._journal or ():
+                if name_lower is None:
+                    self._discard(doc_id)
+                else:
+                    self._insert(doc_id, name_lower, doc)
+            self._journal = None
+            self.ready = True
+
+    def search(self, query: str, limit: int = 10, exclude_id: Optional[str] = None) -> List[dict]:
+        """
+        Returns up to `limit` documents whose name has a word starting with every word of `query`.
+        Names starting with the whole query rank first (an exact match is the shortest of those),
+        then the rest; ties go to shorter names.
+        """
+        terms = _words(query)
+        query_lower = query.lower().strip()
+        if not terms:
+            return []
+
+        def matches_all_terms(name_lower: str) -> bool:
+            words = _words(name_lower)
+            return all(any(w.startswith(term) for w in words) for term in terms)
+
+        hits: List[str] = []
+        seen = set()
+        with self._lock:
+            for _, doc_id in self._lead_postings.get(query_lower[:MAX_PREFIX_LENGTH], ()):
+                if doc_id != exclude_id and self._names[doc_id].startswith(query_lower):
+                    hits.append(doc_id)
+                    seen.add(doc_id)
+                    if len(hits) >= limit:
+                        return [self._docs[i] for i in hits]
+
+            # Walk the shortest postings list; every other term is checked against the name.
+            postings = [self._word_postings.get(term[:MAX_PREFIX_LENGTH], ()) for term in terms]
+            for _, doc_id in min(postings, key=len):
+                if doc_id == exclude_id or doc_id in seen:
+                    continue
+                if matches_all_terms(self._names[doc_id]):
+                    hits.append(doc_id)
+                    if len(hits) >= limit:
+                        break
+            return [self._docs[i] for i in hits]
+
+    def __len__(self):
+        return len(self._docs)
+
+
+user_index = PrefixIndex("users")
+tournament_index = PrefixIndex("tournaments")
+
+
+# --- Document shapes (the same fields the search endpoints return) ---
+
+def index_user(row: dict):
+    """Adds or refreshes a user profile in the search index."""
+    if row and row.get("id") and row.get("username"):
+        user_index.upsert(row["id"], row["username"], {
+            "id": row["id"],
+            "username": row["username"],
+            "photo_url": row.get("photo_url"),
+        })
+
+
+def index_tournament(row: dict):
+    """Adds or refreshes a tournament in the search index."""
+    if row and row.get("id") and row.get("name"):
+        tournament_index.upsert(row["id"], row["name"], {
+            "id": row["id"],
+            "name": row["name"],
+            "slug": row.get("slug"),
+            "game": row.get("game"),
+            "image_url": row.get("image_url"),
+        })
+
+
+# --- Loading ---
+
+async def _fetch_all(table: str, columns: str) -> List[dict]:
+    rows, start = [], 0
+    while True:
+        response = await get_async_client().table(table).select(columns) \
+            .order('id') \
+            .range(start, start + LOAD_BATCH_SIZE - 1) \
+            .execute()
+        batch = response.data or []
+        rows.extend(batch)
+        if len(batch) < LOAD_BATCH_SIZE:
+            return rows
+        start += LOAD_BATCH_SIZE
+
+
+async def load_search_indexes():
+    """Loads every username and tournament name into memory."""
+    user_index.begin_reload()
+    tournament_index.begin_reload()
+    try:
+        users = await _fetch_all('users', "id, username, photo_url")
+        tournaments = await _fetch_all('tournaments', "id, name, slug, game, image_url")
+    except Exception:
+        user_index.cancel_reload()
+        tournament_index.cancel_reload()
+        raise
+    # Building the postings is CPU work; keep it off the event loop.
+    await asyncio.to_thread(user_index.replace_all, [
+        (row["id"], row["username"], {"id": row["id"], "username": row["username"], "photo_url": row.get("photo_url")})
+        for row in users if row.get("username")
+    ])
+    await asyncio.to_thread(tournament_index.replace_all, [
+        (row["id"], row["name"], row) for row in tournaments if row.get("name")
+    ])
+    logger.info("Search indexes loaded: %s users, %s tournaments", len(user_index), len(tournament_index))
+
+
+async def refresh_search_indexes_periodically():
+    """
+    Reloads the indexes on a schedule. Writes handled by this worker update the index
+    immediately; the reload picks up writes that went through other workers.
+    """
+    while True:
+        await asyncio.sleep(settings.SEARCH_INDEX_REFRESH_SECONDS)
+        try:
+            await load_search_indexes()
+        except Exception as e:
+            logger.warning("Search index refresh failed, keeping the previous index: %s", e)
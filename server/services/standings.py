@@ -0,0 +1,198 @@
+# server/services/standings.py
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+from config.config import settings
+from utils.cache import ChangeClock, TTLCache, MISSING
+from utils.supabase import get_async_client
+
+logger = logging.getLogger(__name__)
+
+# Must match apply_standings_result in sql/standings.sql.
+POINTS_FOR_WIN = 3
+POINTS_FOR_DRAW = 1
+
+_STAT_FIELDS = ("played", "wins", "draws", "losses", "points", "score_for", "score_against")
+
+
+class StandingsTable:
+    """
+    The standings of one round-robin tournament, kept sorted as results come in.
+
+    Applying a result touches two rows: their counters change in O(1) and each row is
+    moved to its new place in the ordering with a binary search. Order: points, score
+    differential, score for, then head-to-head points among teams still level, then name.
+    The rendered table is kept until the next result, so reads return it as is.
+    """
+
+    def __init__(self, rows: List[dict]):
+        self._rows: Dict[str, dict] = {}
+        self._order: List[tuple] = []
+        self._rendered: Optional[List[dict]] = None
+        self._lock = threading.Lock()
+        for row in rows:
+            self._rows[row["team_id"]] = row
+            self._order.append((self._key(row), row["team_id"]))
+        self._order.sort()
+
+    @staticmethod
+    def _key(row: dict) -> tuple:
+        difference = row["score_for"] - row["score_against"]
+        return (-row["points"], -difference, -row["score_for"], (row.get("name") or "").lower())
+
+    def apply_result(self, team_a_id: str, team_b_id: str, score_a: int, score_b: int):
+        with self._lock:
+            self._apply_side(team_a_id, team_b_id, score_a, score_b)
+            self._apply_side(team_b_id, team_a_id, score_b, score_a)
+            self._rendered = None
+
+    def _apply_side(self, team_id: str, opponent_id: str, scored: int, conceded: int):
+        row = self._rows.get(team_id)
+        if row is None:
+            row = self._rows[team_id] = _empty_row(team_id)
+        else:
+            entry = (self._key(row), team_id)
+            i = bisect.bisect_left(self._order, entry)
+            if i < len(self._order) and self._order[i] == entry:
+                del self._order[i]
+
+        points = POINTS_FOR_WIN if scored > conceded else POINTS_FOR_DRAW if scored == conceded else 0
+        row["played"] += 1
+        row["wins"] += scored > conceded
+        row["draws"] += scored == conceded
+        row["losses"] += scored < conceded
+        row["points"] += points
+        row["score_for"] += scored
+        row["score_against"] += conceded
+        row["head_to_head"][opponent_id] = row["head_to_head"].get(opponent_id, 0) + points
+        bisect.insort(self._order, (self._key(row), team_id))
+
+    def table(self) -> List[dict]:
+        """Returns the ranked table. Only rebuilt after a result has been applied."""
+        with self._lock:
+            if self._rendered is None:
+                self._rendered = self._render()
+            return self._rendered
+
+    def _render(self) -> List[dict]:
+        ordered: List[str] = []
+        i = 0
+        while i < len(self._order):
+            # Teams level on points, differential and score for form a mini-league.
+            j = i + 1
+            while j < len(self._order) and self._order[j][0][:3] == self._order[i][0][:3]:
+                j += 1
+            group = [team_id for _, team_id in self._order[i:j]]
+            if len(group) > 1:
+                members = set(group)
+                head_to_head = {
+                    team_id: sum(p for opponent, p in self._rows[team_id]["head_to_head"].items() if opponent in members)
+                    for team_id in group
+                }
+                # Stable sort, so teams still level keep their name order.
+                group.sort(key=lambda team_id: -head_to_head[team_id])
+            ordered.extend(group)
+            i = j
+
+        table = []
+        for rank, team_id in enumerate(ordered, start=1):
+            row = self._rows[team_id]
+            table.append({
+                "rank": rank,
+                "team_id": team_id,
+                "name": row.get("name"),
+                **{field: row[field] for field in _STAT_FIELDS},
+                "score_difference": row["score_for"] - row["score_against"],
+            })
+        return table
+
+
+def _empty_row(team_id: str, name: Optional[str] = None) -> dict:
+    row = {field: 0 for field in _STAT_FIELDS}
+    row.update(team_id=team_id, name=name, head_to_head={})
+    return row
+
+
+# In-memory tables, refreshed from the persisted snapshot when their TTL runs out so
+# results reported through other workers show up within that window.
+_tables = TTLCache(
+    name="standings",
+    max_size=settings.STANDINGS_CACHE_SIZE,
+    ttl_seconds=settings.STANDINGS_CACHE_TTL_SECONDS,
+)
+# Ticked on every result; a load that raced with a result is not cached, so it cannot hide it.
+_changes = ChangeClock()
+# Results being reported right now, per tournament. A load that finishes while one is in flight
+# cannot tell whether it already includes the result, which apply_result would then add again,
+# so it is not cached either.
+_reporting: Dict[str, int] = {}
+
+
+async def _load_table(tournament_id: str) -> StandingsTable:
+    response = await get_async_client().table('teams') \
+        .select('id, name, standings(*)') \
+        .eq('tournament_id', tournament_id) \
+        .execute()
+    rows = []
+    for team in response.data or []:
+        snapshot = (team.get("standings") or [None])[0]
+        row = _empty_row(team["id"], team.get("name"))
+        if snapshot:
+            row.update({field: snapshot[field] for field in _STAT_FIELDS})
+            row["head_to_head"] = dict(snapshot.get("head_to_head") or {})
+        rows.append(row)
+    return StandingsTable(rows)
+
+
+async def get_standings(tournament_id: UUID) -> List[dict]:
+    """Returns the ranked standings of a round-robin tournament."""
+    key = str(tournament_id)
+    table = _tables.get(key)
+    if table is not MISSING:
+        return table.table()
+
+    started_at = _changes.now
+    try:
+        table = await _load_table(key)
+    except Exception as e:
+        logger.exception("Error loading standings for tournament %s: %s", tournament_id, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not fetch standings.")
+    if _changes.changed_at(key) <= started_at and not _reporting.get(key):
+        _tables.set(key, table)
+    return table.table()
+
+
+@contextmanager
+def reporting_result(tournament_id: UUID):
+    """Wraps the call that records a result, up to and including apply_result."""
+    key = str(tournament_id)
+    _reporting[key] = _reporting.get(key, 0) + 1
+    try:
+        yield
+    finally:
+        _reporting[key] -= 1
+        if not _reporting[key]:
+            del _reporting[key]
+
+
+def apply_result(match: dict):
+    """Applies a reported round-robin result to the in-memory table, if one is loaded."""
+    if match.get("format") != "round_robin" or match.get("status") != "completed":
+        return
+    key = str(match["tournament_id"])
+    _changes.touch(key)
+    table = _tables.get(key)
+    if table is not MISSING:
+        table.apply_result(match["team_a_id"], match["team_b_id"], match["score_a"], match["score_b"])
+
+
+def invalidate_standings(tournament_id: UUID):
+    key = str(tournament_id)
+    _changes.touch(key)
+    _tables.delete(key)
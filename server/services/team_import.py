@@ -0,0 +1,303 @@
+# server/services/team_import.py
+import asyncio
+import codecs
+import csv
+import itertools
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, UploadFile, status
+from postgrest.exceptions import APIError
+
+from config.config import settings
+from services.authorization import OrganizerContext, require_organizer
+from services.standings import invalidate_standings
+from services.teams import invalidate_roster
+from utils.broadcast import hub
+from utils.rpc_errors import raise_for_rpc_error, register_rpc_errors
+from utils.supabase import get_async_client
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+# Values per `in` filter when resolving usernames, keeping request URLs well under server limits.
+LOOKUP_BATCH_SIZE = 200
+
+_NAME_COLUMNS = ("name", "team_name", "team")
+_MEMBER_SPLIT_RE = re.compile(r"[;|,]")
+
+# import_teams also raises the registration errors registered by services/teams.py.
+register_rpc_errors({
+    "TOURNAMENT_FULL": (status.HTTP_409_CONFLICT, "The tournament has no open slots left for these teams."),
+})
+
+
+@dataclass
+class ImportRow:
+    line: int
+    name: str
+    leader: str
+    members: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+# --- Parsing ---
+# Both parsers read the upload lazily, one line at a time, so memory stays flat however large
+# the file is; rows are produced as soon as their line has been read.
+
+def _text_lines(file: UploadFile) -> Iterator[str]:
+    """Decodes the upload incrementally, CHUNK_SIZE bytes at a time, and yields its lines."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    file.file.seek(0)
+    pending = ""
+    while True:
+        chunk = file.file.read(CHUNK_SIZE)
+        pending += decoder.decode(chunk, final=not chunk)
+        # The last piece may be an incomplete line; keep it for the next chunk.
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+        if not chunk:
+            if pending:
+                yield pending
+            return
+
+
+def _split_members(value) -> List[str]:
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in _MEMBER_SPLIT_RE.split(value or "") if v.strip()]
+
+
+def parse_csv(lines: Iterator[str]) -> Iterator[ImportRow]:
+    """
+    Reads rows with a header naming the team (name, team_name or team), the leader, and either a
+    `members` column (separated by ';', '|' or ',') or any number of member_* columns.
+    Members and leaders can be given as usernames or user IDs.
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        raise ImportFormatError("The file is empty.")
+    columns = [h.strip().lower() for h in header]
+    name_index = next((i for i, c in enumerate(columns) if c in _NAME_COLUMNS), None)
+    if name_index is None or "leader" not in columns:
+        raise ImportFormatError("The header must include a team name column ('name' or 'team_name') and a 'leader' column.")
+    leader_index = columns.index("leader")
+    member_indexes = [i for i, c in enumerate(columns) if c == "members" or c.startswith("member_")]
+
+    for values in reader:
+        if not any(v.strip() for v in values):
+            continue
+
+        def cell(i: int) -> str:
+            return values[i].strip() if i < len(values) else ""
+        members = [m for i in member_indexes for m in _split_members(cell(i))]
+        yield ImportRow(line=reader.line_num, name=cell(name_index), leader=cell(leader_index), members=members)
+
+
+def parse_ndjson(lines: Iterator[str]) -> Iterator[ImportRow]:
+    """Reads one JSON object per line: {"name": ..., "leader": ..., "members": [...]}."""
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            item = None
+        if not isinstance(item, dict):
+            yield ImportRow(line=line_number, name="", leader="", error="Not a JSON object.")
+            continue
+        name = next((item.get(c) for c in _NAME_COLUMNS if item.get(c)), "")
+        yield ImportRow(line=line_number, name=str(name).strip(), leader=str(item.get("leader") or "").strip(),
+                        members=_split_members(item.get("members") or []))
+
+
+def _parse_rows(file: UploadFile, fmt: str) -> List[ImportRow]:
+    """
+    Parses the upload up to one row past MAX_IMPORT_ROWS; the parser reads no further than
+    the line that row is on, so an over-long file is rejected without reading the rest.
+    """
+    parser = parse_ndjson if fmt == "ndjson" else parse_csv
+    rows = list(itertools.islice(parser(_text_lines(file)), settings.MAX_IMPORT_ROWS + 1))
+    if len(rows) > settings.MAX_IMPORT_ROWS:
+        raise ImportFormatError(f"Import files are limited to {settings.MAX_IMPORT_ROWS} teams.")
+    return rows
+
+
+def detect_format(file: UploadFile, requested: Optional[str]) -> str:
+    if requested:
+        return requested
+    filename = (file.filename or "").lower()
+    if filename.endswith((".ndjson", ".jsonl")) or "ndjson" in (file.content_type or ""):
+        return "ndjson"
+    return "csv"
+
+
+# --- Validation ---
+
+def _is_uuid(value: str) -> bool:
+    try:
+        UUID(value)
+        return True
+    except ValueError:
+        return False
+
+
+async def _resolve_users(identifiers: set) -> dict:
+    """Maps every identifier (username or user ID) that exists to its user ID, a batch of values per call."""
+    ids = sorted(v for v in identifiers if _is_uuid(v))
+    usernames = sorted(v for v in identifiers if not _is_uuid(v))
+    resolved = {}
+    for column, values in (("id", ids), ("username", usernames)):
+        for start in range(0, len(values), LOOKUP_BATCH_SIZE):
+            response = await get_async_client().table('users') \
+                .select('id, username') \
+                .in_(column, values[start:start + LOOKUP_BATCH_SIZE]) \
+                .execute()
+            for user in response.data or []:
+                resolved[str(user[column])] = str(user["id"])
+    return resolved
+
+
+def _validate(rows: List[ImportRow], users: dict, taken_names: set, registered: set,
+              max_players: Optional[int], open_slots: Optional[int]) -> tuple:
+    """
+    Checks every row against the existing registrations and against the rows before it,
+    using set lookups only. Returns (teams to insert, per-row errors).
+    """
+    teams, errors = [], []
+    names_in_file, users_in_file = set(), set()
+    for row in rows:
+        if row.error:
+            errors.append({"line": row.line, "error": row.error})
+            continue
+        if not row.name:
+            errors.append({"line": row.line, "error": "Missing team name."})
+            continue
+        if not row.leader:
+            errors.append({"line": row.line, "team": row.name, "error": "Missing team leader."})
+            continue
+
+        name_key = row.name.lower()
+        if name_key in taken_names:
+            errors.append({"line": row.line, "team": row.name, "error": "A team with this name already exists in the tournament."})
+            continue
+        if name_key in names_in_file:
+            errors.append({"line": row.line, "team": row.name, "error": "Duplicate team name in the file."})
+            continue
+
+        identifiers = list(dict.fromkeys([row.leader] + row.members))
+        unknown = [i for i in identifiers if i not in users]
+        if unknown:
+            errors.append({"line": row.line, "team": row.name, "error": f"Unknown users: {', '.join(unknown)}"})
+            continue
+        member_ids = list(dict.fromkeys(users[i] for i in identifiers))
+
+        if max_players is not None and len(member_ids) > max_players:
+            errors.append({"line": row.line, "team": row.name, "error": f"Roster has {len(member_ids)} players; the limit is {max_players}."})
+            continue
+        already = [i for i in identifiers if users[i] in registered]
+        if already:
+            errors.append({"line": row.line, "team": row.name, "error": f"Already registered in this tournament: {', '.join(already)}"})
+            continue
+        repeated = [i for i in identifiers if users[i] in users_in_file]
+        if repeated:
+            errors.append({"line": row.line, "team": row.name, "error": f"Listed in an earlier team of the file: {', '.join(repeated)}"})
+            continue
+        if open_slots is not None and len(teams) >= open_slots:
+            errors.append({"line": row.line, "team": row.name, "error": "The tournament is full."})
+            continue
+
+        names_in_file.add(name_key)
+        users_in_file.update(member_ids)
+        teams.append({"name": row.name, "leader_id": users[row.leader], "member_ids": member_ids})
+    return teams, errors
+
+
+# --- Service function ---
+
+async def import_teams(tournament_id: UUID, file: UploadFile, user_id: UUID, file_format: Optional[str] = None,
+                       dry_run: bool = False, auth: Optional[OrganizerContext] = None) -> dict:
+    """
+    Registers every valid team of an uploaded CSV or NDJSON file.
+    The file is parsed incrementally and validated in memory against one snapshot of the
+    tournament's teams and members; the valid teams and all their members are then written
+    by a single transactional RPC. Rows that fail validation are reported with their line.
+    """
+    await require_organizer(tournament_id, user_id, "You do not have permission to import teams into this tournament.", auth=auth)
+    # UploadSizeLimitMiddleware already refused bodies well past the cap; this is the exact check.
+    if file.size is not None and file.size > settings.MAX_IMPORT_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Import files are limited to {settings.MAX_IMPORT_BYTES / (1024 * 1024):.1f} MB."
+        )
+
+    fmt = detect_format(file, file_format)
+    try:
+        # The spooled upload is on disk past 1 MB; reading and parsing it run in a thread.
+        rows = await asyncio.to_thread(_parse_rows, file, fmt)
+    except (ImportFormatError, csv.Error, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Could not read the import file: {e}")
+
+    logger.info("User %s importing %s teams into tournament %s", user_id, len(rows), tournament_id)
+    try:
+        response = await get_async_client().table('tournaments') \
+            .select('max_teams, max_players_per_team, teams(name, team_members(user_id))') \
+            .eq('id', str(tournament_id)) \
+            .maybe_single() \
+            .execute()
+        tournament = response.data if response else None
+        if not tournament:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tournament not found.")
+
+        existing = tournament.get("teams") or []
+        taken_names = {t["name"].lower() for t in existing}
+        registered = {str(m["user_id"]) for t in existing for m in (t.get("team_members") or [])}
+        max_teams = tournament.get("max_teams")
+        open_slots = max(0, max_teams - len(existing)) if max_teams is not None else None
+
+        users = await _resolve_users({i for row in rows for i in [row.leader] + row.members if i})
+        teams, errors = _validate(rows, users, taken_names, registered, tournament.get("max_players_per_team"), open_slots)
+
+        created = []
+        if teams and not dry_run:
+            result = await get_async_client().rpc('import_teams', {
+                "p_tournament_id": str(tournament_id),
+                "p_teams": teams,
+            }).execute()
+            created = result.data or []
+            invalidate_standings(tournament_id)
+            invalidate_roster(tournament_id)
+            # One summary event rather than one per team, which would overflow every spectator's queue;
+            # like fixtures.generated, it tells clients to re-fetch the roster.
+            hub.publish(tournament_id, "teams.imported", {"tournament_id": str(tournament_id), "teams": len(created)})
+            logger.info("Imported %s teams into tournament %s, %s rows rejected", len(created), tournament_id, len(errors))
+
+        return {
+            "dry_run": dry_run,
+            "imported": len(teams) if dry_run else len(created),
+            "rejected": len(errors),
+            "teams": teams if dry_run else created,
+            "errors": errors,
+        }
+
+    except HTTPException as http_exc:
+        raise http_exc
+
+    except APIError as e:
+        raise_for_rpc_error(e)
+        logger.exception("Error importing teams into tournament %s: %s", tournament_id, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not import teams.")
+
+    except Exception as e:
+        logger.exception("Error importing teams into tournament %s: %s", tournament_id, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not import teams.")
@@ -1,134 +1,174 @@
 import logging
 from uuid import UUID
 from fastapi import HTTPException, status
-from utils.supabase import supabase_client
-from typing import List, Union
+from postgrest.exceptions import APIError
+from config.config import settings
+from utils.cache import ChangeClock, TTLCache, MISSING
+from utils.single_flight import SingleFlight
+from utils.supabase import get_async_client
+from utils.broadcast import hub
+from utils.pagination import decode_cursor, encode_cursor
+from utils.rpc_errors import raise_for_rpc_error, register_rpc_errors
+from services.standings import invalidate_standings
+from services.tournament_snapshots import invalidate_all_snapshots, invalidate_snapshot
+from services.rosters import ROSTER_COLUMNS, roster_team, tournament_of_team
+from typing import List, Optional, Union
 
 logger = logging.getLogger(__name__)
 
-def _is_user_in_tournament_team(user_id: UUID, tournament_id: UUID) -> bool:
-    """Checks if a user is already a member of any team in a specific tournament."""
-    try:
-        # Query team_members, join with teams, filter by user_id and tournament_id
-        response = supabase_client.table('team_members') \
-            .select('user_id', count='exact') \
-            .eq('user_id', str(user_id)) \
-            .inner().eq('teams.tournament_id', str(tournament_id)) \
-            .execute()
-        
-        # Check if the count is greater than 0
-        return response.count > 0
-    except Exception as e:
-        logger.error(f"Error checking if user {user_id} is in tournament {tournament_id}: {e}")
-        # Fail safe - assume user might be in a team to prevent errors
-        # Or raise an internal server error if strictness is required
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not verify user's tournament participation.")
-
-def create_team_for_tournament(tournament_id: UUID, team_name: str, leader_id: UUID) -> dict:
-    """Creates a new team for a tournament and sets the creator as the leader."""
-    logger.info(f"User {leader_id} creating team '{team_name}' for tournament {tournament_id}")
-    
-    if _is_user_in_tournament_team(leader_id, tournament_id):
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="You are already registered in a team for this tournament."
-        )
+DEFAULT_ROSTER_PAGE_SIZE = 64
+MAX_ROSTER_PAGE_SIZE = 256
+
+# Roster pages keyed by (tournament, generation, cursor, limit), where the generation is the tick
+# of the tournament's last change. A change moves it on instead of hunting down each of its
+# pages; the stale ones expire on their own.
+_roster_cache = TTLCache(
+    name="tournament_rosters",
+    max_size=settings.ROSTER_CACHE_SIZE,
+    ttl_seconds=settings.ROSTER_CACHE_TTL_SECONDS,
+)
+_roster_changes = ChangeClock()
+_roster_flight = SingleFlight("tournament_rosters")
+
+def invalidate_roster(tournament_id: UUID):
+    """Drops the cached roster pages of a tournament after a team or member change, and replaces its snapshot."""
+    _roster_changes.touch(str(tournament_id))
+    invalidate_snapshot(tournament_id)
+
+# Errors raised by the registration RPCs in sql/team_registration.sql, mapped to HTTP responses.
+register_rpc_errors({
+    "REGISTRATION_CLOSED": (status.HTTP_409_CONFLICT, "Registration is closed: fixtures have already been generated for this tournament."),
+    "LEADER_ALREADY_REGISTERED": (status.HTTP_409_CONFLICT, "You are already registered in a team for this tournament."),
+    "TEAM_NAME_TAKEN": (status.HTTP_409_CONFLICT, "A team with this name already exists in the tournament."),
+    "TEAM_NOT_FOUND": (status.HTTP_404_NOT_FOUND, "Team not found."),
+    "NOT_TEAM_LEADER": (status.HTTP_403_FORBIDDEN, "Only the team leader can add members."),
+    "USERS_ALREADY_REGISTERED": (status.HTTP_409_CONFLICT, "Some users are already registered in another team for this tournament."),
+})
+
+async def create_team_for_tournament(tournament_id: UUID, team_name: str, leader_id: UUID) -> dict:
+    """
+    Creates a new team for a tournament and sets the creator as the leader.
+    The conflict check, name check, team insert and leader insert run in one transactional RPC.
+    """
+    logger.info("User %s creating team '%s' for tournament %s", leader_id, team_name, tournament_id)
     try:
-        # Check if a team with the same name already exists in the tournament
-        existing_team = supabase_client.table('teams').select('id', count='exact').eq('tournament_id', str(tournament_id)).eq('name', team_name).execute()
-        if existing_team.count > 0:
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A team with this name already exists in the tournament.")
-
-        # Create the new team
-        team_data = {
-            "name": team_name,
-            "tournament_id": str(tournament_id),
-            "leader_id": str(leader_id)
-        }
-        response = supabase_client.table('teams').insert(team_data).execute()
+        response = await get_async_client().rpc('create_team_with_leader', {
+            "p_tournament_id": str(tournament_id),
+            "p_team_name": team_name,
+            "p_leader_id": str(leader_id),
+        }).execute()
         if not response.data:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Could not create team.")
-        
-        new_team = response.data[0]
-        
-        # Add the leader as the first member of the team
-        # NOTE: It's better to add the member in the same function to ensure it happens
-        member_data = {"team_id": new_team['id'], "user_id": str(leader_id)}
-        supabase_client.table('team_members').insert(member_data).execute()
-        
-        return new_team
+        invalidate_standings(tournament_id)
+        invalidate_roster(tournament_id)
+        hub.publish(tournament_id, "team.registered", response.data)
+        return response.data
     
-    # FIX: Add this block to let specific HTTP errors pass through
     except HTTPException as http_exc:
         raise http_exc
+
+    except APIError as e:
+        raise_for_rpc_error(e)
+        logger.exception("Error creating team: %s", e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An unexpected error occurred during team creation.")
         
     except Exception as e:
-        logger.exception(f"Error creating team: {e}")
+        logger.exception("Error creating team: %s", e)
         # This will now only catch unexpected errors
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An unexpected error occurred during team creation.")
 
-def add_members_to_team(team_id: UUID, user_ids: Union[UUID, List[UUID]], requester_id: UUID) -> List[dict]:
-    """Adds one or more users to a team, checking for leader's permission and existing membership."""
+async def add_members_to_team(team_id: UUID, user_ids: Union[UUID, List[UUID]], requester_id: UUID) -> List[dict]:
+    """
+    Adds one or more users to a team, checking for leader's permission and existing membership.
+    The leader check, a set-based conflict check for every candidate and the bulk insert
+    run in one transactional RPC, so a whole roster costs a single upstream call.
+    """
     
     if not isinstance(user_ids, list):
         user_ids = [user_ids]
 
-    logger.info(f"User {requester_id} attempting to add {len(user_ids)} members to team {team_id}")
+    # Preserve order but drop duplicates so the bulk insert does not trip over itself.
+    unique_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+    logger.info("User %s attempting to add %s members to team %s", requester_id, len(unique_ids), team_id)
     
     try:
-        # 1. Check if the requester is the team leader
-        team_response = supabase_client.table('teams').select('leader_id, tournament_id').eq('id', str(team_id)).single().execute()
-        if not team_response.data:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Team not found.")
-
-        leader_id_from_db = team_response.data['leader_id']
-        tournament_id = team_response.data['tournament_id'] # Get tournament_id from the team
-        
-        if str(leader_id_from_db) != str(requester_id):
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only the team leader can add members.")
-
-        users_already_in_team = []
-        for user_id in user_ids:
-             # Check if the user to be added is already in *any* team for this tournament
-             if _is_user_in_tournament_team(user_id, tournament_id):
-                 users_already_in_team.append(str(user_id)) # Collect IDs of problematic users
-
-        if users_already_in_team:
-             # Ideally, return the specific usernames, but IDs are simpler for now
-             raise HTTPException(
-                 status_code=status.HTTP_409_CONFLICT,
-                 detail=f"Cannot add users already registered in another team for this tournament. User IDs: {', '.join(users_already_in_team)}"
-             )
-             
-        # 3. Prepare the data for a bulk insert
-        members_to_add = [
-            {"team_id": str(team_id), "user_id": str(user_id)}
-            for user_id in user_ids
-        ]
-
-        # 4. Perform a single bulk insert operation
-        response = supabase_client.table('team_members').insert(members_to_add).execute()
+        response = await get_async_client().rpc('add_team_members', {
+            "p_team_id": str(team_id),
+            "p_user_ids": unique_ids,
+            "p_requester_id": str(requester_id),
+        }).execute()
         
         if not response.data:
              # This could also happen if a user_id doesn't exist in the 'users' table due to foreign key constraints
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Could not add members. They may already be on this team or user IDs might be invalid.")
-            
+
+        # The members were added; if their tournament cannot be looked up, every roster is stale.
+        tournament_id = await tournament_of_team(team_id)
+        if tournament_id:
+            invalidate_roster(tournament_id)
+        else:
+            _roster_changes.touch_all()
+            invalidate_all_snapshots()
         return response.data
 
     except HTTPException as http_exc:
         raise http_exc
+
+    except APIError as e:
+        raise_for_rpc_error(e)
+        logger.exception("Error adding members to team: %s", e)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Could not add members. They may already be on this team or user IDs might be invalid.")
         
     except Exception as e:
-        logger.exception(f"Error adding members to team: {e}")
+        logger.exception("Error adding members to team: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An unexpected error occurred.")
 
-def get_user_teams(user_id: UUID) -> list:
+async def get_user_teams(user_id: UUID) -> list:
     """Retrieves all teams a user is a member of."""
-    logger.info(f"Fetching all teams for user {user_id}")
+    logger.info("Fetching all teams for user %s", user_id)
     try:
         # This query first finds all team_ids for the user, then fetches the details of those teams.
-        response = supabase_client.table('team_members').select('teams(*)').eq('user_id', str(user_id)).execute()
+        response = await get_async_client().table('team_members').select('teams(*)').eq('user_id', str(user_id)).execute()
         return [item['teams'] for item in response.data]
     except Exception as e:
-        logger.exception(f"Error fetching teams for user {user_id}: {e}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not fetch user's teams.")
\ No newline at end of file
+        logger.exception("Error fetching teams for user %s: %s", user_id, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not fetch user's teams.")
+
+async def get_teams_for_tournament(tournament_id: UUID, cursor: Optional[str] = None,
+                                   limit: int = DEFAULT_ROSTER_PAGE_SIZE) -> dict:
+    """
+    Retrieves one page of a tournament's teams, in registration order, each with its members'
+    usernames and avatars. Teams, members and profiles come from one embedded query, so a page
+    costs a single upstream call however many players it lists. Pages are walked with a keyset
+    cursor on (created_at, id) and cached until the roster changes.
+    """
+    limit = max(1, min(limit, MAX_ROSTER_PAGE_SIZE))
+    tournament_key = str(tournament_id)
+    key = (tournament_key, _roster_changes.changed_at(tournament_key), cursor, limit)
+    cached = _roster_cache.get(key)
+    if cached is not MISSING:
+        return cached
+    return await _roster_flight.do(key, _fetch_roster_page, key, cursor, limit)
+
+async def _fetch_roster_page(key: tuple, cursor: Optional[str], limit: int) -> dict:
+    tournament_id = key[0]
+    query = get_async_client().table('teams').select(ROSTER_COLUMNS).eq('tournament_id', tournament_id)
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        query = query.or_(f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{last_id})')
+
+    logger.info("Fetching roster page of tournament %s", tournament_id)
+    try:
+        # Fetch one extra row to find out whether there is another page.
+        response = await query.order('created_at').order('id').limit(limit + 1).execute()
+    except Exception as e:
+        logger.exception("Error fetching teams for tournament %s: %s", tournament_id, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not fetch the tournament's teams.")
+
+    rows = response.data or []
+    teams = [roster_team(row, tournament_id) for row in rows[:limit]]
+    page = {"data": teams, "next_cursor": encode_cursor(rows[limit - 1]) if len(rows) > limit else None}
+    # A change made while this query ran moved the generation on; do not cache what it may have missed.
+    if _roster_changes.changed_at(tournament_id) == key[1]:
+        _roster_cache.set(key, page)
+    return page
@@ -0,0 +1,132 @@
+import logging
+from dataclasses import dataclass
+from typing import Set
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from postgrest.exceptions import APIError
+
+from config.config import settings
+from utils import background
+from utils.cache import ChangeClock, TTLCache, MISSING
+from utils.http_cache import body_etag
+from utils.responses import dump_json
+from utils.single_flight import SingleFlight
+from utils.supabase import get_async_client
+from services.rosters import ROSTER_COLUMNS, roster_team
+
+logger = logging.getLogger(__name__)
+
+# The whole public page in one embedded query: the tournament, its organizers, and every team
+# with its members' public profiles.
+SNAPSHOT_COLUMNS = f"*, tournament_organizers(user_id, role), teams({ROSTER_COLUMNS})"
+
+
+@dataclass(frozen=True)
+class TournamentSnapshot:
+    """A tournament's public page, serialized once: `body` is the JSON response, ready to send."""
+    tournament_id: str
+    slug: str
+    body: bytes
+    etag: str
+    # The change tick the build started at; a later change to the tournament makes it stale.
+    built_at: int
+
+
+# Snapshots keyed by slug. Writes through the tournament and team services replace them; the TTL
+# bounds how long a change made by another worker, or a profile change, takes to show up.
+_snapshots = TTLCache(
+    name="tournament_snapshots",
+    max_size=settings.TOURNAMENT_CACHE_SIZE,
+    ttl_seconds=settings.TOURNAMENT_CACHE_TTL_SECONDS,
+)
+# Writes only know the tournament ID, so remember which slug each snapshot lives under, for as
+# long as the snapshot may be cached. A forgotten slug only skips the eager rebuild.
+_slug_by_tournament_id = TTLCache(
+    name="tournament_snapshot_slugs",
+    max_size=settings.TOURNAMENT_CACHE_SIZE,
+    ttl_seconds=settings.TOURNAMENT_CACHE_TTL_SECONDS,
+)
+# A build is only stored, and a stored snapshot only served, if its tournament was not changed
+# since the build started. Builds start from a slug, so changes are ticks of one clock.
+_changes = ChangeClock()
+# Tournaments with a rebuild queued; a burst of registrations queues one rebuild, not one each.
+_pending_rebuilds: Set[str] = set()
+_snapshot_flight = SingleFlight("tournament_snapshots")
+
+
+def invalidate_snapshot(tournament_id: UUID, rebuild: bool = True):
+    """
+    Drops a tournament's snapshot after its tournament row, organizers or teams changed, and
+    queues a rebuild so the next reader finds it ready. Readers arriving before the rebuild
+    finishes build it themselves, sharing one query.
+    """
+    key = str(tournament_id)
+    _changes.touch(key)
+    slug = _slug_by_tournament_id.get(key)
+    if slug is MISSING:
+        return
+    _snapshots.delete(slug)
+    # A build already in flight may predate the write; later readers must not join it.
+    _snapshot_flight.forget(slug)
+    if not rebuild:
+        _slug_by_tournament_id.delete(key)
+    elif key not in _pending_rebuilds:
+        if background.queue.enqueue("tournament.snapshot", tournament_id=key):
+            _pending_rebuilds.add(key)
+
+
+def invalidate_all_snapshots():
+    """Treats every snapshot as stale, for a change whose tournament could not be determined."""
+    _changes.touch_all()
+
+
+@background.task("tournament.snapshot")
+async def rebuild_snapshot(tournament_id: str):
+    _pending_rebuilds.discard(tournament_id)
+    slug = _slug_by_tournament_id.get(tournament_id)
+    if slug is not MISSING and _snapshots.get(slug) is MISSING:
+        try:
+            await _snapshot_flight.do(slug, _build_snapshot, slug)
+        except HTTPException as e:
+            # A 404 means the tournament was deleted meanwhile; upstream failures are retried.
+            if e.status_code != status.HTTP_404_NOT_FOUND:
+                raise
+
+
+async def get_snapshot(slug: str) -> TournamentSnapshot:
+    """Returns the snapshot of the tournament at `slug`, building it on a miss; 404 if there is none."""
+    snapshot = _snapshots.get(slug)
+    if snapshot is not MISSING and _changes.changed_at(snapshot.tournament_id) <= snapshot.built_at:
+        return snapshot
+    return await _snapshot_flight.do(slug, _build_snapshot, slug)
+
+
+async def _build_snapshot(slug: str) -> TournamentSnapshot:
+    started_at = _changes.now
+    logger.info("Building snapshot of tournament %s", slug)
+    try:
+        response = await get_async_client().table('tournaments').select(SNAPSHOT_COLUMNS).eq('slug', slug).single().execute()
+        tournament = response.data
+    except APIError as e:
+        # PGRST116: .single() matched no row. Anything else is an upstream failure, not a 404.
+        if e.code != "PGRST116":
+            logger.exception("Error building snapshot of tournament %s: %s", slug, e)
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not fetch the tournament.")
+        tournament = None
+    except Exception as e:
+        logger.exception("Error building snapshot of tournament %s: %s", slug, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not fetch the tournament.")
+    if not tournament:
+        logger.warning("Tournament with slug '%s' not found.", slug)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tournament not found.")
+
+    key = str(tournament['id'])
+    teams = sorted(tournament.get('teams') or [], key=lambda t: (t['created_at'], t['id']))
+    tournament['teams'] = [roster_team(team, key) for team in teams]
+    body = dump_json(tournament)
+    snapshot = TournamentSnapshot(tournament_id=key, slug=slug, body=body, etag=body_etag(body), built_at=started_at)
+    if _changes.changed_at(key) <= started_at:
+        _snapshots.set(slug, snapshot)
+        _slug_by_tournament_id.set(key, slug)
+    return snapshot
@@ -3,14 +3,34 @@ from uuid import UUID
 from datetime import datetime
 import re
 import random
-from typing import List
+from typing import List, Optional
 from fastapi import HTTPException, status, UploadFile
 from datetime import timedelta
-import os
-from utils.supabase import supabase_client
+from utils.single_flight import SingleFlight
+from utils.supabase import get_async_client
+from services.tournament_snapshots import invalidate_snapshot
+from services.authorization import OrganizerContext, require_organizer, invalidate_organizer_roles
+from services.search_index import tournament_index, index_tournament
+from utils.uploads import image_paths, stream_image_to_storage
+from utils import background
+from utils.broadcast import hub
+from utils.http_cache import make_etag
+from utils.pagination import decode_cursor, encode_cursor
 
 logger = logging.getLogger(__name__)
 
+# Columns the tournament list cards need; descriptions and other large fields are left out.
+TOURNAMENT_CARD_COLUMNS = "id, name, slug, game, image_url, elimination_type, start_date, max_teams, max_players_per_team, created_at, updated_at"
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Cache misses for the same list page share one upstream query.
+_list_flight = SingleFlight("tournament_list")
+
+def invalidate_tournament_cache(tournament_id: UUID, deleted: bool = False):
+    """Replaces the public snapshot of a tournament after it has been changed, or drops it once deleted."""
+    invalidate_snapshot(tournament_id, rebuild=not deleted)
+
 def _generate_slug(name: str) -> str:
     """Generates a URL-friendly slug from a string."""
     s = name.lower().strip()
@@ -21,19 +41,9 @@ def _generate_slug(name: str) -> str:
     random_suffix = random.randint(100, 999)
     return f"{s}-{random_suffix}"
 
-def _check_permission(tournament_id: UUID, user_id: UUID, allowed_roles: list = ['owner', 'admin']):
-    """Checks if a user has the required role for a tournament."""
-    try:
-        response = supabase_client.table('tournament_organizers').select('role').eq('tournament_id', str(tournament_id)).eq('user_id', str(user_id)).single().execute()
-        if response.data and response.data['role'] in allowed_roles:
-            return True
-        return False
-    except Exception:
-        return False
-
-def create_new_tournament(tournament_data: dict, user_id: UUID) -> dict:
+async def create_new_tournament(tournament_data: dict, user_id: UUID) -> dict:
     """Inserts a new tournament and creates the owner relationship."""
-    logger.info(f"Creating tournament for user_id: {user_id}")
+    logger.info("Creating tournament for user_id: %s", user_id)
     
     slug = _generate_slug(tournament_data['name'])
     tournament_data['slug'] = slug
@@ -45,64 +55,66 @@ def create_new_tournament(tournament_data: dict, user_id: UUID) -> dict:
         tournament_data['start_date'] = tournament_data['start_date'].isoformat()
 
     try:
-        response = supabase_client.table('tournaments').insert(tournament_data).execute()
+        response = await get_async_client().table('tournaments').insert(tournament_data).execute()
         if not response.data:
             raise HTTPException(status_code=400, detail="Could not create tournament.")
         
         new_tournament = response.data[0]
         tournament_id = new_tournament['id']
-        logger.info(f"Successfully created tournament with id: {tournament_id}")
+        logger.info("Successfully created tournament with id: %s", tournament_id)
 
         organizer_data = {
             "tournament_id": tournament_id,
             "user_id": str(user_id),
             "role": "owner"
         }
-        organizer_response = supabase_client.table('tournament_organizers').insert(organizer_data).execute()
+        organizer_response = await get_async_client().table('tournament_organizers').insert(organizer_data).execute()
         if not organizer_response.data:
-            logger.error(f"Failed to create organizer link for tournament_id: {tournament_id}")
+            logger.error("Failed to create organizer link for tournament_id: %s", tournament_id)
             raise HTTPException(status_code=500, detail="Tournament created, but failed to assign owner.")
 
-        logger.info(f"Successfully assigned owner for tournament_id: {tournament_id}")
+        logger.info("Successfully assigned owner for tournament_id: %s", tournament_id)
+        invalidate_organizer_roles(user_id)
+        index_tournament(new_tournament)
         return new_tournament
     except Exception as e:
-        logger.exception(f"Error during tournament creation: {e}")
+        logger.exception("Error during tournament creation: %s", e)
         raise HTTPException(status_code=500, detail="An unexpected error occurred.")
 
 
 
-def get_tournament_by_slug(slug: str) -> dict:
-    """Retrieves a tournament and its organizers by its public slug."""
-    logger.info(f"Fetching tournament by slug: {slug}")
-    try:
-        # Use a relational query to get the tournament and its organizers in one call
-        response = supabase_client.table('tournaments').select('*, tournament_organizers(user_id, role)').eq('slug', slug).single().execute()
-        if not response.data:
-             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tournament not found.")
-        return response.data
-    except Exception:
-        logger.warning(f"Tournament with slug '{slug}' not found.")
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tournament not found.")
-
-
-
-def get_my_tournaments(user_id: UUID) -> list:
+async def get_my_tournaments(user_id: UUID) -> list:
     """Retrieves all tournaments a user is an organizer for."""
-    logger.info(f"Fetching tournaments for user_id: {user_id}")
+    logger.info("Fetching tournaments for user_id: %s", user_id)
     try:
         # Query the junction table to get tournament IDs, then fetch tournament details
-        response = supabase_client.table('tournament_organizers').select('tournaments(*)').eq('user_id', str(user_id)).execute()
+        response = await get_async_client().table('tournament_organizers').select('tournaments(*)').eq('user_id', str(user_id)).execute()
         # The result is a list of objects, each with a 'tournaments' key. We extract the value.
         return [item['tournaments'] for item in response.data]
     except Exception as e:
-        logger.exception(f"Error fetching 'My Tournaments' for user_id: {user_id}. Details: {e}")
+        logger.exception("Error fetching 'My Tournaments' for user_id: %s. Details: %s", user_id, e)
         raise HTTPException(status_code=500, detail="Could not fetch user's tournaments.")
 
-def get_all_tournaments(game: str | None, latest: bool):
+async def get_all_tournaments(
+    game: str | None,
+    latest: bool,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    full: bool = False,
+) -> dict:
     """
-    Retrieves tournament records from the database with optional filters.
+    Retrieves one page of tournament records with optional filters.
+    Pages are ordered newest first and walked with a keyset cursor on (created_at, id),
+    so every page costs the same no matter how deep the client has scrolled.
+    Concurrent requests for the same page share one query.
     """
-    query = supabase_client.table('tournaments').select("*")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    key = (game, latest, cursor, limit, full)
+    return await _list_flight.do(key, _fetch_tournament_page, game, latest, cursor, limit, full)
+
+async def _fetch_tournament_page(game: str | None, latest: bool, cursor: str | None, limit: int, full: bool) -> dict:
+    columns = "*" if full else TOURNAMENT_CARD_COLUMNS
+    query = get_async_client().table('tournaments').select(columns)
 
     if game:
         query = query.eq('game', game)
@@ -111,16 +123,29 @@ def get_all_tournaments(game: str | None, latest: bool):
         seven_days_ago = datetime.utcnow() - timedelta(days=7)
         query = query.gte('created_at', seven_days_ago.isoformat())
 
-    response = query.order('created_at', desc=True).execute()
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{last_id})')
+
+    # Fetch one extra row to find out whether there is another page.
+    response = await query.order('created_at', desc=True).order('id', desc=True).limit(limit + 1).execute()
 
-    return response.data or []
+    rows = response.data or []
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return {"data": rows[:limit], "next_cursor": next_cursor}
+
+def tournament_page_etag(page: dict, *params) -> str:
+    """
+    ETag of a tournament list page, built from each row's id and updated_at rather than the
+    whole body. Any edit bumps updated_at, and creations and deletions change the rows.
+    """
+    versions = [(row.get('id'), row.get('updated_at') or row.get('created_at')) for row in page["data"]]
+    return make_etag(params, versions, page["next_cursor"])
 
-def update_existing_tournament(tournament_id: UUID, update_data: dict, user_id: UUID) -> dict:
+async def update_existing_tournament(tournament_id: UUID, update_data: dict, user_id: UUID, auth: Optional[OrganizerContext] = None) -> dict:
     """Updates a tournament's details after checking for permission."""
-    logger.info(f"User {user_id} attempting to update tournament {tournament_id}")
-    if not _check_permission(tournament_id, user_id):
-        logger.warning(f"Permission denied for user {user_id} to update tournament {tournament_id}")
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to edit this tournament.")
+    logger.info("User %s attempting to update tournament %s", user_id, tournament_id)
+    await require_organizer(tournament_id, user_id, "You do not have permission to edit this tournament.", auth=auth)
 
     # FIX: Also convert the start_date here if it's being updated
     if 'start_date' in update_data and isinstance(update_data['start_date'], datetime):
@@ -128,65 +153,70 @@ def update_existing_tournament(tournament_id: UUID, update_data: dict, user_id:
 
     update_data['updated_at'] = datetime.utcnow().isoformat()
     try:
-        response = supabase_client.table('tournaments').update(update_data).eq('id', str(tournament_id)).execute()
+        response = await get_async_client().table('tournaments').update(update_data).eq('id', str(tournament_id)).execute()
         if not response.data:
             raise HTTPException(status_code=404, detail="Tournament not found or no data was changed.")
-        logger.info(f"Tournament {tournament_id} updated successfully by user {user_id}")
+        logger.info("Tournament %s updated successfully by user %s", tournament_id, user_id)
+        invalidate_tournament_cache(tournament_id)
+        index_tournament(response.data[0])
+        hub.publish(tournament_id, "tournament.updated", {"id": str(tournament_id), **update_data})
         return response.data[0]
     except Exception as e:
-        logger.exception(f"Error updating tournament {tournament_id}: {e}")
+        logger.exception("Error updating tournament %s: %s", tournament_id, e)
         raise HTTPException(status_code=500, detail="Could not update tournament.")
 
-def delete_existing_tournament(tournament_id: UUID, user_id: UUID):
+async def delete_existing_tournament(tournament_id: UUID, user_id: UUID, auth: Optional[OrganizerContext] = None):
     """Deletes a tournament after checking for 'owner' permission."""
-    logger.info(f"User {user_id} attempting to delete tournament {tournament_id}")
+    logger.info("User %s attempting to delete tournament %s", user_id, tournament_id)
     # Only owners can delete
-    if not _check_permission(tournament_id, user_id, allowed_roles=['owner']):
-        logger.warning(f"Permission denied for user {user_id} to delete tournament {tournament_id}")
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only the tournament owner can delete this tournament.")
+    await require_organizer(tournament_id, user_id, "Only the tournament owner can delete this tournament.",
+                            allowed_roles=('owner',), auth=auth)
 
     try:
-        response = supabase_client.table('tournaments').delete().eq('id', str(tournament_id)).execute()
+        response = await get_async_client().table('tournaments').delete().eq('id', str(tournament_id)).execute()
         if not response.data:
             raise HTTPException(status_code=404, detail="Tournament not found.")
-        logger.info(f"Tournament {tournament_id} deleted successfully by user {user_id}")
+        logger.info("Tournament %s deleted successfully by user %s", tournament_id, user_id)
+        invalidate_tournament_cache(tournament_id, deleted=True)
+        invalidate_organizer_roles(user_id)
+        tournament_index.remove(tournament_id)
+        hub.publish(tournament_id, "tournament.deleted", {"id": str(tournament_id)})
+        background.queue.enqueue("storage.remove", bucket='tournaments', paths=image_paths(f"public/{tournament_id}"))
         return
     except Exception as e:
-        logger.exception(f"Error deleting tournament {tournament_id}: {e}")
+        logger.exception("Error deleting tournament %s: %s", tournament_id, e)
         raise HTTPException(status_code=500, detail="Could not delete tournament.")
     
-def upload_tournament_image(tournament_id: UUID, user_id: UUID, file: UploadFile) -> str:
+async def upload_tournament_image(tournament_id: UUID, user_id: UUID, file: UploadFile, auth: Optional[OrganizerContext] = None) -> str:
     """Uploads a banner image for a tournament after checking permissions."""
-    logger.info(f"User {user_id} attempting to upload image for tournament {tournament_id}")
-    if not _check_permission(tournament_id, user_id):
-        logger.warning(f"Permission denied for user {user_id} to upload image for tournament {tournament_id}")
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to modify this tournament.")
+    logger.info("User %s attempting to upload image for tournament %s", user_id, tournament_id)
+    await require_organizer(tournament_id, user_id, "You do not have permission to modify this tournament.", auth=auth)
     
     try:
-        file_ext = os.path.splitext(file.filename)[1]
-        path = f"public/{tournament_id}{file_ext}"
-        file_content = file.file.read()
-
-        supabase_client.storage.from_('tournaments').upload(
-            path=path,
-            file=file_content,
-            file_options={"content-type": file.content_type, "upsert": "true"}
-        )
+        path = await stream_image_to_storage(file, bucket='tournaments', path_stem=f"public/{tournament_id}")
         
-        public_url = supabase_client.storage.from_('tournaments').get_public_url(path)
-        logger.info(f"Image uploaded for tournament {tournament_id}. URL: {public_url}")
+        public_url = await get_async_client().storage.from_('tournaments').get_public_url(path)
+        logger.info("Image uploaded for tournament %s. URL: %s", tournament_id, public_url)
+        invalidate_tournament_cache(tournament_id)
+        # A banner in another format is stored under another extension; clean it up after responding.
+        stale = [p for p in image_paths(f"public/{tournament_id}") if p != path]
+        background.queue.enqueue("storage.remove", bucket='tournaments', paths=stale)
         return public_url
 
+    except HTTPException as e:
+        raise e # Size and file type errors from the upload pipeline
     except Exception as e:
-        logger.exception(f"Error uploading image for tournament {tournament_id}: {e}")
+        logger.exception("Error uploading image for tournament %s: %s", tournament_id, e)
         raise HTTPException(status_code=500, detail="Failed to upload tournament image.")
     
-def search_tournaments_by_name(query: str) -> List[dict]:
+async def search_tournaments_by_name(query: str) -> List[dict]:
     """Searches for tournaments by name using full-text search."""
-    logger.info(f"Searching for tournaments with name matching: {query}")
+    logger.info("Searching for tournaments with name matching: %s", query)
+    if tournament_index.ready:
+        return tournament_index.search(query, limit=10)
     try:
         # ':*' performs a prefix search (e.g., 'Valo' matches 'Valorant')
-        response = supabase_client.table('tournaments') \
+        response = await get_async_client().table('tournaments') \
             .select("id, name, slug, game, image_url") \
             .limit(10) \
             .text_search('name', f"{query}:*", config='english') \
@@ -199,20 +229,20 @@ def search_tournaments_by_name(query: str) -> List[dict]:
         if "unexpected keyword argument 'config'" in str(e):
              logger.warning("text_search config keyword not supported by current library version. Retrying without it.")
              try:
-                 response = supabase_client.table('tournaments') \
+                 response = await get_async_client().table('tournaments') \
                      .select("id, name, slug, game, image_url") \
                      .limit(10) \
                      .text_search('name', f"{query}:*") \
                      .execute()
                  return response.data or []
              except Exception as fallback_e:
-                 logger.exception(f"Error searching tournaments (fallback): {fallback_e}")
+                 logger.exception("Error searching tournaments (fallback): %s", fallback_e)
                  raise HTTPException(
                      status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                      detail="An unexpected error occurred during tournament search."
                  )
         else:
-            logger.exception(f"Error searching tournaments: {e}")
+            logger.exception("Error searching tournaments: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="An unexpected error occurred during tournament search."
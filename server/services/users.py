@@ -1,22 +1,75 @@
 # server/services/users.py
 import logging
-import os
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
 from fastapi import HTTPException, status, UploadFile
-from utils.supabase import supabase_client
+from config.config import settings
+from utils.cache import MISSING
+from utils.shared_cache import TwoTierCache, open_store
+from utils.supabase import get_async_client
+from services.search_index import user_index, index_user
+from utils.uploads import image_paths, stream_image_to_storage
+from utils import background
+from utils.http_cache import make_etag
+from utils.single_flight import SingleFlight
 
-# Set up a logger for this module
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Concurrent views of the same public profile share one query.
+_profile_flight = SingleFlight("profile_by_username")
+_profile_by_id_flight = SingleFlight("profile_by_id")
+
+# Profiles are read on every app load (/users/me) and every public profile view.
+# "id:<user id>" holds the profile and "username:<username>" the user ID it belongs to;
+# None records that no profile exists, for PROFILE_NEGATIVE_TTL_SECONDS in the shared tier
+# only, so a profile created on another worker is seen at once.
+_profile_cache = TwoTierCache(
+    name="profiles",
+    max_size=settings.PROFILE_CACHE_SIZE,
+    ttl_seconds=settings.PROFILE_CACHE_TTL_SECONDS,
+    shared=open_store(settings.PROFILE_CACHE_SHARED_URL),
+    shared_ttl_seconds=settings.PROFILE_CACHE_SHARED_TTL_SECONDS,
+    none_ttl_seconds=settings.PROFILE_NEGATIVE_TTL_SECONDS,
+)
+# Bumped on every profile write; a read that raced with a write does not cache what it saw.
+_profile_writes = 0
+
+def _profile_not_found() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User profile not found.")
+
+async def _cache_profile(profile: dict):
+    await _profile_cache.set(f"id:{profile['id']}", profile)
+    await _profile_cache.set(f"username:{profile['username']}", str(profile['id']))
+
+async def _profile_written(profile: Optional[dict], user_id: UUID):
+    """Replaces, or drops, the cached copy of a profile that was just written."""
+    global _profile_writes
+    _profile_writes += 1
+    _profile_by_id_flight.forget(str(user_id))
+    if profile is None:
+        await _profile_cache.delete(f"id:{user_id}")
+        return
+    _profile_flight.forget(profile['username'])
+    await _cache_profile(profile)
+
+async def _cached_profile_by_username(username: str) -> Any:
+    """The cached profile for `username`, None if it is known not to exist, or MISSING."""
+    user_id = await _profile_cache.get(f"username:{username}")
+    if user_id is None or user_id is MISSING:
+        return user_id
+    profile = await _profile_cache.get(f"id:{user_id}")
+    # After a rename the old username still points at the user; it no longer matches.
+    if isinstance(profile, dict) and profile.get('username') == username:
+        return profile
+    return MISSING
+
 # --- CRUD Operations ---
 
-def create_user_profile(user_id: UUID, profile_data: Dict[str, Any]) -> dict:
+async def create_user_profile(user_id: UUID, profile_data: Dict[str, Any]) -> dict:
     """Inserts a new user profile into the public.users table."""
-    logger.info(f"Attempting to create profile for user_id: {user_id}")
+    logger.info("Attempting to create profile for user_id: %s", user_id)
     
     insert_data = {
         "id": str(user_id),
@@ -28,20 +81,22 @@ def create_user_profile(user_id: UUID, profile_data: Dict[str, Any]) -> dict:
     }
 
     try:
-        response = supabase_client.table('users').insert(insert_data).execute()
+        response = await get_async_client().table('users').insert(insert_data).execute()
         
         if not response.data:
-            logger.warning(f"Profile creation failed for user_id: {user_id}. No data returned from Supabase.")
+            logger.warning("Profile creation failed for user_id: %s. No data returned from Supabase.", user_id)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Could not create user profile."
             )
             
-        logger.info(f"Successfully created profile for user_id: {user_id}")
+        logger.info("Successfully created profile for user_id: %s", user_id)
+        index_user(response.data[0])
+        await _profile_written(response.data[0], user_id)
         return response.data[0]
         
     except Exception as e:
-        logger.exception(f"Error creating profile for user_id: {user_id}. Details: {e}")
+        logger.exception("Error creating profile for user_id: %s. Details: %s", user_id, e)
         if "duplicate key value violates unique constraint" in str(e):
              raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -53,61 +108,111 @@ def create_user_profile(user_id: UUID, profile_data: Dict[str, Any]) -> dict:
         )
 
 
-def get_user_profile(user_id: UUID) -> dict:
-    """Retrieves a user's profile from the public.users table by their ID."""
-    logger.info(f"Attempting to get profile for user_id: {user_id}")
+async def get_user_profile(user_id: UUID) -> dict:
+    """
+    Retrieves a user's profile from the public.users table by their ID.
+    Served from the profile cache when possible, including the 404 for users who have
+    not created a profile yet.
+    """
+    cached = await _profile_cache.get(f"id:{user_id}")
+    if cached is None:
+        raise _profile_not_found()
+    if cached is not MISSING:
+        return cached
+    return await _profile_by_id_flight.do(str(user_id), _fetch_profile, user_id)
+
+async def _fetch_profile(user_id: UUID) -> dict:
+    logger.info("Attempting to get profile for user_id: %s", user_id)
+    writes = _profile_writes
     try:
-        response = supabase_client.table('users').select("*").eq('id', str(user_id)).execute()
+        response = await get_async_client().table('users').select("*").eq('id', str(user_id)).execute()
         
         if not response.data:
-            logger.warning(f"Profile not found for user_id: {user_id}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User profile not found."
-            )
+            logger.warning("Profile not found for user_id: %s", user_id)
+            if writes == _profile_writes:
+                await _profile_cache.set(f"id:{user_id}", None)
+            raise _profile_not_found()
         
-        logger.info(f"Successfully found profile for user_id: {user_id}")
+        logger.info("Successfully found profile for user_id: %s", user_id)
+        if writes == _profile_writes:
+            await _cache_profile(response.data[0])
         return response.data[0]
         
     except HTTPException as e:
         raise e # Re-raise known HTTP exceptions
     except Exception as e:
-        logger.exception(f"Error getting profile for user_id: {user_id}. Details: {e}")
+        logger.exception("Error getting profile for user_id: %s. Details: %s", user_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while fetching the profile."
         )
 
-def get_user_profile_by_username(username: str) -> dict:
-    """Retrieves a user's profile by their unique username."""
-    logger.info(f"Attempting to get profile for username: {username}")
+async def get_user_profile_by_username(username: str) -> dict:
+    """Retrieves a user's profile by their unique username, through the profile cache."""
+    cached = await _cached_profile_by_username(username)
+    if cached is None:
+        raise _profile_not_found()
+    if cached is not MISSING:
+        return cached
+    return await _profile_flight.do(username, _fetch_profile_by_username, username)
+
+async def _fetch_profile_by_username(username: str) -> dict:
+    logger.info("Attempting to get profile for username: %s", username)
+    writes = _profile_writes
     try:
-        response = supabase_client.table('users').select("*").eq('username', username).execute()
+        response = await get_async_client().table('users').select("*").eq('username', username).execute()
         
         if not response.data:
-            logger.warning(f"Profile not found for username: {username}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User profile not found."
-            )
+            logger.warning("Profile not found for username: %s", username)
+            if writes == _profile_writes:
+                await _profile_cache.set(f"username:{username}", None)
+            raise _profile_not_found()
         
-        logger.info(f"Successfully found profile for username: {username}")
+        logger.info("Successfully found profile for username: %s", username)
+        if writes == _profile_writes:
+            await _cache_profile(response.data[0])
         return response.data[0]
         
+    except HTTPException as e:
+        raise e
     except Exception as e:
-        logger.exception(f"Error getting profile for username: {username}. Details: {e}")
+        logger.exception("Error getting profile for username: %s. Details: %s", username, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while fetching the profile."
         )
         
-def search_users_by_username(query: str, current_user_id: UUID) -> List[dict]:
+def profile_etag(profile: dict) -> str:
+    """ETag of a public profile; every profile update bumps updated_at."""
+    return make_etag(profile.get('id'), profile.get('updated_at'))
+
+async def get_profile_etag_by_username(username: str) -> Optional[str]:
+    """
+    Looks up only the version columns of a profile, so a conditional request can be
+    answered without fetching the whole row. Returns None if the profile does not exist.
+    """
+    cached = await _cached_profile_by_username(username)
+    if cached is None:
+        return None
+    if cached is not MISSING:
+        return profile_etag(cached)
+    try:
+        response = await get_async_client().table('users').select("id, updated_at").eq('username', username).execute()
+        return profile_etag(response.data[0]) if response.data else None
+    except Exception as e:
+        # Fall back to a full fetch rather than failing the request.
+        logger.warning("Could not check the profile version for username: %s. Details: %s", username, e)
+        return None
+
+async def search_users_by_username(query: str, current_user_id: UUID) -> List[dict]:
     """Searches for users by username using full-text search."""
-    logger.info(f"Searching for users with username matching: {query}")
+    logger.info("Searching for users with username matching: %s", query)
+    if user_index.ready:
+        return user_index.search(query, limit=10, exclude_id=str(current_user_id))
     try:
         # Use 'plfts' for plain text search which is safer
         # The ':*' tells postgres to do a prefix search (e.g., 'Team' matches 'TeamMate')
-        response = supabase_client.table('users').select("id, username, photo_url") \
+        response = await get_async_client().table('users').select("id, username, photo_url") \
             .neq('id', str(current_user_id)) \
             .limit(10) \
             .text_search('username', f"{query}:*") \
@@ -119,33 +224,36 @@ def search_users_by_username(query: str, current_user_id: UUID) -> List[dict]:
         return response.data
         
     except Exception as e:
-        logger.exception(f"Error searching for users: {e}")
+        logger.exception("Error searching for users: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while searching for users."
         )
 
-def update_user_profile(user_id: UUID, update_data: Dict[str, Any]) -> dict:
+async def update_user_profile(user_id: UUID, update_data: Dict[str, Any]) -> dict:
     """Updates a user's profile in the public.users table."""
-    logger.info(f"Attempting to update profile for user_id: {user_id} with data: {update_data}")
+    # Field names only: the payload can be large and holds personal data.
+    logger.info("Attempting to update profile for user_id: %s, fields: %s", user_id, list(update_data))
     
     update_data['updated_at'] = datetime.utcnow().isoformat()
 
     try:
-        response = supabase_client.table('users').update(update_data).eq('id', str(user_id)).execute()
+        response = await get_async_client().table('users').update(update_data).eq('id', str(user_id)).execute()
             
         if not response.data:
-            logger.warning(f"Profile update for user_id {user_id} returned no data. Profile may not exist or data was unchanged.")
+            logger.warning("Profile update for user_id %s returned no data. Profile may not exist or data was unchanged.", user_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User profile not found or no data was changed."
             )
             
-        logger.info(f"Successfully updated profile for user_id: {user_id}")
+        logger.info("Successfully updated profile for user_id: %s", user_id)
+        index_user(response.data[0])
+        await _profile_written(response.data[0], user_id)
         return response.data[0]
         
     except Exception as e:
-        logger.exception(f"Error updating profile for user_id: {user_id}. Details: {e}")
+        logger.exception("Error updating profile for user_id: %s. Details: %s", user_id, e)
         if "duplicate key value violates unique constraint" in str(e):
              raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -156,40 +264,36 @@ def update_user_profile(user_id: UUID, update_data: Dict[str, Any]) -> dict:
             detail="An unexpected error occurred during profile update."
         )
 
-def upload_avatar(user_id: UUID, file: UploadFile) -> str:
-    """Uploads an avatar to storage and returns the public URL."""
-    logger.info(f"Attempting to upload avatar for user_id: {user_id}")
+async def upload_avatar(user_id: UUID, file: UploadFile) -> str:
+    """Streams an avatar to storage and returns the public URL."""
+    logger.info("Attempting to upload avatar for user_id: %s", user_id)
     try:
-        file_ext = os.path.splitext(file.filename)[1]
-        path = f"public/{user_id}{file_ext}"
-        file_content = file.file.read()
-
-        logger.info(f"Uploading file to storage path: {path}")
-        supabase_client.storage.from_('avatars').upload(
-            path=path,
-            file=file_content,
-            file_options={"content-type": file.content_type, "upsert": "true"}
-        )
-        logger.info("File uploaded successfully to storage.")
+        path = await stream_image_to_storage(file, bucket='avatars', path_stem=f"public/{user_id}")
+        logger.info("File uploaded successfully to storage path: %s", path)
 
         logger.info("Getting public URL for the uploaded avatar.")
-        response = supabase_client.storage.from_('avatars').get_public_url(path)
-        logger.info(f"Successfully retrieved public URL: {response}")
-        
+        response = await get_async_client().storage.from_('avatars').get_public_url(path)
+        logger.info("Successfully retrieved public URL: %s", response)
+        # An avatar in another format is stored under another extension; clean it up after responding.
+        stale = [p for p in image_paths(f"public/{user_id}") if p != path]
+        background.queue.enqueue("storage.remove", bucket='avatars', paths=stale)
+
         return response
 
+    except HTTPException as e:
+        raise e # Size and file type errors from the upload pipeline
     except Exception as e:
-        logger.exception(f"Error uploading avatar for user_id: {user_id}. Details: {e}")
+        logger.exception("Error uploading avatar for user_id: %s. Details: %s", user_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload avatar: {str(e)}"
         )
 
 
-def delete_user_profile(user_id: UUID) -> bool:
+async def delete_user_profile(user_id: UUID) -> bool:
     """Deletes a user's profile from the public.users table."""
     try:
-        response = supabase_client.table('users') \
+        response = await get_async_client().table('users') \
             .delete() \
             .eq('id', str(user_id)) \
             .execute()
@@ -200,6 +304,8 @@ def delete_user_profile(user_id: UUID) -> bool:
                 detail="User profile not found."
             )
             
+        user_index.remove(user_id)
+        await _profile_written(None, user_id)
         return True
     
     except Exception as e:
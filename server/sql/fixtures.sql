@@ -0,0 +1,99 @@
+-- server/sql/fixtures.sql
+-- Matches table and the result RPC used by services/fixtures.py.
+-- Every fixture of a tournament is written by one bulk insert when registration closes;
+-- the unique (tournament_id, round, position) key makes a second generation fail.
+
+create table if not exists public.matches (
+    id uuid primary key default gen_random_uuid(),
+    tournament_id uuid not null references public.tournaments (id) on delete cascade,
+    format text not null check (format in ('single_elimination', 'round_robin')),
+    round integer not null check (round >= 1),
+    position integer not null check (position >= 0),
+    team_a_id uuid references public.teams (id) on delete set null,
+    team_b_id uuid references public.teams (id) on delete set null,
+    score_a integer,
+    score_b integer,
+    winner_id uuid references public.teams (id) on delete set null,
+    status text not null default 'pending' check (status in ('pending', 'bye', 'completed')),
+    created_at timestamptz not null default now(),
+    updated_at timestamptz not null default now(),
+    unique (tournament_id, round, position)
+);
+
+-- No policies: only the server, with the service role, reads and writes matches.
+-- Browsers go through the API, which checks who may report a result.
+alter table public.matches enable row level security;
+
+
+-- Records a result. In round robin both teams' standings rows are updated (sql/standings.sql);
+-- in single elimination the winner moves into the next round:
+-- the winner of (round r, position p) becomes team_a (p even) or team_b (p odd) of (r + 1, p / 2).
+create or replace function public.report_match_result(
+    p_tournament_id uuid,
+    p_match_id uuid,
+    p_score_a integer,
+    p_score_b integer
+) returns public.matches
+language plpgsql
+as $$
+declare
+    m public.matches;
+    v_winner uuid;
+begin
+    select * into m
+    from public.matches
+    where id = p_match_id and tournament_id = p_tournament_id
+    for update;
+
+    if not found then
+        raise exception 'MATCH_NOT_FOUND';
+    end if;
+
+    if m.status <> 'pending' then
+        raise exception 'MATCH_ALREADY_COMPLETED';
+    end if;
+
+    if m.team_a_id is null or m.team_b_id is null then
+        raise exception 'MATCH_NOT_READY';
+    end if;
+
+    if p_score_a > p_score_b then
+        v_winner := m.team_a_id;
+    elsif p_score_b > p_score_a then
+        v_winner := m.team_b_id;
+    elsif m.format = 'single_elimination' then
+        raise exception 'DRAW_NOT_ALLOWED';
+    end if;
+
+    update public.matches
+    set score_a = p_score_a,
+        score_b = p_score_b,
+        winner_id = v_winner,
+        status = 'completed',
+        updated_at = now()
+    where id = m.id
+    returning * into m;
+
+    if m.format = 'round_robin' then
+        perform public.apply_standings_result(m.tournament_id, m.team_a_id, m.team_b_id, p_score_a, p_score_b);
+        perform public.apply_standings_result(m.tournament_id, m.team_b_id, m.team_a_id, p_score_b, p_score_a);
+    end if;
+
+    if m.format = 'single_elimination' then
+        if m.position % 2 = 0 then
+            update public.matches set team_a_id = v_winner, updated_at = now()
+            where tournament_id = m.tournament_id and round = m.round + 1 and position = m.position / 2;
+        else
+            update public.matches set team_b_id = v_winner, updated_at = now()
+            where tournament_id = m.tournament_id and round = m.round + 1 and position = m.position / 2;
+        end if;
+    end if;
+
+    return m;
+end;
+$$;
+
+-- The function does not check who is calling; services/fixtures.py does, so only the
+-- service role may execute it.
+revoke execute on function public.report_match_result(uuid, uuid, integer, integer) from public, anon, authenticated;
+grant execute on function public.report_match_result(uuid, uuid, integer, integer) to service_role;
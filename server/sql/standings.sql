@@ -0,0 +1,72 @@
+-- server/sql/standings.sql
+-- Persisted round-robin standings, kept up to date one result at a time by
+-- report_match_result (sql/fixtures.sql) instead of being recomputed from every match.
+-- services/standings.py loads this snapshot and applies later results in memory.
+
+create table if not exists public.standings (
+    tournament_id uuid not null references public.tournaments (id) on delete cascade,
+    team_id uuid not null references public.teams (id) on delete cascade,
+    played integer not null default 0,
+    wins integer not null default 0,
+    draws integer not null default 0,
+    losses integer not null default 0,
+    points integer not null default 0,
+    score_for integer not null default 0,
+    score_against integer not null default 0,
+    -- Points taken from each opponent, {opponent_team_id: points}, for the head-to-head tiebreak.
+    head_to_head jsonb not null default '{}'::jsonb,
+    updated_at timestamptz not null default now(),
+    primary key (tournament_id, team_id)
+);
+
+-- No policies: only the server, with the service role, reads and writes standings.
+alter table public.standings enable row level security;
+
+
+-- Adds one team's side of a result. A win is worth 3 points and a draw 1,
+-- matching POINTS_FOR_WIN and POINTS_FOR_DRAW in services/standings.py.
+create or replace function public.apply_standings_result(
+    p_tournament_id uuid,
+    p_team_id uuid,
+    p_opponent_id uuid,
+    p_score_for integer,
+    p_score_against integer
+) returns void
+language plpgsql
+as $$
+declare
+    v_points integer := case
+        when p_score_for > p_score_against then 3
+        when p_score_for = p_score_against then 1
+        else 0
+    end;
+begin
+    insert into public.standings as s (
+        tournament_id, team_id, played, wins, draws, losses, points, score_for, score_against, head_to_head
+    ) values (
+        p_tournament_id, p_team_id, 1,
+        (p_score_for > p_score_against)::int,
+        (p_score_for = p_score_against)::int,
+        (p_score_for < p_score_against)::int,
+        v_points, p_score_for, p_score_against,
+        jsonb_build_object(p_opponent_id::text, v_points)
+    )
+    on conflict (tournament_id, team_id) do update set
+        played = s.played + 1,
+        wins = s.wins + excluded.wins,
+        draws = s.draws + excluded.draws,
+        losses = s.losses + excluded.losses,
+        points = s.points + excluded.points,
+        score_for = s.score_for + excluded.score_for,
+        score_against = s.score_against + excluded.score_against,
+        head_to_head = s.head_to_head || jsonb_build_object(
+            p_opponent_id::text,
+            coalesce((s.head_to_head ->> p_opponent_id::text)::int, 0) + v_points
+        ),
+        updated_at = now();
+end;
+$$;
+
+-- Only report_match_result, running as the service role, may add results.
+revoke execute on function public.apply_standings_result(uuid, uuid, uuid, integer, integer) from public, anon, authenticated;
+grant execute on function public.apply_standings_result(uuid, uuid, uuid, integer, integer) to service_role;
@@ -0,0 +1,177 @@
+-- server/sql/team_registration.sql
+-- Team registration RPCs called by services/teams.py.
+-- Each function runs in one transaction, so a team is never left without its leader
+-- and a roster is either added in full or not at all.
+-- Team names are unique per tournament regardless of case, as in services/team_import.py.
+-- The functions trust the user IDs they are given; the API checks who is calling first.
+-- Only the service role (the server's SUPABASE_KEY) may execute them, so a browser holding
+-- the anon key cannot call them directly in someone else's name.
+
+create or replace function public.create_team_with_leader(
+    p_tournament_id uuid,
+    p_team_name text,
+    p_leader_id uuid
+) returns public.teams
+language plpgsql
+as $$
+declare
+    new_team public.teams;
+begin
+    -- Serialize registrations per tournament so two concurrent requests cannot both pass the checks.
+    perform pg_advisory_xact_lock(hashtext(p_tournament_id::text));
+
+    -- Generating fixtures closes registration (sql/fixtures.sql).
+    if exists (select 1 from public.matches where tournament_id = p_tournament_id) then
+        raise exception 'REGISTRATION_CLOSED';
+    end if;
+
+    if exists (
+        select 1
+        from public.team_members tm
+        join public.teams t on t.id = tm.team_id
+        where t.tournament_id = p_tournament_id and tm.user_id = p_leader_id
+    ) then
+        raise exception 'LEADER_ALREADY_REGISTERED';
+    end if;
+
+    if exists (
+        select 1 from public.teams
+        where tournament_id = p_tournament_id and lower(name) = lower(p_team_name)
+    ) then
+        raise exception 'TEAM_NAME_TAKEN';
+    end if;
+
+    insert into public.teams (name, tournament_id, leader_id)
+    values (p_team_name, p_tournament_id, p_leader_id)
+    returning * into new_team;
+
+    insert into public.team_members (team_id, user_id)
+    values (new_team.id, p_leader_id);
+
+    return new_team;
+end;
+$$;
+
+revoke execute on function public.create_team_with_leader(uuid, text, uuid) from public, anon, authenticated;
+grant execute on function public.create_team_with_leader(uuid, text, uuid) to service_role;
+
+
+create or replace function public.add_team_members(
+    p_team_id uuid,
+    p_user_ids uuid[],
+    p_requester_id uuid
+) returns setof public.team_members
+language plpgsql
+as $$
+declare
+    v_leader_id uuid;
+    v_tournament_id uuid;
+    v_conflicts text;
+begin
+    select leader_id, tournament_id into v_leader_id, v_tournament_id
+    from public.teams
+    where id = p_team_id;
+
+    if not found then
+        raise exception 'TEAM_NOT_FOUND';
+    end if;
+
+    if v_leader_id <> p_requester_id then
+        raise exception 'NOT_TEAM_LEADER';
+    end if;
+
+    perform pg_advisory_xact_lock(hashtext(v_tournament_id::text));
+
+    -- Generating fixtures closes registration (sql/fixtures.sql), rosters included.
+    if exists (select 1 from public.matches where tournament_id = v_tournament_id) then
+        raise exception 'REGISTRATION_CLOSED';
+    end if;
+
+    -- One set-based lookup for every candidate instead of one query per user.
+    select string_agg(distinct tm.user_id::text, ', ') into v_conflicts
+    from public.team_members tm
+    join public.teams t on t.id = tm.team_id
+    where t.tournament_id = v_tournament_id and tm.user_id = any(p_user_ids);
+
+    if v_conflicts is not null then
+        raise exception 'USERS_ALREADY_REGISTERED' using detail = v_conflicts;
+    end if;
+
+    return query
+    insert into public.team_members (team_id, user_id)
+    select p_team_id, candidate
+    from unnest(p_user_ids) as candidate
+    returning *;
+end;
+$$;
+
+revoke execute on function public.add_team_members(uuid, uuid[], uuid) from public, anon, authenticated;
+grant execute on function public.add_team_members(uuid, uuid[], uuid) to service_role;
+
+
+-- Bulk import used by services/team_import.py. p_teams is a JSON array of
+-- {"name": ..., "leader_id": ..., "member_ids": [...]} (member_ids includes the leader),
+-- already validated by the service; the checks are repeated here under the tournament lock.
+create or replace function public.import_teams(
+    p_tournament_id uuid,
+    p_teams jsonb
+) returns setof public.teams
+language plpgsql
+as $$
+declare
+    v_max_teams integer;
+    v_existing integer;
+    v_conflicts text;
+begin
+    perform pg_advisory_xact_lock(hashtext(p_tournament_id::text));
+
+    if exists (select 1 from public.matches where tournament_id = p_tournament_id) then
+        raise exception 'REGISTRATION_CLOSED';
+    end if;
+
+    select max_teams into v_max_teams from public.tournaments where id = p_tournament_id;
+    select count(*) into v_existing from public.teams where tournament_id = p_tournament_id;
+    if v_max_teams is not null and v_existing + jsonb_array_length(p_teams) > v_max_teams then
+        raise exception 'TOURNAMENT_FULL';
+    end if;
+
+    select string_agg(t.name, ', ') into v_conflicts
+    from public.teams t
+    where t.tournament_id = p_tournament_id
+      and lower(t.name) in (select lower(e ->> 'name') from jsonb_array_elements(p_teams) e);
+    if v_conflicts is not null then
+        raise exception 'TEAM_NAME_TAKEN' using detail = v_conflicts;
+    end if;
+
+    select string_agg(distinct tm.user_id::text, ', ') into v_conflicts
+    from public.team_members tm
+    join public.teams t on t.id = tm.team_id
+    where t.tournament_id = p_tournament_id
+      and tm.user_id in (
+          select m::uuid
+          from jsonb_array_elements(p_teams) e, jsonb_array_elements_text(e -> 'member_ids') m
+      );
+    if v_conflicts is not null then
+        raise exception 'USERS_ALREADY_REGISTERED' using detail = v_conflicts;
+    end if;
+
+    return query
+    with new_teams as (
+        insert into public.teams (name, tournament_id, leader_id)
+        select e ->> 'name', p_tournament_id, (e ->> 'leader_id')::uuid
+        from jsonb_array_elements(p_teams) e
+        returning *
+    ), new_members as (
+        insert into public.team_members (team_id, user_id)
+        select nt.id, m::uuid
+        from new_teams nt
+        join jsonb_array_elements(p_teams) e on e ->> 'name' = nt.name
+        cross join lateral jsonb_array_elements_text(e -> 'member_ids') m
+    )
+    select * from new_teams;
+end;
+$$;
+
+-- The organizer check happens in services/team_import.py, so only the service role may execute it.
+revoke execute on function public.import_teams(uuid, jsonb) from public, anon, authenticated;
+grant execute on function public.import_teams(uuid, jsonb) to service_role;
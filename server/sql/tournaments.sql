@@ -0,0 +1,17 @@
+-- server/sql/tournaments.sql
+-- Indexes behind the keyset-paginated lists. Each page continues from the (created_at, id)
+-- of the last row of the previous one, so with these a deep page is one index range scan
+-- instead of a sort of every row before it.
+
+-- GET /tournaments/: newest first (services/tournaments.py, _fetch_tournament_page).
+create index if not exists tournaments_created_at_id_idx
+    on public.tournaments (created_at desc, id desc);
+
+-- The same list filtered by game.
+create index if not exists tournaments_game_created_at_id_idx
+    on public.tournaments (game, created_at desc, id desc);
+
+-- GET /teams/tournaments/{id}: a tournament's teams in registration order
+-- (services/teams.py, _fetch_roster_page).
+create index if not exists teams_tournament_id_created_at_id_idx
+    on public.teams (tournament_id, created_at, id);
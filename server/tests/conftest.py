@@ -0,0 +1,9 @@
+# server/tests/conftest.py
+import os
+
+# The app reads its settings at import time; give it a placeholder project before any test imports it.
+os.environ.setdefault("SUPABASE_URL", "http://supabase.test")
+os.environ.setdefault("SUPABASE_KEY", "test-service-key")
+os.environ.setdefault("FRONTEND_URL", "http://localhost:5173")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret-of-at-least-32-bytes")
+os.environ.setdefault("AUTH_VERIFY_MODE", "local")
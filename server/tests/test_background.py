@@ -0,0 +1,128 @@
+# server/tests/test_background.py
+import asyncio
+import json
+
+import pytest
+
+from utils import background
+from utils.background import FileBacklog, Job, TaskQueue
+
+runs = []
+
+
+@background.task("test.record")
+async def record(value):
+    runs.append(value)
+
+
+@background.task("test.fail")
+async def fail():
+    raise RuntimeError("always fails")
+
+
+@pytest.fixture(autouse=True)
+def clear_runs():
+    runs.clear()
+
+
+def make_queue(backlog, **overrides):
+    options = dict(workers=1, max_size=10, max_attempts=2, retry_base_seconds=0.01, job_timeout=5)
+    options.update(overrides)
+    return TaskQueue(backlog=backlog, **options)
+
+
+def test_load_keeps_only_unfinished_jobs_and_compacts_the_file(tmp_path):
+    path = tmp_path / "backlog.jsonl"
+    done, pending = Job(name="test.record", kwargs={"value": 1}), Job(name="test.record", kwargs={"value": 2})
+    lines = [
+        {"op": "add", "job": vars(done)},
+        {"op": "add", "job": vars(pending)},
+        {"op": "done", "id": done.id},
+    ]
+    path.write_text("".join(json.dumps(line) + "\n" for line in lines) + '{"op": "add", "jo')  # cut short by a crash
+
+    assert [job.id for job in FileBacklog(str(path)).load()] == [pending.id]
+    assert [json.loads(line)["job"]["id"] for line in path.read_text().splitlines()] == [pending.id]
+
+
+def test_jobs_left_at_shutdown_are_replayed_at_the_next_start(tmp_path):
+    path = str(tmp_path / "backlog.jsonl")
+
+    async def first_run():
+        queue = make_queue(FileBacklog(path))
+        queue.start()
+        queue.enqueue("test.record", value="finished")
+        await asyncio.sleep(0.05)
+        # Stop the worker so the next job is still queued at shutdown.
+        for worker in queue._worker_tasks:
+            worker.cancel()
+        queue.enqueue("test.record", value="left over")
+        await queue.drain(timeout=0.05)
+
+    async def second_run():
+        queue = make_queue(FileBacklog(path))
+        queue.start()
+        await asyncio.sleep(0.05)
+        await queue.drain(timeout=1)
+
+    asyncio.run(first_run())
+    assert runs == ["finished"]
+    asyncio.run(second_run())
+    assert runs == ["finished", "left over"]
+    assert FileBacklog(path).load() == []
+
+
+def test_jobs_out_of_attempts_leave_the_backlog(tmp_path):
+    path = str(tmp_path / "backlog.jsonl")
+
+    async def run():
+        queue = make_queue(FileBacklog(path))
+        queue.enqueue("test.fail")
+        await asyncio.sleep(0.2)
+        await queue.drain(timeout=1)
+
+    asyncio.run(run())
+    assert FileBacklog(path).load() == []
+
+
+def test_a_dropped_backlog_job_is_not_replayed_again(tmp_path):
+    path = str(tmp_path / "backlog.jsonl")
+    backlog = FileBacklog(path)
+    for value in range(3):
+        backlog.add(Job(name="test.record", kwargs={"value": value}))
+
+    async def run():
+        queue = make_queue(FileBacklog(path), workers=0, max_size=2)
+        queue.start()  # Only two of the three jobs fit.
+        await queue.drain(timeout=0.01)
+
+    asyncio.run(run())
+    assert len(FileBacklog(path).load()) == 2
+
+
+def test_retries_wait_for_room_in_a_full_queue(tmp_path):
+    attempts = []
+
+    @background.task("test.flaky")
+    async def flaky():
+        attempts.append(len(attempts))
+        if len(attempts) == 1:
+            raise RuntimeError("first attempt fails")
+
+    @background.task("test.slow")
+    async def slow():
+        await asyncio.sleep(0.1)
+
+    async def run():
+        queue = make_queue(FileBacklog(str(tmp_path / "backlog.jsonl")), max_size=1, max_attempts=3,
+                           retry_base_seconds=0.05)
+        queue.enqueue("test.flaky")
+        await asyncio.sleep(0.005)  # The first attempt fails; the retry is due in 25-75 ms.
+        queue.enqueue("test.slow")
+        await asyncio.sleep(0.005)  # The worker takes it and is busy for 100 ms.
+        queue.enqueue("test.slow")  # Fills the queue while the retry is waiting.
+        await asyncio.sleep(0.5)
+        await queue.drain(timeout=1)
+
+    asyncio.run(run())
+    assert len(attempts) == 2
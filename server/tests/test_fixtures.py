@@ -0,0 +1,76 @@
+# server/tests/test_fixtures.py
+from collections import Counter
+from itertools import combinations
+
+import pytest
+from fastapi import HTTPException
+
+from services.fixtures import ROUND_ROBIN, SINGLE_ELIMINATION, bracket_format, round_robin, seed_positions, single_elimination
+
+
+def teams(n):
+    return [f"t{i}" for i in range(1, n + 1)]
+
+
+@pytest.mark.parametrize("elimination_type, expected", [
+    ("Single Elimination", SINGLE_ELIMINATION),
+    ("knockout", SINGLE_ELIMINATION),
+    ("Round-Robin", ROUND_ROBIN),
+    ("round robin", ROUND_ROBIN),
+])
+def test_bracket_format(elimination_type, expected):
+    assert bracket_format(elimination_type) == expected
+
+
+def test_bracket_format_rejects_unknown_types():
+    with pytest.raises(HTTPException) as e:
+        bracket_format("Swiss")
+    assert e.value.status_code == 400
+
+
+def test_seed_positions():
+    assert seed_positions(8) == [1, 8, 4, 5, 2, 7, 3, 6]
+    for size in (2, 4, 16, 32):
+        order = seed_positions(size)
+        assert sorted(order) == list(range(1, size + 1))
+        assert all(order[i] + order[i + 1] == size + 1 for i in range(0, size, 2))
+
+
+def test_single_elimination_power_of_two():
+    rows = single_elimination(teams(8))
+    assert Counter(r["round"] for r in rows) == {1: 4, 2: 2, 3: 1}
+    first_round = [(r["team_a_id"], r["team_b_id"]) for r in rows if r["round"] == 1]
+    assert first_round == [("t1", "t8"), ("t4", "t5"), ("t2", "t7"), ("t3", "t6")]
+    assert all(r["status"] == "pending" for r in rows)
+
+
+def test_single_elimination_gives_top_seeds_byes_into_round_two():
+    rows = single_elimination(teams(5))
+    byes = [r for r in rows if r["status"] == "bye"]
+    assert sorted(r["team_a_id"] for r in byes) == ["t1", "t2", "t3"]
+    assert all(r["winner_id"] == r["team_a_id"] and r["team_b_id"] is None for r in byes)
+    second_round = [(r["team_a_id"], r["team_b_id"]) for r in rows if r["round"] == 2]
+    # t1's bye sits next to the t4-t5 match; t2 and t3 meet in round 2.
+    assert second_round == [("t1", None), ("t2", "t3")]
+    assert len(rows) == 4 + 2 + 1
+
+
+@pytest.mark.parametrize("n", [2, 3, 6, 7, 10])
+def test_round_robin_pairs_every_team_once(n):
+    rows = round_robin(teams(n))
+    games = [r for r in rows if r["status"] != "bye"]
+    pairs = Counter(frozenset((r["team_a_id"], r["team_b_id"])) for r in games)
+    assert set(pairs) == {frozenset(p) for p in combinations(teams(n), 2)}
+    assert set(pairs.values()) == {1}
+
+    rounds = n - 1 if n % 2 == 0 else n
+    assert max(r["round"] for r in rows) == rounds
+    for round_number in range(1, rounds + 1):
+        in_round = [t for r in rows if r["round"] == round_number for t in (r["team_a_id"], r["team_b_id"]) if t]
+        assert sorted(in_round) == sorted(teams(n))
+
+
+def test_round_robin_gives_each_team_one_bye_with_an_odd_count():
+    rows = round_robin(teams(5))
+    byes = Counter(r["team_a_id"] for r in rows if r["status"] == "bye")
+    assert byes == {t: 1 for t in teams(5)}
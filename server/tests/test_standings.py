@@ -0,0 +1,55 @@
+# server/tests/test_standings.py
+from services.standings import StandingsTable, _empty_row
+
+
+def table(*names):
+    return StandingsTable([_empty_row(name.lower(), name) for name in names])
+
+
+def ranking(standings):
+    return [row["name"] for row in standings.table()]
+
+
+def test_orders_by_points_then_difference_then_score_for():
+    standings = table("Alpha", "Bravo", "Charlie", "Delta")
+    standings.apply_result("alpha", "bravo", 3, 0)    # Alpha 3 pts, +3
+    standings.apply_result("charlie", "delta", 1, 0)  # Charlie 3 pts, +1
+    standings.apply_result("bravo", "delta", 2, 2)    # Bravo and Delta 1 pt
+    assert ranking(standings) == ["Alpha", "Charlie", "Delta", "Bravo"]
+
+    first = standings.table()[0]
+    assert first["rank"] == 1
+    assert (first["played"], first["wins"], first["points"], first["score_difference"]) == (1, 1, 3, 3)
+
+
+def test_head_to_head_breaks_a_tie_before_the_name():
+    standings = table("Alpha", "Xray", "Yankee", "Zulu")
+    standings.apply_result("zulu", "alpha", 1, 0)
+    standings.apply_result("xray", "zulu", 1, 0)
+    standings.apply_result("alpha", "yankee", 1, 0)
+    # Alpha and Zulu: 3 points, 1-1 each; Zulu won their match.
+    order = ranking(standings)
+    assert order.index("Zulu") < order.index("Alpha")
+
+
+def test_teams_still_level_are_ordered_by_name():
+    standings = table("Charlie", "Alpha", "Bravo")
+    standings.apply_result("charlie", "alpha", 1, 1)
+    assert ranking(standings) == ["Alpha", "Charlie", "Bravo"]
+
+
+def test_rendered_table_is_reused_until_the_next_result():
+    standings = table("Alpha", "Bravo")
+    rendered = standings.table()
+    assert standings.table() is rendered
+    standings.apply_result("bravo", "alpha", 1, 0)
+    assert standings.table() is not rendered
+    assert ranking(standings) == ["Bravo", "Alpha"]
+
+
+def test_result_for_a_team_missing_from_the_table_adds_its_row():
+    standings = table("Alpha")
+    standings.apply_result("alpha", "newcomer", 0, 2)
+    rows = {row["team_id"]: row for row in standings.table()}
+    assert rows["newcomer"]["points"] == 3
+    assert rows["alpha"]["losses"] == 1
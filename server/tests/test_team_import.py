@@ -0,0 +1,106 @@
+# server/tests/test_team_import.py
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from config.config import settings
+from services.team_import import ImportFormatError, ImportRow, _parse_rows, _validate, detect_format
+
+USERS = {name: f"id-{name}" for name in ("ann", "bob", "cat", "dan", "eve", "fay")}
+
+
+def upload(text: str, filename: str = "teams.csv") -> UploadFile:
+    return UploadFile(file=io.BytesIO(text.encode()), filename=filename)
+
+
+def row(line, name, leader, *members):
+    return ImportRow(line=line, name=name, leader=leader, members=list(members))
+
+
+def validate(rows, taken_names=(), registered=(), max_players=None, open_slots=None):
+    return _validate(rows, USERS, set(taken_names), set(registered), max_players, open_slots)
+
+
+def test_parses_csv_with_a_members_column():
+    rows = _parse_rows(upload("Team_Name,Leader,Members\nRed,ann,bob;cat\n\nBlue,dan,\n"), "csv")
+    assert [(r.line, r.name, r.leader, r.members) for r in rows] == [
+        (2, "Red", "ann", ["bob", "cat"]),
+        (4, "Blue", "dan", []),
+    ]
+
+
+def test_parses_csv_with_member_columns_and_a_bom():
+    rows = _parse_rows(upload("\ufeffname,leader,member_1,member_2\nRed,ann,bob,cat\n"), "csv")
+    assert rows[0].members == ["bob", "cat"]
+
+
+def test_csv_without_the_required_columns_is_rejected():
+    with pytest.raises(ImportFormatError):
+        _parse_rows(upload("team,captain\nRed,ann\n"), "csv")
+
+
+def test_parses_ndjson_and_flags_bad_lines():
+    text = '{"name": "Red", "leader": "ann", "members": ["bob"]}\nnot json\n\n{"team": "Blue", "leader": "dan"}\n'
+    rows = _parse_rows(upload(text, "teams.ndjson"), "ndjson")
+    assert [(r.line, r.name, r.error) for r in rows] == [(1, "Red", None), (2, "", "Not a JSON object."), (4, "Blue", None)]
+    assert rows[0].members == ["bob"]
+
+
+def test_stops_at_the_row_cap(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_IMPORT_ROWS", 3)
+    _parse_rows(upload("name,leader\n" + "".join(f"t{i},ann\n" for i in range(3))), "csv")
+    with pytest.raises(ImportFormatError):
+        _parse_rows(upload("name,leader\n" + "".join(f"t{i},ann\n" for i in range(4))), "csv")
+
+
+def test_detect_format():
+    assert detect_format(upload("", "teams.jsonl"), None) == "ndjson"
+    assert detect_format(upload("", "teams.csv"), None) == "csv"
+    assert detect_format(upload("", "teams.csv"), "ndjson") == "ndjson"
+
+
+def test_valid_rows_become_teams_with_the_leader_first():
+    teams, errors = validate([row(2, "Red", "ann", "bob", "ann"), row(3, "Blue", "cat")])
+    assert errors == []
+    assert teams == [
+        {"name": "Red", "leader_id": "id-ann", "member_ids": ["id-ann", "id-bob"]},
+        {"name": "Blue", "leader_id": "id-cat", "member_ids": ["id-cat"]},
+    ]
+
+
+def test_duplicate_names_are_rejected_case_insensitively():
+    teams, errors = validate([row(2, "RED", "ann"), row(3, "Blue", "bob"), row(4, "blue", "cat")], taken_names={"red"})
+    assert [t["name"] for t in teams] == ["Blue"]
+    assert [(e["line"], e["error"]) for e in errors] == [
+        (2, "A team with this name already exists in the tournament."),
+        (4, "Duplicate team name in the file."),
+    ]
+
+
+def test_players_can_only_be_in_one_team():
+    rows = [row(2, "Red", "ann", "bob"), row(3, "Blue", "cat", "bob"), row(4, "Green", "dan")]
+    teams, errors = validate(rows, registered={"id-dan"})
+    assert [t["name"] for t in teams] == ["Red"]
+    assert [e["line"] for e in errors] == [3, 4]
+    assert "bob" in errors[0]["error"] and "dan" in errors[1]["error"]
+
+
+def test_unknown_users_and_missing_fields():
+    rows = [row(2, "Red", "ann", "zed"), row(3, "", "bob"), row(4, "Blue", ""), ImportRow(line=5, name="", leader="", error="Not a JSON object.")]
+    teams, errors = validate(rows)
+    assert teams == []
+    assert [e["error"] for e in errors] == ["Unknown users: zed", "Missing team name.", "Missing team leader.", "Not a JSON object."]
+
+
+def test_roster_limit():
+    teams, errors = validate([row(2, "Red", "ann", "bob", "cat"), row(3, "Blue", "dan", "eve")], max_players=2)
+    assert [t["name"] for t in teams] == ["Blue"]
+    assert errors[0]["error"] == "Roster has 3 players; the limit is 2."
+
+
+def test_open_slots():
+    rows = [row(2, "Red", "ann"), row(3, "Blue", "bob"), row(4, "Green", "cat")]
+    teams, errors = validate(rows, open_slots=2)
+    assert [t["name"] for t in teams] == ["Red", "Blue"]
+    assert errors == [{"line": 4, "team": "Green", "error": "The tournament is full."}]
@@ -0,0 +1,103 @@
+# server/tests/test_token_verifier.py
+import asyncio
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from config.config import settings
+from utils.token_verifier import LocalTokenVerifier, RemoteVerificationRequired, TokenVerificationError
+
+SECRET = "test-jwt-secret-of-at-least-32-bytes"
+
+
+@pytest.fixture
+def verifier(monkeypatch):
+    monkeypatch.setattr(settings, "SUPABASE_JWT_SECRET", SECRET)
+    monkeypatch.setattr(settings, "AUTH_VERIFY_MODE", "local")
+    return LocalTokenVerifier()
+
+
+def claims(**overrides):
+    now = int(time.time())
+    base = {"sub": "user-1", "aud": settings.SUPABASE_JWT_AUDIENCE, "role": "authenticated",
+            "email": "player@example.com", "iat": now, "exp": now + 3600}
+    base.update(overrides)
+    return {k: v for k, v in base.items() if v is not None}
+
+
+def verify(verifier, token):
+    return asyncio.run(verifier.verify(token))
+
+
+def test_valid_token(verifier):
+    user = verify(verifier, jwt.encode(claims(), SECRET, algorithm="HS256"))
+    assert (user.id, user.email, user.role) == ("user-1", "player@example.com", "authenticated")
+    assert user.created_at is None
+
+
+def test_verified_tokens_are_cached_until_they_expire(verifier):
+    token = jwt.encode(claims(), SECRET, algorithm="HS256")
+    assert verify(verifier, token) is verify(verifier, token)
+
+    expired = jwt.encode(claims(exp=int(time.time()) - 1), SECRET, algorithm="HS256")
+    verifier.cache.put(expired, object(), expires_at=time.time() - 1)
+    assert verifier.cache.get(expired) is None
+
+
+@pytest.mark.parametrize("token_claims", [
+    claims(exp=int(time.time()) - 60),
+    claims(aud="someone-else"),
+    claims(sub=None),
+    claims(exp=None),
+], ids=["expired", "wrong audience", "no subject", "no expiry"])
+def test_rejected_claims(verifier, token_claims):
+    with pytest.raises(TokenVerificationError):
+        verify(verifier, jwt.encode(token_claims, SECRET, algorithm="HS256"))
+
+
+def test_bad_signature(verifier):
+    with pytest.raises(TokenVerificationError):
+        verify(verifier, jwt.encode(claims(), "another-secret-of-at-least-32-bytes", algorithm="HS256"))
+
+
+def test_claims_that_are_not_a_user_are_rejected(verifier):
+    with pytest.raises(TokenVerificationError):
+        verify(verifier, jwt.encode(claims(app_metadata="not an object"), SECRET, algorithm="HS256"))
+
+
+def test_unsupported_algorithm(verifier):
+    with pytest.raises(TokenVerificationError):
+        verify(verifier, jwt.encode(claims(), SECRET, algorithm="HS512"))
+
+
+def test_hs256_without_a_secret_needs_gotrue(verifier, monkeypatch):
+    monkeypatch.setattr(settings, "SUPABASE_JWT_SECRET", None)
+    with pytest.raises(RemoteVerificationRequired):
+        verify(verifier, jwt.encode(claims(), SECRET, algorithm="HS256"))
+
+
+def test_remembered_users_are_served_from_the_cache(verifier, monkeypatch):
+    monkeypatch.setattr(settings, "SUPABASE_JWT_SECRET", None)
+    token = jwt.encode(claims(), SECRET, algorithm="HS256")
+    user = object()
+    verifier.remember(token, user)
+    assert verify(verifier, token) is user
+
+
+def test_asymmetric_tokens_use_the_signing_keys(verifier):
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    verifier.jwks._keys = {"key-1": private_key.public_key()}
+    verifier.jwks._retry_at = float("inf")  # Never fetch in tests.
+
+    token = jwt.encode(claims(), private_key, algorithm="ES256", headers={"kid": "key-1"})
+    assert verify(verifier, token).id == "user-1"
+
+    unknown = jwt.encode(claims(), private_key, algorithm="ES256", headers={"kid": "key-2"})
+    with pytest.raises(TokenVerificationError):
+        verify(verifier, unknown)
+
+    forged = jwt.encode(claims(), ec.generate_private_key(ec.SECP256R1()), algorithm="ES256", headers={"kid": "key-1"})
+    with pytest.raises(TokenVerificationError):
+        verify(verifier, forged)
@@ -0,0 +1,296 @@
+# server/utils/background.py
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from config.config import settings
+from utils.metrics import Counter, Histogram, register
+
+logger = logging.getLogger(__name__)
+
+job_duration = register(Histogram("background_job_duration_seconds", "Time spent running background jobs, per attempt.", ("job",)))
+job_outcomes = register(Counter(
+    "background_jobs_total",
+    "Background job attempts by outcome: succeeded, retried, failed (out of attempts) or dropped (queue full).",
+    ("job", "outcome"),
+))
+
+# Job handlers by name. Jobs only carry the name and JSON-serializable arguments, so a
+# backlog can store them and a restarted worker can still find what to run.
+_handlers: Dict[str, Callable[..., Awaitable[None]]] = {}
+
+
+def task(name: str):
+    """Registers an async function as the handler of background jobs called `name`."""
+    def decorator(func):
+        _handlers[name] = func
+        return func
+    return decorator
+
+
+@dataclass
+class Job:
+    name: str
+    kwargs: dict
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    attempts: int = 0
+
+
+class Backlog:
+    """
+    Where queued jobs are recorded until they finish. This default keeps nothing, so jobs
+    still queued when a worker stops are lost; subclasses persist them and hand them back
+    at the next start.
+    """
+
+    def add(self, job: Job):
+        pass
+
+    def remove(self, job_id: str):
+        pass
+
+    def load(self) -> List[Job]:
+        return []
+
+    async def flush(self):
+        """Persists whatever add() and remove() have recorded so far."""
+
+
+class FileBacklog(Backlog):
+    """
+    An append-only JSON-lines file: one record when a job is queued and one when it is done.
+    load() replays the file, keeps the unfinished jobs and rewrites the file with only those.
+    Each worker process needs its own file.
+
+    add() and remove() only buffer their record; one writer task at a time appends the buffer
+    from a thread, so the event loop never waits on the disk and records land in order.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._buffer: List[str] = []
+        self._writer: Optional[asyncio.Task] = None
+
+    def _append(self, record: dict):
+        self._buffer.append(json.dumps(record, separators=(",", ":")) + "\n")
+        if self._writer is not None and not self._writer.done():
+            return
+        try:
+            self._writer = asyncio.get_running_loop().create_task(self._write_buffered())
+        except RuntimeError:
+            self._write(self._take_buffer())  # No loop to hand the write to.
+
+    def _take_buffer(self) -> List[str]:
+        lines, self._buffer = self._buffer, []
+        return lines
+
+    def _write(self, lines: List[str]):
+        if not lines:
+            return
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(lines))
+
+    async def _write_buffered(self):
+        # Records added while a write runs are picked up by the next pass.
+        while self._buffer:
+            try:
+                await asyncio.to_thread(self._write, self._take_buffer())
+            except OSError as e:
+                logger.error("Could not write the background backlog %s: %r", self.path, e)
+
+    async def flush(self):
+        if self._writer is not None:
+            await asyncio.shield(self._writer)
+        await self._write_buffered()
+
+    def add(self, job: Job):
+        self._append({"op": "add", "job": asdict(job)})
+
+    def remove(self, job_id: str):
+        self._append({"op": "done", "id": job_id})
+
+    def load(self) -> List[Job]:
+        if not os.path.exists(self.path):
+            return []
+        pending: Dict[str, Job] = {}
+        with self._lock:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # A line cut short by a crash.
+                    if record.get("op") == "add":
+                        job = Job(**record["job"])
+                        pending[job.id] = job
+                    elif record.get("op") == "done":
+                        pending.pop(record.get("id"), None)
+            with open(self.path, "w", encoding="utf-8") as f:
+                for job in pending.values():
+                    f.write(json.dumps({"op": "add", "job": asdict(job)}, separators=(",", ":")) + "\n")
+        return list(pending.values())
+
+
+class TaskQueue:
+    """
+    An in-process worker pool for side effects that should not hold up a response.
+
+    enqueue() returns at once; `workers` tasks take jobs off a queue bounded at `max_size`.
+    A job that raises or times out is retried up to `max_attempts` times with exponential
+    backoff and jitter; retries wait on a timer, not in a worker. Jobs are recorded in the
+    backlog until they succeed or run out of attempts, and drain() lets queued jobs finish
+    on shutdown.
+    """
+
+    def __init__(self, workers: int, max_size: int, max_attempts: int, retry_base_seconds: float,
+                 job_timeout: float, backlog: Optional[Backlog] = None):
+        self.workers = workers
+        self.max_size = max_size
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.job_timeout = job_timeout
+        self.backlog = backlog or Backlog()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._retries: Dict[str, asyncio.TimerHandle] = {}
+        self._accepting = False
+
+    @property
+    def started(self) -> bool:
+        return self._queue is not None
+
+    def start(self):
+        """Starts the workers on the running loop and re-queues jobs left in the backlog."""
+        if self.started:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._accepting = True
+        # Workers run in an empty context, so they do not inherit the scope of the request
+        # that happened to start them; their upstream calls are attributed to "background".
+        context = contextvars.Context()
+        self._worker_tasks = [
+            context.run(asyncio.create_task, self._worker(), name=f"background-worker-{i}")
+            for i in range(self.workers)
+        ]
+        recovered = self.backlog.load()
+        for job in recovered:
+            self._put(job, record=False)
+        if recovered:
+            logger.info("Re-queued %s background jobs from the backlog", len(recovered))
+
+    def enqueue(self, name: str, **kwargs) -> bool:
+        """
+        Queues a call of the `name` handler and returns immediately. Returns False, and logs,
+        if the queue is full or shutting down; callers treat the side effect as best effort.
+        """
+        if name not in _handlers:
+            raise ValueError(f"No background task is registered as '{name}'.")
+        if not self.started:
+            self.start()
+        if not self._accepting:
+            logger.warning("Background queue is draining; dropped job %s", name)
+            job_outcomes.inc((name, "dropped"))
+            return False
+        return self._put(Job(name=name, kwargs=kwargs))
+
+    def _put(self, job: Job, record: bool = True) -> bool:
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            logger.error("Background queue is full (%s jobs); dropped job %s", self.max_size, job.name)
+            job_outcomes.inc((job.name, "dropped"))
+            if not record:
+                # A job re-queued from the backlog; dropped, it must not be replayed at the next start.
+                self.backlog.remove(job.id)
+            return False
+        if record:
+            self.backlog.add(job)
+        return True
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        job.attempts += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(_handlers[job.name](**job.kwargs), self.job_timeout)
+        except Exception as e:
+            job_duration.observe((job.name,), time.perf_counter() - start)
+            if job.attempts < self.max_attempts:
+                delay = self.retry_base_seconds * 2 ** (job.attempts - 1) * random.uniform(0.5, 1.5)
+                logger.warning("Background job %s failed (attempt %s), retrying in %.1fs: %r", job.name, job.attempts, delay, e)
+                job_outcomes.inc((job.name, "retried"))
+                self._retries[job.id] = asyncio.get_running_loop().call_later(delay, self._retry, job)
+                return
+            logger.error("Background job %s failed after %s attempts: %r", job.name, job.attempts, e)
+            job_outcomes.inc((job.name, "failed"))
+        else:
+            job_duration.observe((job.name,), time.perf_counter() - start)
+            job_outcomes.inc((job.name, "succeeded"))
+        self.backlog.remove(job.id)
+
+    def _retry(self, job: Job):
+        self._retries.pop(job.id, None)
+        if self._queue.full():
+            # Wait for room rather than drop a job that has attempts left.
+            delay = self.retry_base_seconds * random.uniform(0.5, 1.5)
+            self._retries[job.id] = asyncio.get_running_loop().call_later(delay, self._retry, job)
+            return
+        self._put(job, record=False)
+
+    async def drain(self, timeout: float):
+        """
+        Stops accepting jobs and waits up to `timeout` seconds for the queued ones to finish.
+        Jobs still queued or waiting to retry after that stay in the backlog.
+        """
+        if not self.started:
+            return
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Background queue drain timed out with %s jobs left", self._queue.qsize())
+        for handle in self._retries.values():
+            handle.cancel()
+        if self._retries:
+            logger.warning("%s background jobs were waiting to retry at shutdown", len(self._retries))
+        for worker in self._worker_tasks:
+            worker.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        await self.backlog.flush()
+        self._queue, self._worker_tasks, self._retries = None, [], {}
+
+    def render(self) -> list:
+        """Queue depth gauges for /metrics."""
+        queued = self._queue.qsize() if self._queue is not None else 0
+        return [
+            "# TYPE background_jobs_queued gauge",
+            f"background_jobs_queued {queued}",
+            "# TYPE background_jobs_waiting_to_retry gauge",
+            f"background_jobs_waiting_to_retry {len(self._retries)}",
+        ]
+
+
+queue = register(TaskQueue(
+    workers=settings.BACKGROUND_WORKERS,
+    max_size=settings.BACKGROUND_QUEUE_SIZE,
+    max_attempts=settings.BACKGROUND_MAX_ATTEMPTS,
+    retry_base_seconds=settings.BACKGROUND_RETRY_BASE_SECONDS,
+    job_timeout=settings.BACKGROUND_JOB_TIMEOUT_SECONDS,
+    backlog=FileBacklog(settings.BACKGROUND_BACKLOG_PATH) if settings.BACKGROUND_BACKLOG_PATH else None,
+))
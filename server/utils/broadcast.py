@@ -0,0 +1,99 @@
+# server/utils/broadcast.py
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Dict, Set
+
+from config.config import settings
+from utils.metrics import Counter, register
+
+logger = logging.getLogger(__name__)
+
+events_published = register(Counter("live_events_published_total", "Events published to live channels.", ("event",)))
+subscribers_dropped = register(Counter("live_subscribers_dropped_total", "Live subscribers cut off for falling behind.", ()))
+
+# Sent to a subscriber whose queue overflowed; the client should re-fetch and reconnect.
+RESYNC_FRAME = b"event: resync\ndata: {}\n\n"
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+
+def encode_event(event: str, data: dict) -> bytes:
+    """Serializes an event as one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str, separators=(',', ':'))}\n\n".encode()
+
+
+class _Subscriber:
+    __slots__ = ("queue", "overflowed")
+
+    def __init__(self, max_queue: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+
+class BroadcastHub:
+    """
+    In-process fan-out of live updates, one channel per tournament.
+
+    Each event is serialized once and the same bytes are queued for every subscriber.
+    Queues are bounded: a subscriber that falls `max_queue` frames behind is not allowed
+    to hold memory or slow the publisher down; its backlog is dropped, it receives a
+    `resync` event and its stream ends, and the client reconnects and re-fetches.
+    Channels are per worker process, so writes handled by one worker reach the spectators
+    connected to that worker.
+    """
+
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self._channels: Dict[str, Set[_Subscriber]] = {}
+
+    def publish(self, channel, event: str, data: dict):
+        """Queues an event for every subscriber of `channel`. Never blocks."""
+        subscribers = self._channels.get(str(channel))
+        events_published.inc((event,))
+        if not subscribers:
+            return
+        frame = encode_event(event, data)
+        for subscriber in subscribers:
+            if subscriber.overflowed:
+                continue
+            try:
+                subscriber.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._overflow(subscriber)
+
+    def _overflow(self, subscriber: _Subscriber):
+        subscriber.overflowed = True
+        subscribers_dropped.inc(())
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(RESYNC_FRAME)
+
+    async def stream(self, channel) -> AsyncIterator[bytes]:
+        """Yields SSE frames for `channel` until the client disconnects or falls behind."""
+        channel = str(channel)
+        subscriber = _Subscriber(self.max_queue)
+        self._channels.setdefault(channel, set()).add(subscriber)
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscriber.queue.get(), timeout=settings.LIVE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection.
+                    yield KEEPALIVE_FRAME
+                    continue
+                yield frame
+                if frame is RESYNC_FRAME:
+                    return
+        finally:
+            subscribers = self._channels.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._channels[channel]
+
+    def subscriber_count(self, channel) -> int:
+        return len(self._channels.get(str(channel), ()))
+
+
+hub = BroadcastHub(max_queue=settings.LIVE_QUEUE_SIZE)
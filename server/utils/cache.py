@@ -0,0 +1,118 @@
+# server/utils/cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List
+
+# Sentinel returned by TTLCache.get() on a miss, so that falsy values can be cached.
+MISSING = object()
+
+# Every cache registers itself here so its counters can be reported in one place.
+_registry: List["TTLCache"] = []
+
+
+class TTLCache:
+    """
+    A small in-process cache with per-entry expiry and LRU eviction.
+    Hit, miss and eviction counters are kept so the cache can be sized from real traffic.
+    """
+
+    def __init__(self, name: str, max_size: int, ttl_seconds: float):
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def get(self, key: Hashable) -> Any:
+        """Returns the cached value for `key`, or MISSING."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float | None = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class ChangeClock:
+    """
+    Remembers when each of at most `max_keys` keys last changed, as ticks of one counter.
+    Data read at tick `t` is current while `changed_at(key) <= t`. A forgotten key reports the
+    latest tick forgotten so far, so forgetting only ever makes data look older than it is.
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self.now = 0
+        self._floor = 0
+        self._ticks: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def touch(self, key: Hashable) -> int:
+        """Records a change to `key` and returns its tick."""
+        with self._lock:
+            self.now += 1
+            self._ticks[key] = self.now
+            self._ticks.move_to_end(key)
+            while len(self._ticks) > self.max_keys:
+                _, tick = self._ticks.popitem(last=False)
+                self._floor = max(self._floor, tick)
+            return self.now
+
+    def touch_all(self):
+        """Records a change to every key, for writes whose key could not be determined."""
+        with self._lock:
+            self.now += 1
+            self._floor = self.now
+            self._ticks.clear()
+
+    def changed_at(self, key: Hashable) -> int:
+        with self._lock:
+            return self._ticks.get(key, self._floor)
+
+
+def cache_stats() -> List[dict]:
+    """Returns the counters of every cache in the process."""
+    return [cache.stats() for cache in _registry]
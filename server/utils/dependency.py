@@ -2,20 +2,29 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from services.auth import verify_user_token
+from services.authorization import OrganizerContext, load_organizer_context
 
 # This scheme tells FastAPI where to look for the token (in the Authorization header)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     """
     Dependency to get the current user from a token.
     It verifies the token and returns the user data.
     """
-    user = verify_user_token(token)
+    user = await verify_user_token(token)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found or invalid credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user
\ No newline at end of file
+    return user
+
+async def get_organizer_context(current_user = Depends(get_current_user)) -> OrganizerContext:
+    """
+    Dependency that loads the current user's organizer roles once per request.
+    FastAPI caches dependency results within a request, so every permission check
+    in the handler shares this one context.
+    """
+    return await load_organizer_context(current_user.id)
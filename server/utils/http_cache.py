@@ -0,0 +1,71 @@
+# server/utils/http_cache.py
+import hashlib
+import json
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+# Public pages may be stored by browsers and CDNs but must be revalidated on every visit;
+# with an ETag that revalidation is a 304 with an empty body.
+PUBLIC_REVALIDATE = "public, no-cache"
+
+# Content codings CompressionMiddleware may apply (utils/compression.py).
+CONTENT_CODINGS = ("br", "gzip")
+
+
+def make_etag(*parts) -> str:
+    """Builds a strong ETag from version markers such as an id and its updated_at."""
+    digest = hashlib.sha1(json.dumps(parts, default=str, separators=(",", ":")).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def body_etag(body: bytes) -> str:
+    """Builds a strong ETag from an already-serialized response body."""
+    return f'"{hashlib.sha1(body).hexdigest()[:32]}"'
+
+
+def if_none_match(request: Request) -> Optional[str]:
+    return request.headers.get("if-none-match")
+
+
+def encoded_etag(etag: str, coding: str) -> str:
+    """
+    The ETag of the same body sent with a content coding, e.g. "abc" -> "abc-gzip". Strong
+    validators must differ between codings (RFC 9110, 8.8.3); weak ones may be shared.
+    """
+    if etag.startswith("W/") or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{coding}"'
+
+
+def _identity_etag(etag: str) -> str:
+    etag = etag.strip().removeprefix("W/")
+    for coding in CONTENT_CODINGS:
+        suffix = f'-{coding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison, as RFC 9110 requires for If-None-Match. The ETag of a compressed copy
+    (see encoded_etag) matches the ETag of the body it was compressed from.
+    """
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(_identity_etag(candidate) == etag for candidate in header.split(","))
+
+
+def cache_headers(etag: str, cache_control: str = PUBLIC_REVALIDATE) -> dict:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str = PUBLIC_REVALIDATE):
+    response.headers.update(cache_headers(etag, cache_control))
+
+
+def not_modified(etag: str, cache_control: str = PUBLIC_REVALIDATE) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag, cache_control))
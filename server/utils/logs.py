@@ -0,0 +1,117 @@
+# server/utils/logs.py
+import logging
+import logging.handlers
+import queue
+import random
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import orjson
+
+from config.config import settings
+from utils.metrics import Counter, current_route, register
+
+records_dropped = register(Counter("log_records_dropped_total", "Log records dropped because the log queue was full.", ()))
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Loggers that uvicorn configures with their own handlers; they are pointed at the queue too.
+_UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+# httpx logs every upstream call at info level; that is what /metrics is for.
+_QUIET_LOGGERS = ("httpx", "httpcore")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the route of the request that logged it."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "route": getattr(record, "route", None),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class RouteSampler(logging.Filter):
+    """
+    Keeps a fraction of the info-level and lower events of each route, as set in `rates`
+    (route template -> fraction kept), and `default_rate` for the others. Warnings and
+    errors are always kept. Runs before the record is queued, so dropped events cost
+    almost nothing.
+    """
+
+    def __init__(self, rates: Dict[str, float], default_rate: float):
+        super().__init__()
+        self.rates = rates
+        self.default_rate = default_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.route = current_route()
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(record.route, self.default_rate)
+        return rate >= 1 or random.random() < rate
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread as they are. The standard QueueHandler formats
+    the message in the calling thread; here the arguments are only merged into the
+    message when the listener writes the record.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            records_dropped.inc(())
+
+
+def setup_logging():
+    """
+    Sends every log record through a bounded in-memory queue to a listener thread that
+    formats and writes it, so request handling never waits on log I/O. Safe to call twice.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(RouteSampler(settings.LOG_SAMPLE_RATES, settings.LOG_DEFAULT_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.LOG_LEVEL)
+    for name in _UVICORN_LOGGERS:
+        logger = logging.getLogger(name)
+        if logger.handlers:
+            logger.handlers = [handler]
+    for name in _QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    """Writes out the queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,242 @@
+# server/utils/metrics.py
+import bisect
+import inspect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from utils.cache import cache_stats
+
+# Latency buckets in seconds, shared by request and upstream histograms.
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# The ASGI scope of the request being handled. The router fills in scope["route"]
+# in place, so upstream calls can be attributed to the matched route template.
+_current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+
+
+def current_route() -> str:
+    """Returns the route template of the active request, e.g. "/tournaments/slug/{slug}"."""
+    scope = _current_scope.get()
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+class Histogram:
+    """A Prometheus-style histogram: cumulative buckets rendered from per-bucket counts."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, seconds: float):
+        index = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [bucket counts..., +Inf count, sum]
+                series = self._series[labels] = [0] * (len(BUCKETS) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += seconds
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in items:
+            base = _format_labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(BUCKETS, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            cumulative += series[len(BUCKETS)]
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{{{_format_labels(self.label_names, labels)}}} {value:g}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+# --- The metrics this server exposes ---
+
+http_requests = Counter("http_requests_total", "HTTP requests handled, by route and status.", ("method", "route", "status"))
+http_latency = Histogram("http_request_duration_seconds", "Time spent handling HTTP requests.", ("method", "route"))
+upstream_latency = Histogram("supabase_call_duration_seconds", "Time spent in Supabase calls, by calling route.", ("route", "kind", "target"))
+upstream_errors = Counter("supabase_call_errors_total", "Supabase calls that raised, by calling route.", ("route", "kind", "target"))
+
+_registry = [http_requests, http_latency, upstream_latency, upstream_errors]
+
+
+def register(metric):
+    """Adds a metric owned by another module to the /metrics output."""
+    _registry.append(metric)
+    return metric
+
+
+def _cache_lines() -> list:
+    lines = []
+    stats = cache_stats()
+    for field, kind in (("hits", "counter"), ("misses", "counter"), ("evictions", "counter"), ("size", "gauge")):
+        name = f"cache_{field}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f'{name}{{cache="{_escape(s["name"])}"}} {s[field]}' for s in stats)
+    return lines
+
+
+def render_metrics() -> str:
+    """Renders every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    lines.extend(_cache_lines())
+    return "\n".join(lines) + "\n"
+
+
+# --- Upstream call timing ---
+
+async def timed(awaitable, kind: str, target: str):
+    """Awaits an upstream call and records its duration against the active route."""
+    route = current_route()
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    except BaseException:
+        upstream_errors.inc((route, kind, target))
+        raise
+    finally:
+        upstream_latency.observe((route, kind, target), time.perf_counter() - start)
+
+
+class _Traced:
+    """
+    Wraps a Supabase request builder or sub-client. Builder chains stay wrapped, and
+    every awaitable they produce (execute(), storage and auth calls) is timed.
+    """
+    __slots__ = ("_target", "_kind", "_name")
+
+    def __init__(self, target, kind: str, name: str):
+        self._target = target
+        self._kind = kind
+        self._name = name
+
+    def _wrap(self, value):
+        if inspect.isawaitable(value):
+            return timed(value, self._kind, self._name)
+        if hasattr(value, "execute") or hasattr(value, "upload"):
+            return _Traced(value, self._kind, self._name)
+        return value
+
+    def __getattr__(self, attr):
+        value = getattr(self._target, attr)
+        if not callable(value):
+            return self._wrap(value)
+
+        def call(*args, **kwargs):
+            return self._wrap(value(*args, **kwargs))
+        return call
+
+
+class InstrumentedClient:
+    """Wraps the async Supabase client so every upstream call is timed per route."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def table(self, name: str):
+        return _Traced(self._client.table(name), "rest", name)
+
+    def from_(self, name: str):
+        return self.table(name)
+
+    def rpc(self, fn: str, params: Optional[dict] = None, *args, **kwargs):
+        return _Traced(self._client.rpc(fn, params, *args, **kwargs), "rpc", fn)
+
+    @property
+    def storage(self):
+        return _StorageProxy(self._client.storage)
+
+    @property
+    def auth(self):
+        return _Traced(self._client.auth, "auth", "auth")
+
+    def __getattr__(self, attr):
+        return getattr(self._client, attr)
+
+
+class _StorageProxy:
+    __slots__ = ("_storage",)
+
+    def __init__(self, storage):
+        self._storage = storage
+
+    def from_(self, bucket: str):
+        return _Traced(self._storage.from_(bucket), "storage", bucket)
+
+    def __getattr__(self, attr):
+        return getattr(self._storage, attr)
+
+
+# --- ASGI middleware ---
+
+class MetricsMiddleware:
+    """Records per-route latency and status counts, and exposes the request scope to upstream timers."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _current_scope.set(scope)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = current_route()
+            http_latency.observe((scope["method"], route), time.perf_counter() - start)
+            http_requests.inc((scope["method"], route, status_code))
+            _current_scope.reset(token)
@@ -0,0 +1,21 @@
+# server/utils/pagination.py
+import base64
+import json
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(row: dict) -> str:
+    """Builds an opaque keyset cursor pointing just past `row`, from its (created_at, id)."""
+    raw = json.dumps([row['created_at'], row['id']]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Reads a cursor produced by encode_cursor; a malformed one is a 400."""
+    try:
+        created_at, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(created_at), str(UUID(str(last_id)))
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor.")
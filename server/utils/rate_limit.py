@@ -0,0 +1,157 @@
+# server/utils/rate_limit.py
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+from starlette.responses import JSONResponse
+
+from config.config import settings
+from utils.dependency import get_current_user
+from utils.metrics import Counter, register
+
+rate_limited = register(Counter("rate_limited_total", "Requests rejected by a per-client rate limit.", ("policy", "route")))
+admission_rejected = register(Counter("admission_rejected_total", "Requests shed because too many were already in flight.", ()))
+admission_queued = register(Counter("admission_queued_total", "Requests that waited for a free slot before being admitted.", ()))
+
+
+class TokenBucketLimiter:
+    """
+    One token bucket per key: a client may make `burst` requests at once and then
+    `rate_per_second` on average. Buckets are refilled lazily when they are touched, so
+    a check is O(1) and idle clients cost nothing. At most `max_keys` buckets are kept;
+    the least recently used are dropped first, and a dropped bucket would have been full.
+    """
+
+    def __init__(self, rate_per_second: float, burst: int, max_keys: int):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[tuple, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: tuple) -> float:
+        """Takes a token for `key`. Returns 0 when allowed, else the seconds until a token is available."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now]
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                tokens, last = bucket
+                bucket[0] = min(float(self.burst), tokens + (now - last) * self.rate_per_second)
+                bucket[1] = now
+                self._buckets.move_to_end(key)
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / self.rate_per_second
+
+
+# Policies shared by the routes that use them; each route still gets its own budget per client.
+_limiters: Dict[str, TokenBucketLimiter] = {
+    "search": TokenBucketLimiter(settings.RATE_LIMIT_SEARCH_PER_MINUTE / 60, settings.RATE_LIMIT_SEARCH_BURST,
+                                 settings.RATE_LIMIT_MAX_CLIENTS),
+    "auth": TokenBucketLimiter(settings.RATE_LIMIT_AUTH_PER_MINUTE / 60, settings.RATE_LIMIT_AUTH_BURST,
+                               settings.RATE_LIMIT_MAX_CLIENTS),
+}
+
+
+def client_ip(request: Request) -> str:
+    """The caller's address; the first X-Forwarded-For hop only when the proxy in front is trusted."""
+    if settings.TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def _check(policy: str, request: Request, client: str):
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    route = getattr(request.scope.get("route"), "path", request.url.path)
+    retry_after = _limiters[policy].acquire((route, client))
+    if retry_after:
+        rate_limited.inc((policy, route))
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests. Please slow down.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+def rate_limit(policy: str, per_user: bool = False):
+    """
+    Returns a dependency that charges the request to the caller's bucket of `policy`.
+    Public routes are keyed by client IP; with `per_user` the route's authenticated user
+    is the key instead, so users behind one NAT do not share a budget. FastAPI resolves
+    get_current_user once per request, so the handler reuses the same user.
+    """
+    if per_user:
+        async def limit_user(request: Request, current_user=Depends(get_current_user)):
+            _check(policy, request, f"user:{current_user.id}")
+        return limit_user
+
+    async def limit_ip(request: Request):
+        _check(policy, request, f"ip:{client_ip(request)}")
+    return limit_ip
+
+
+class AdmissionControlMiddleware:
+    """
+    Caps the requests a worker handles at once. Past `max_concurrent`, a request waits up
+    to `queue_timeout` seconds for a slot and is then shed with a 503 and Retry-After,
+    so overload turns into fast rejections instead of every request queueing on the
+    upstream connection pool. Long-lived event streams and /metrics are not counted.
+    """
+
+    def __init__(self, app, max_concurrent: int, queue_timeout: float, retry_after: int = 1,
+                 exempt_paths: Tuple[str, ...] = ("/", "/metrics"), exempt_suffixes: Tuple[str, ...] = ("/live",)):
+        self.app = app
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.exempt_paths = set(exempt_paths)
+        self.exempt_suffixes = exempt_suffixes
+        self._slots = asyncio.Semaphore(max_concurrent)
+
+    def _exempt(self, scope) -> bool:
+        path = scope["path"]
+        return scope["method"] == "OPTIONS" or path in self.exempt_paths or path.endswith(self.exempt_suffixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._exempt(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if not await self._admit():
+            admission_rejected.inc(())
+            response = JSONResponse(
+                {"detail": "The server is busy. Please retry shortly."},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._slots.release()
+
+    async def _admit(self) -> bool:
+        if not self._slots.locked():
+            await self._slots.acquire()
+            return True
+        admission_queued.inc(())
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
@@ -0,0 +1,32 @@
+# server/utils/responses.py
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(obj: Any):
+    # Pydantic models such as the gotrue User; plain rows, UUIDs and datetimes are native to orjson.
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dump_json(content: Any) -> bytes:
+    """Serializes `content` exactly as FastJSONResponse does, for bodies built ahead of a request."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    A JSON response rendered by orjson.
+
+    Routes that return rows straight from Supabase (lists of dicts) return this response
+    themselves instead of declaring response_model=List[dict]: FastAPI then skips validating
+    every row and the jsonable_encoder pass, and the body is encoded in one native call.
+    Routes with a typed response_model keep FastAPI's default path, which already serializes
+    through pydantic-core.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
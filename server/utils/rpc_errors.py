@@ -0,0 +1,28 @@
+# server/utils/rpc_errors.py
+from typing import Dict, Tuple
+
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+
+# Exceptions raised by the SQL functions in sql/, by message, mapped to (status code, detail).
+# Each service registers the codes of the functions it calls; a code means the same thing
+# wherever it is raised, so registering it twice with another response is an error.
+_errors: Dict[str, Tuple[int, str]] = {}
+
+
+def register_rpc_errors(errors: Dict[str, Tuple[int, str]]):
+    for code, response in errors.items():
+        existing = _errors.setdefault(code, response)
+        if existing != response:
+            raise ValueError(f"RPC error {code} is already mapped to {existing}.")
+
+
+def raise_for_rpc_error(e: APIError):
+    """Turns a registered RPC exception into the matching HTTPException; returns for any other error."""
+    known = _errors.get(e.message)
+    if known is None:
+        return
+    status_code, detail = known
+    if e.details:
+        detail = f"{detail} Conflicts: {e.details}"
+    raise HTTPException(status_code=status_code, detail=detail)
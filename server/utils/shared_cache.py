@@ -0,0 +1,176 @@
+# server/utils/shared_cache.py
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Hashable, List, Optional
+
+import orjson
+
+from utils.cache import TTLCache, MISSING
+
+logger = logging.getLogger(__name__)
+
+# Every shared store opened by a cache, so the lifespan can close their connections.
+_stores: List["SharedStore"] = []
+
+
+class SharedStore(ABC):
+    """The few Redis commands a shared cache tier needs: GET, SET with expiry (optionally NX) and DEL."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl_seconds: float, only_if_absent: bool = False):
+        ...
+
+    @abstractmethod
+    async def delete(self, *keys: str):
+        ...
+
+    async def close(self):
+        pass
+
+
+class MemoryStore(SharedStore):
+    """
+    An in-process stand-in for Redis with the same semantics, for development and the
+    benchmarks. It is not shared between processes.
+    """
+
+    def __init__(self):
+        self._entries: dict = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float, only_if_absent: bool = False):
+        if only_if_absent and await self.get(key) is not None:
+            return
+        self._entries[key] = (value, time.monotonic() + ttl_seconds)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key, None)
+
+
+class RedisStore(SharedStore):
+    """A Redis-compatible server (Redis, Valkey, KeyDB, ...) through redis-py's asyncio client."""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+        self._client = redis.Redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float, only_if_absent: bool = False):
+        await self._client.set(key, value, ex=max(1, int(ttl_seconds)), nx=only_if_absent)
+
+    async def delete(self, *keys: str):
+        await self._client.delete(*keys)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def open_store(url: Optional[str]) -> Optional[SharedStore]:
+    """
+    Opens the store named by `url`: memory:// for the in-process stand-in, or a redis:// URL.
+    Returns None when no URL is set, or when the optional `redis` package is not installed.
+    """
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        store = MemoryStore()
+    else:
+        try:
+            store = RedisStore(url)
+        except ImportError:
+            logger.warning("A shared cache URL is set but the redis package is not installed; using the in-process tier only.")
+            return None
+    _stores.append(store)
+    return store
+
+
+async def close_stores():
+    for store in _stores:
+        await store.close()
+
+
+class TwoTierCache:
+    """
+    A read-through cache with a small in-process LRU in front of an optional shared store.
+
+    Lookups try the local tier, then the shared one, and copy shared hits into the local
+    tier. Writes go to both. Deletes clear both, so the other workers see them as soon as
+    their short-lived local copies expire. Values must be JSON-serializable. None records a
+    miss and is kept for `none_ttl_seconds`, in the shared tier only: a write on any worker
+    replaces it there at once, while a local copy would hide the write from this worker until
+    it expired. A miss never replaces a value, so a read that raced with a write on another
+    worker cannot hide it either. Without a shared tier, misses are not cached. The shared tier is an
+    optimization: when it errors, the cache behaves as if it missed.
+    """
+
+    def __init__(self, name: str, max_size: int, ttl_seconds: float, shared: Optional[SharedStore] = None,
+                 shared_ttl_seconds: float = 300, none_ttl_seconds: Optional[float] = None):
+        self.name = name
+        self.local = TTLCache(name=name, max_size=max_size, ttl_seconds=ttl_seconds)
+        self.shared = shared
+        self.shared_ttl_seconds = shared_ttl_seconds
+        self.none_ttl_seconds = none_ttl_seconds
+
+    def _shared_key(self, key: Hashable) -> str:
+        return f"{self.name}:{key}"
+
+    async def get(self, key: Hashable) -> Any:
+        """Returns the cached value for `key`, or MISSING."""
+        value = self.local.get(key)
+        if value is not MISSING or self.shared is None:
+            return value
+        try:
+            raw = await self.shared.get(self._shared_key(key))
+        except Exception as e:
+            logger.warning("Shared cache %s read failed: %s", self.name, e)
+            return MISSING
+        if raw is None:
+            return MISSING
+        value = orjson.loads(raw)
+        if value is not None:
+            self.local.set(key, value)
+        return value
+
+    async def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Caches `value` in both tiers; `ttl_seconds` overrides both tiers' TTL."""
+        if value is None:
+            self.local.delete(key)
+            if self.shared is None:
+                return
+            ttl_seconds = ttl_seconds or self.none_ttl_seconds
+        else:
+            self.local.set(key, value, ttl_seconds)
+        if self.shared is None:
+            return
+        try:
+            await self.shared.set(self._shared_key(key), orjson.dumps(value), ttl_seconds or self.shared_ttl_seconds,
+                                  only_if_absent=value is None)
+        except Exception as e:
+            logger.warning("Shared cache %s write failed: %s", self.name, e)
+
+    async def delete(self, *keys: Hashable):
+        for key in keys:
+            self.local.delete(key)
+        if self.shared is None or not keys:
+            return
+        try:
+            await self.shared.delete(*(self._shared_key(k) for k in keys))
+        except Exception as e:
+            logger.warning("Shared cache %s delete failed: %s", self.name, e)
@@ -0,0 +1,123 @@
+# server/utils/single_flight.py
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+from utils.metrics import Counter, register
+
+coalesced_calls = register(Counter(
+    "single_flight_calls_total",
+    "Reads passed through a single-flight group; role=shared ones reused another caller's upstream call.",
+    ("group", "role"),
+))
+
+# Every group registers itself here so its counters can be reported in one place.
+_registry: List["SingleFlight"] = []
+
+
+class _SyncCall:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical reads into one upstream call.
+
+    The first caller for a key runs the call; everyone who asks for the same key while it
+    is in flight waits for it and receives the same result, or the same exception. Nothing
+    is kept once the call completes, so this complements the TTL caches rather than
+    replacing them. Callers share one result object and must not mutate it.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.leaders = 0
+        self.shared = 0
+        # Keyed by (event loop, key): a task can only be awaited from the loop running it.
+        self._tasks: Dict[tuple, asyncio.Task] = {}
+        self._calls: Dict[Hashable, _SyncCall] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    async def do(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Awaits `func(*args, **kwargs)`, or the identical call already in flight for `key`."""
+        flight_key = (asyncio.get_running_loop(), key)
+        task = self._tasks.get(flight_key)
+        if task is None:
+            # The call runs as its own task, so a caller that goes away (a client disconnect
+            # cancels its request) does not cancel the call for the others.
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._tasks[flight_key] = task
+            task.add_done_callback(lambda t: self._finish(flight_key, t))
+            self._count("leader")
+        else:
+            self._count("shared")
+        return await asyncio.shield(task)
+
+    def _finish(self, flight_key: tuple, task: asyncio.Task):
+        if self._tasks.get(flight_key) is task:
+            del self._tasks[flight_key]
+        # Mark the exception as retrieved in case every waiter was cancelled.
+        if not task.cancelled():
+            task.exception()
+
+    def do_sync(self, key: Hashable, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """The same for blocking callers: threads asking for `key` at once share one call of `func`."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _SyncCall()
+        self._count("leader" if leader else "shared")
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = func(*args, **kwargs)
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    if self._calls.get(key) is call:
+                        del self._calls[key]
+                call.done.set()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def forget(self, key: Hashable):
+        """Makes the next caller for `key` start a fresh call, e.g. after the data was written."""
+        for flight_key in [k for k in self._tasks if k[1] == key]:
+            del self._tasks[flight_key]
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def _count(self, role: str):
+        with self._lock:
+            if role == "leader":
+                self.leaders += 1
+            else:
+                self.shared += 1
+        coalesced_calls.inc((self.name, role))
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = self.leaders + self.shared
+            return {
+                "name": self.name,
+                "in_flight": len(self._tasks) + len(self._calls),
+                "upstream_calls": self.leaders,
+                "shared": self.shared,
+                "shared_ratio": round(self.shared / calls, 4) if calls else 0.0,
+            }
+
+
+def single_flight_stats() -> List[dict]:
+    """Returns the counters of every single-flight group in the process."""
+    return [group.stats() for group in _registry]
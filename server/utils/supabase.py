@@ -1,12 +1,136 @@
 # server/utils/supabase.py
-from supabase import create_client, Client
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Optional
+
+import httpx
 from config.config import settings
+from utils.metrics import InstrumentedClient
+
+if TYPE_CHECKING:
+    from supabase import AsyncClient, Client
+
+logger = logging.getLogger(__name__)
+
+# The clients are built by the FastAPI lifespan (init_clients), not at import time, so
+# importing the app stays cheap and nothing connects to Supabase until a worker starts.
+_http_client: Optional[httpx.AsyncClient] = None
+_async_client: Optional[InstrumentedClient] = None
+_sync_client: Optional["Client"] = None
+# False when the transport was injected with set_async_client (e.g. by the benchmarks).
+_owns_clients = False
+
+
+def _http2_enabled() -> bool:
+    if not settings.SUPABASE_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("SUPABASE_HTTP2 is set but the h2 package is not installed; using HTTP/1.1.")
+        return False
+    return True
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=_http2_enabled(),
+        limits=httpx.Limits(
+            max_connections=settings.SUPABASE_POOL_SIZE,
+            max_keepalive_connections=settings.SUPABASE_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(
+            settings.SUPABASE_READ_TIMEOUT_SECONDS,
+            connect=settings.SUPABASE_CONNECT_TIMEOUT_SECONDS,
+            pool=settings.SUPABASE_POOL_TIMEOUT_SECONDS,
+        ),
+    )
+
+
+def _build_async_client(http_client: httpx.AsyncClient) -> InstrumentedClient:
+    from supabase import AsyncClient, AsyncClientOptions
+
+    return InstrumentedClient(AsyncClient(
+        supabase_url=settings.SUPABASE_URL,
+        supabase_key=settings.SUPABASE_KEY,
+        options=AsyncClientOptions(httpx_client=http_client),
+    ))
+
+
+def init_clients():
+    """Builds the pooled HTTP transport and the async Supabase client, unless they were injected."""
+    global _http_client, _async_client, _owns_clients
+    if _http_client is None:
+        _http_client = _build_http_client()
+        _owns_clients = True
+    if _async_client is None:
+        _async_client = _build_async_client(_http_client)
+        logger.info("Supabase client initialized for %s", settings.SUPABASE_URL)
+
+
+async def warm_up():
+    """
+    Opens upstream connections before the worker takes traffic, so the first requests after
+    a deploy do not pay for DNS and TLS handshakes. Over HTTP/2 one connection carries every
+    request; over HTTP/1.1 SUPABASE_WARMUP_CONNECTIONS connections are opened in parallel.
+    Failures are only logged: a cold pool is slower, not broken.
+    """
+    if not _owns_clients:
+        return
+    client = get_http_client()
+    url = f"{settings.SUPABASE_URL}/auth/v1/health"
+    headers = {"apikey": settings.SUPABASE_KEY}
+    connections = 1 if _http2_enabled() else max(1, settings.SUPABASE_WARMUP_CONNECTIONS)
+    results = await asyncio.gather(*(client.get(url, headers=headers) for _ in range(connections)), return_exceptions=True)
+    failures = [r for r in results if isinstance(r, Exception)]
+    if failures:
+        logger.warning("Supabase warm-up: %s of %s connections failed: %s", len(failures), connections, failures[0])
+    else:
+        logger.info("Supabase warm-up opened %s connection(s)", connections)
+
+
+async def close_clients():
+    """Closes the pooled connections on shutdown."""
+    global _http_client, _async_client, _owns_clients
+    if _owns_clients and _http_client is not None:
+        await _http_client.aclose()
+        _http_client, _async_client, _owns_clients = None, None, False
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Returns the pooled httpx.AsyncClient shared by every upstream call to Supabase."""
+    if _http_client is None:
+        init_clients()
+    return _http_client
+
+
+def get_async_client() -> "AsyncClient":
+    """
+    Returns the shared async Supabase client.
+    PostgREST, Storage and Auth calls all go through one pooled httpx.AsyncClient,
+    so a single worker can keep many upstream requests in flight. The client is
+    wrapped so every call is timed against the route that made it (see /metrics).
+    Outside the app (scripts, a shell) it is built on first use.
+    """
+    if _async_client is None:
+        init_clients()
+    return _async_client
+
+
+def get_sync_client() -> "Client":
+    """Returns a synchronous client for scripts and one-off maintenance tasks; the API never uses it."""
+    global _sync_client
+    if _sync_client is None:
+        from supabase import create_client
+        _sync_client = create_client(supabase_url=settings.SUPABASE_URL, supabase_key=settings.SUPABASE_KEY)
+    return _sync_client
+
 
-# Initialize the Supabase client
-print(f'supabase url: {settings.SUPABASE_URL}')
-print(f'supabase key: {settings.SUPABASE_KEY}')
-supabase_client: Client = create_client(
-    supabase_url=settings.SUPABASE_URL,
-    supabase_key=settings.SUPABASE_KEY
-)
-print("Supabase client initialized with URL:", settings.SUPABASE_URL)
\ No newline at end of file
+def set_async_client(client, http_client: Optional[httpx.AsyncClient] = None):
+    """Replaces the shared clients, e.g. with the in-memory stand-in used by the benchmarks."""
+    global _async_client, _http_client, _owns_clients
+    _async_client = InstrumentedClient(client)
+    if http_client is not None:
+        _http_client = http_client
+    _owns_clients = False
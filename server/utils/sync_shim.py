@@ -0,0 +1,28 @@
+# server/utils/sync_shim.py
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Optional
+
+# The service layer is async. Scripts that are not running an event loop can use
+# run_sync() to call it; every call runs on one long-lived background loop so the
+# pooled async client is always used from the same loop.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="sync-shim-loop", daemon=True).start()
+    return _loop
+
+
+def run_sync(func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+    """
+    Runs an async service function from synchronous code and returns its result.
+    Example: run_sync(users.get_user_profile, user_id)
+    """
+    future = asyncio.run_coroutine_threadsafe(func(*args, **kwargs), _get_loop())
+    return future.result()
@@ -0,0 +1,229 @@
+# server/utils/token_verifier.py
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+import jwt
+from gotrue import User
+from pydantic import ValidationError
+
+from config.config import settings
+from utils.single_flight import SingleFlight
+from utils.supabase import get_http_client
+
+logger = logging.getLogger(__name__)
+
+# Asymmetric algorithms Supabase signing keys may use.
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256", "EdDSA"]
+# Never hammer the JWKS endpoint more than this often when an unknown `kid` shows up.
+JWKS_MIN_REFRESH_SECONDS = 30
+# First retry delay after a failed JWKS fetch; it doubles with every failure, up to the refresh interval.
+JWKS_RETRY_BASE_SECONDS = 1
+
+
+class TokenVerificationError(Exception):
+    """Raised when a token cannot be verified locally."""
+
+
+class RemoteVerificationRequired(Exception):
+    """Raised for tokens only GoTrue can verify: HS256 tokens when SUPABASE_JWT_SECRET is not set."""
+
+
+class JWKSCache:
+    """
+    Keeps the project's public signing keys in memory. refresh_periodically() reloads them on
+    a schedule in the background, so requests are served from the keys already loaded and
+    never wait on the JWKS endpoint. A token signed with an unknown key triggers one shared
+    refresh, at most every JWKS_MIN_REFRESH_SECONDS. A failed fetch keeps the previous keys and
+    the next attempt backs off exponentially, so an outage of the endpoint is not retried by
+    every request.
+    """
+
+    def __init__(self, url: str, refresh_seconds: int):
+        self.url = url
+        self.refresh_seconds = refresh_seconds
+        self._keys: dict = {}
+        self._failures = 0
+        # Earliest time an unknown `kid` may trigger another fetch.
+        self._retry_at = 0.0
+        self._flight = SingleFlight("jwks")
+
+    async def refresh(self):
+        """Fetches the key set now; concurrent callers share one fetch."""
+        await self._flight.do(self.url, self._fetch)
+
+    async def _fetch(self):
+        try:
+            response = await get_http_client().get(self.url, headers={"apikey": settings.SUPABASE_KEY}, timeout=5)
+            response.raise_for_status()
+            jwks = response.json().get("keys", [])
+        except Exception as e:
+            self._failures += 1
+            delay = self._retry_delay()
+            self._retry_at = time.monotonic() + delay
+            logger.warning("Could not refresh JWKS from %s, retrying in %.0fs: %s", self.url, delay, e)
+            return
+
+        keys = {}
+        for jwk in jwks:
+            try:
+                keys[jwk.get("kid")] = jwt.PyJWK(jwk).key
+            except jwt.PyJWTError as e:
+                logger.warning("Skipping unusable JWK %s: %s", jwk.get('kid'), e)
+        self._keys = keys
+        self._failures = 0
+        self._retry_at = time.monotonic() + JWKS_MIN_REFRESH_SECONDS
+        logger.info("Loaded %s signing keys from %s", len(keys), self.url)
+
+    def _retry_delay(self) -> float:
+        return min(self.refresh_seconds, JWKS_RETRY_BASE_SECONDS * 2 ** (self._failures - 1))
+
+    async def refresh_periodically(self):
+        """Reloads the key set every `refresh_seconds`, or sooner after a failed fetch."""
+        while True:
+            await asyncio.sleep(self._retry_delay() if self._failures else self.refresh_seconds)
+            await self.refresh()
+
+    async def get_key(self, kid: Optional[str]):
+        """Returns the public key for `kid`, fetching the key set first if the key is unknown."""
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() >= self._retry_at:
+            await self.refresh()
+            key = self._keys.get(kid)
+        if key is None:
+            raise TokenVerificationError(f"Unknown signing key: {kid}")
+        return key
+
+
+class VerifiedTokenCache:
+    """A bounded LRU of tokens that already passed verification, kept until they expire."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return user
+
+    def put(self, token: str, user: User, expires_at: float):
+        with self._lock:
+            self._entries[token] = (user, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+class TokenUser(User):
+    """A gotrue `User` built from access-token claims, which do not carry the account creation time."""
+    created_at: Optional[datetime] = None
+
+
+def _user_from_claims(claims: dict) -> User:
+    """Builds the gotrue `User` the routes expect from the token claims."""
+    return TokenUser(
+        id=claims["sub"],
+        aud=claims.get("aud") if isinstance(claims.get("aud"), str) else settings.SUPABASE_JWT_AUDIENCE,
+        role=claims.get("role"),
+        email=claims.get("email"),
+        phone=claims.get("phone"),
+        app_metadata=claims.get("app_metadata") or {},
+        user_metadata=claims.get("user_metadata") or {},
+        is_anonymous=claims.get("is_anonymous", False),
+    )
+
+
+class LocalTokenVerifier:
+    """Verifies Supabase access tokens without a round trip to GoTrue."""
+
+    def __init__(self):
+        self.jwks = JWKSCache(
+            url=f"{settings.SUPABASE_URL}/auth/v1/.well-known/jwks.json",
+            refresh_seconds=settings.JWKS_REFRESH_SECONDS,
+        )
+        self.cache = VerifiedTokenCache(max_size=settings.TOKEN_CACHE_SIZE)
+
+    def _uses_jwks(self) -> bool:
+        # Without an HS256 secret, every locally verified token is checked against the JWKS.
+        return settings.AUTH_VERIFY_MODE == "local" and not settings.SUPABASE_JWT_SECRET
+
+    async def warm_up(self):
+        """Fetches the signing keys ahead of the first request, when tokens are verified against them."""
+        if not self._uses_jwks():
+            return
+        logger.warning("SUPABASE_JWT_SECRET is not set: HS256 tokens will be verified by GoTrue on every request.")
+        await self.jwks.refresh()
+
+    def start_key_refresh(self) -> Optional[asyncio.Task]:
+        """Starts the scheduled JWKS refresh on the running loop; the caller cancels it on shutdown."""
+        if not self._uses_jwks():
+            return None
+        return asyncio.create_task(self.jwks.refresh_periodically())
+
+    async def verify(self, token: str) -> User:
+        """
+        Returns the `User` for a valid token or raises TokenVerificationError. Raises
+        RemoteVerificationRequired for HS256 tokens when no secret is configured.
+        """
+        user = self.cache.get(token)
+        if user is not None:
+            return user
+
+        try:
+            header = jwt.get_unverified_header(token)
+            alg = header.get("alg")
+            if alg == "HS256":
+                if not settings.SUPABASE_JWT_SECRET:
+                    raise RemoteVerificationRequired()
+                key, algorithms = settings.SUPABASE_JWT_SECRET, ["HS256"]
+            elif alg in ASYMMETRIC_ALGORITHMS:
+                key, algorithms = await self.jwks.get_key(header.get("kid")), [alg]
+            else:
+                raise TokenVerificationError(f"Unsupported token algorithm: {alg}")
+
+            claims = jwt.decode(
+                token,
+                key=key,
+                algorithms=algorithms,
+                audience=settings.SUPABASE_JWT_AUDIENCE,
+                options={"require": ["exp", "sub"]},
+            )
+        except jwt.PyJWTError as e:
+            raise TokenVerificationError(str(e))
+
+        try:
+            user = _user_from_claims(claims)
+        except ValidationError as e:
+            # A validly signed token whose claims do not describe a user, e.g. a non-object app_metadata.
+            raise TokenVerificationError(f"Unexpected token claims: {e.error_count()} invalid")
+        self.cache.put(token, user, expires_at=claims["exp"])
+        return user
+
+    def remember(self, token: str, user: User):
+        """
+        Caches a user GoTrue has just verified the token of, until the token expires, so the
+        next requests with it are served like locally verified ones.
+        """
+        try:
+            # GoTrue checked the signature; only the expiry is read here.
+            claims = jwt.decode(token, options={"verify_signature": False})
+        except jwt.PyJWTError:
+            return
+        if isinstance(claims.get("exp"), (int, float)):
+            self.cache.put(token, user, expires_at=claims["exp"])
+
+
+token_verifier = LocalTokenVerifier()
@@ -0,0 +1,190 @@
+# server/utils/uploads.py
+import logging
+import re
+from typing import AsyncIterator, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile, status
+from starlette.responses import JSONResponse
+
+from config.config import settings
+from utils.background import task
+from utils.metrics import timed
+from utils.supabase import get_async_client, get_http_client
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+# Room for the multipart boundary and part headers around the file itself.
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+# The routes that take an image upload: tournament banners and avatars.
+UPLOAD_PATHS = (r"/tournaments/[^/]+/image", r"/users/profile/avatar")
+# The team import route, capped at MAX_IMPORT_BYTES instead (services/team_import.py).
+IMPORT_PATHS = (r"/teams/tournaments/[^/]+/import",)
+
+# Magic bytes of the image formats we accept, with the content type and extension to store them under.
+_IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    (b"\xff\xd8\xff", "image/jpeg", ".jpg"),
+    (b"GIF87a", "image/gif", ".gif"),
+    (b"GIF89a", "image/gif", ".gif"),
+]
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".gif", ".webp")
+
+
+class UploadTooLarge(Exception):
+    """Raised while streaming once the upload passes MAX_UPLOAD_BYTES."""
+
+
+def sniff_image_type(head: bytes) -> Optional[Tuple[str, str]]:
+    """Returns (content_type, extension) for a supported image, judged by its first bytes."""
+    for signature, content_type, ext in _IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type, ext
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+    return None
+
+
+def _too_large(max_bytes: Optional[int] = None) -> HTTPException:
+    max_bytes = settings.MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File is too large. The maximum size is {max_bytes / (1024 * 1024):.1f} MB."
+    )
+
+
+async def _read_head(file: UploadFile, size: int) -> bytes:
+    """Reads at least `size` bytes (or the whole file if it is shorter)."""
+    head = b""
+    while len(head) < size:
+        chunk = await file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        head += chunk
+    return head
+
+
+async def _chunks(file: UploadFile, head: bytes, max_bytes: int) -> AsyncIterator[bytes]:
+    total = len(head)
+    yield head
+    while True:
+        chunk = await file.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLarge()
+        yield chunk
+
+
+async def stream_image_to_storage(file: UploadFile, bucket: str, path_stem: str) -> str:
+    """
+    Streams an uploaded image to Supabase Storage in CHUNK_SIZE pieces and returns the stored path.
+    The size limit is enforced while reading, and the real content type is taken from the
+    file's magic bytes rather than the client-supplied header.
+    """
+    max_bytes = settings.MAX_UPLOAD_BYTES
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large()
+
+    head = await _read_head(file, 16)
+    if len(head) > max_bytes:
+        raise _too_large()
+    detected = sniff_image_type(head)
+    if detected is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Unsupported file type. Please upload a PNG, JPEG, GIF or WebP image."
+        )
+    content_type, ext = detected
+    path = f"{path_stem}{ext}"
+
+    try:
+        response = await timed(get_http_client().post(
+            f"{settings.SUPABASE_URL}/storage/v1/object/{bucket}/{path}",
+            content=_chunks(file, head, max_bytes),
+            headers={
+                "Authorization": f"Bearer {settings.SUPABASE_KEY}",
+                "apikey": settings.SUPABASE_KEY,
+                "Content-Type": content_type,
+                "x-upsert": "true",
+            },
+        ), "storage", bucket)
+    except UploadTooLarge:
+        raise _too_large()
+    response.raise_for_status()
+    logger.info("Streamed upload to %s/%s", bucket, path)
+    return path
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Turns away upload requests larger than `max_bytes` before FastAPI parses the form.
+    Form parsing spools the whole body to a temporary file before the handler runs, so the
+    check in stream_image_to_storage alone would only answer after the upload was received.
+    A declared Content-Length over the cap gets a 413 at once; a body sent without one is
+    counted as it arrives and cut off as soon as it passes the cap.
+    """
+
+    def __init__(self, app, max_bytes: int, paths: Tuple[str, ...] = UPLOAD_PATHS):
+        self.app = app
+        self.limit = max_bytes
+        self.max_bytes = max_bytes + MULTIPART_OVERHEAD_BYTES
+        self.paths = re.compile("|".join(f"(?:{p})" for p in paths))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not self.paths.fullmatch(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        declared = dict(scope["headers"]).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        started = rejected = False
+
+        async def counting_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request" and not rejected:
+                received += len(message.get("body", b""))
+                if received > self.max_bytes and not started:
+                    # Answer now; the error the parser raises next is turned into a response
+                    # by the app, which tracking_send then drops.
+                    rejected = True
+                    await self._reject(scope, receive, send)
+                    raise UploadTooLarge()
+            return message
+
+        async def tracking_send(message):
+            nonlocal started
+            if rejected:
+                return
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, tracking_send)
+        except UploadTooLarge:
+            pass  # Already answered with a 413.
+
+    async def _reject(self, scope, receive, send):
+        error = _too_large(self.limit)
+        response = JSONResponse({"detail": error.detail}, status_code=error.status_code, headers={"Connection": "close"})
+        await response(scope, receive, send)
+
+
+def image_paths(path_stem: str) -> List[str]:
+    """Every path an image stored under `path_stem` can have, one per accepted format."""
+    return [f"{path_stem}{ext}" for ext in IMAGE_EXTENSIONS]
+
+
+@task("storage.remove")
+async def remove_storage_objects(bucket: str, paths: List[str]):
+    """Background job: deletes objects from a bucket; paths that do not exist are ignored."""
+    await get_async_client().storage.from_(bucket).remove(paths)
+    logger.info("Removed %s storage paths from %s", len(paths), bucket)